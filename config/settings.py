@@ -1,10 +1,37 @@
+import os
+
 import streamlit as st
 
-# Database configuration
-BASE_DE_DATOS = "postgresql"  # ['mongodb','postgresql']
+
+def _get_secret(name):
+    """Read a secret from Streamlit, falling back to the environment.
+
+    Backends that do not use the secret (e.g. duckdb in CI) run without it.
+    """
+    try:
+        return st.secrets[name]
+    except (KeyError, FileNotFoundError):
+        return os.environ.get(name.upper())
+
+
+# Database configuration: default backend, overridable per process with the
+# SESNSP_BACKEND environment variable (see get_backend)
+BASE_DE_DATOS = "postgresql"  # ['mongodb','postgresql','duckdb']
+
+# Chart engines rendered in the general tab (['matplotlib','plotly']); the
+# libraries of engines not listed are never imported
+GRAFICAS = ["matplotlib", "plotly"]
+
+# Show the memory used by each cached catalog in the sidebar
+SHOW_MEMORY_REPORT = False
+
+# Rendered-chart cache (PNG/SVG bytes shared by all sessions)
+CHART_CACHE_MAX_BYTES = 64 * 1024 * 1024
+CHART_CACHE_MAX_ENTRIES = 256
+CHART_DPI = 200
 
 # MongoDB settings
-MONGODB_URI = st.secrets["mongodb_uri"]
+MONGODB_URI = _get_secret("mongodb_uri")
 MONGODB_DB_NAME = "dbmongo_sesnsp"
 
 # PostgreSQL settings
@@ -17,6 +44,48 @@ PG_DATABASE_URL = (
     f"postgresql+psycopg2://{PG_USER}:{PG_PASSWORD}@{PG_HOST}:{PG_PORT}/{PG_DB_NAME}"
 )
 
+# Connection pool settings (shared by all sessions of the process)
+PG_POOL_SIZE = 5  # Persistent connections kept open in the pool
+PG_MAX_OVERFLOW = 5  # Extra connections allowed under bursts
+PG_POOL_TIMEOUT = 30  # Seconds to wait for a free connection
+PG_POOL_RECYCLE = 1800  # Seconds before a connection is replaced
+PG_POOL_PRE_PING = True  # Check connection liveness before using it
+MONGODB_MAX_POOL_SIZE = 10
+MONGODB_MIN_POOL_SIZE = 1
+MONGODB_MAX_IDLE_TIME_MS = 300_000
+
+# Local columnar mirror of the remote tables (see data/local_store.py)
+USE_LOCAL_STORE = True  # Read from the mirror when it has the requested data
+LOCAL_STORE_DIR = "local_store"
+LOCAL_STORE_SYNC_BATCH = 12  # Year-months pulled per query while syncing
+CATALOG_LOAD_WORKERS = 10  # Threads used to fetch the catalogs at cold start
+QUERY_WORKERS = 8  # Maximum concurrent fetches of a fan-out (data/fanout.py)
+QUERY_TIMEOUT = 60  # Seconds allowed to each fetch of a fan-out
+CATALOG_VERSION_TTL = 300  # Seconds between checks for a new Aniomes
+USE_CUBE = True  # Serve series from the in-memory cube built from the mirror
+USE_SERIES_CACHE = True  # Fetch full histories once, slice ranges locally
+SERIES_CACHE_MAX_ENTRIES = 2048  # (CVE_LUGAR, Id_Agrupador_Delito) series kept
+# Build metropolitan series from their municipalities at query time instead of
+# storing them in dfDefinitivo (the loader then skips them; see data/regions.py)
+QUERY_TIME_METROS = False
+
+# Monthly SESNSP release loader (see data/etl.py)
+ETL_CSV_ENCODING = "latin-1"  # Encoding of the published incidence CSVs
+ETL_CHUNK_ROWS = 200_000  # CSV rows read per chunk
+ETL_INSERT_BATCH = 50_000  # Documents per insert_many call (MongoDB)
+
+
+def get_backend():
+    """Get the backend of this process.
+
+    Read on every call, so tests and benchmarks can switch backends without
+    editing this file.
+
+    Returns:
+        str: "mongodb", "postgresql" or "duckdb"
+    """
+    return os.environ.get("SESNSP_BACKEND", BASE_DE_DATOS)
+
 
 def setup_page_config():
     """Set Streamlit page configuration."""
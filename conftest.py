@@ -0,0 +1 @@
+"""pytest configuration: puts the repository root on sys.path for tests/."""
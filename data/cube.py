@@ -0,0 +1,170 @@
+"""Dense in-memory cube of crime data indexed by (lugar, agrupador, aniomes)."""
+
+import numpy as np
+import pandas as pd
+
+
+class CrimeCube:
+    """Dense 3-D arrays of `tasa` and `Num_Delitos`.
+
+    Axis 0 is `CVE_LUGAR`, axis 1 is `Id_Agrupador_Delito` and axis 2 is the
+    sorted `Aniomes`. Missing combinations are NaN. Values are stored as
+    float32 to keep the cube at half the size of the float64 frames.
+    """
+
+    def __init__(self, lugares, agrupadores, aniomes, tasa, num_delitos):
+        self.lugares = np.asarray(lugares)
+        self.agrupadores = np.asarray(agrupadores)
+        self.aniomes = np.asarray(aniomes, dtype=np.int64)
+        self.tasa = tasa
+        self.num_delitos = num_delitos
+
+        # Code -> axis position
+        self.idx_lugar = {cve: pos for pos, cve in enumerate(self.lugares.tolist())}
+        self.idx_agrupador = {
+            id_agrup: pos for pos, id_agrup in enumerate(self.agrupadores.tolist())
+        }
+        self.idx_aniomes = {
+            aniomes: pos for pos, aniomes in enumerate(self.aniomes.tolist())
+        }
+
+    @classmethod
+    def from_frames(cls, df_definitivo, lugares, agrupadores, aniomes):
+        """Build the cube from a long-format "dfDefinitivo" frame.
+
+        Args:
+            df_definitivo: Frame with CVE_LUGAR, Id_Agrupador_Delito, Aniomes,
+                Num_Delitos and tasa
+            lugares: Location keys (axis 0), e.g. dfLugar["CVE_LUGAR"]
+            agrupadores: Crime group IDs (axis 1)
+            aniomes: Year-months (axis 2)
+
+        Returns:
+            CrimeCube: Cube with the data of df_definitivo
+        """
+        index_lugar = pd.Index(pd.unique(np.asarray(lugares)))
+        index_agrupador = pd.Index(pd.unique(np.asarray(agrupadores)))
+        index_aniomes = pd.Index(np.unique(np.asarray(aniomes, dtype=np.int64)))
+
+        shape = (len(index_lugar), len(index_agrupador), len(index_aniomes))
+        tasa = np.full(shape, np.nan, dtype=np.float32)
+        num_delitos = np.full(shape, np.nan, dtype=np.float32)
+
+        pos_lugar = index_lugar.get_indexer(df_definitivo["CVE_LUGAR"])
+        pos_agrupador = index_agrupador.get_indexer(
+            df_definitivo["Id_Agrupador_Delito"]
+        )
+        pos_aniomes = index_aniomes.get_indexer(
+            df_definitivo["Aniomes"].astype(np.int64)
+        )
+        validos = (pos_lugar >= 0) & (pos_agrupador >= 0) & (pos_aniomes >= 0)
+        destino = (pos_lugar[validos], pos_agrupador[validos], pos_aniomes[validos])
+
+        tasa[destino] = df_definitivo["tasa"].to_numpy()[validos]
+        num_delitos[destino] = df_definitivo["Num_Delitos"].to_numpy()[validos]
+
+        return cls(index_lugar, index_agrupador, index_aniomes, tasa, num_delitos)
+
+    def covers(self, aniomes_fin):
+        """Check whether the cube holds data up to a year-month.
+
+        Args:
+            aniomes_fin: Year-month
+
+        Returns:
+            bool: True if aniomes_fin is within the time axis
+        """
+        return bool(len(self.aniomes)) and int(aniomes_fin) <= self.aniomes[-1]
+
+    def range_slice(self, aniomes_ini, aniomes_fin):
+        """Get the time-axis slice of a year-month range (inclusive).
+
+        Args:
+            aniomes_ini: Start year-month
+            aniomes_fin: End year-month
+
+        Returns:
+            slice: Positions on axis 2
+        """
+        inicio = np.searchsorted(self.aniomes, int(aniomes_ini), side="left")
+        fin = np.searchsorted(self.aniomes, int(aniomes_fin), side="right")
+        return slice(inicio, fin)
+
+    def series(self, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+        """Get the series of several locations as a long-format frame.
+
+        Args:
+            cve_lugares: List of location keys
+            id_agrup_del: Crime group ID
+            aniomes_ini: Start year-month
+            aniomes_fin: End year-month
+
+        Returns:
+            DataFrame: Same columns as the database series queries; months
+            without data are omitted
+        """
+        columnas = ["CVE_LUGAR", "Id_Agrupador_Delito", "Aniomes", "Num_Delitos", "tasa"]
+        cve_lugares = [cve for cve in cve_lugares if cve in self.idx_lugar]
+        pos_agrupador = self.idx_agrupador.get(id_agrup_del)
+        if not cve_lugares or pos_agrupador is None:
+            return pd.DataFrame(columns=columnas)
+
+        pos_lugar = [self.idx_lugar[cve] for cve in cve_lugares]
+        tramo = self.range_slice(aniomes_ini, aniomes_fin)
+        aniomes = self.aniomes[tramo]
+
+        tasa = self.tasa[pos_lugar, pos_agrupador, tramo].ravel()
+        num_delitos = self.num_delitos[pos_lugar, pos_agrupador, tramo].ravel()
+        validos = ~np.isnan(tasa)
+
+        return pd.DataFrame(
+            {
+                "CVE_LUGAR": np.repeat(cve_lugares, len(aniomes))[validos],
+                "Id_Agrupador_Delito": id_agrup_del,
+                "Aniomes": np.tile(aniomes, len(cve_lugares))[validos],
+                "Num_Delitos": num_delitos[validos],
+                "tasa": tasa[validos],
+            },
+            columns=columnas,
+        )
+
+    def panel(
+        self, id_agrup_del, aniomes_ini, aniomes_fin, cve_lugares=None, campo="tasa"
+    ):
+        """Get a (locations x months) matrix for cross-location analytics.
+
+        Args:
+            id_agrup_del: Crime group ID
+            aniomes_ini: Start year-month
+            aniomes_fin: End year-month
+            cve_lugares: List of location keys (optional, all by default)
+            campo: "tasa" or "Num_Delitos"
+
+        Returns:
+            tuple: (location keys, year-months, 2-D array); the array is all
+            NaN for a crime group missing from the cube
+        """
+        valores = self.tasa if campo == "tasa" else self.num_delitos
+        tramo = self.range_slice(aniomes_ini, aniomes_fin)
+        pos_agrupador = self.idx_agrupador.get(id_agrup_del)
+        if pos_agrupador is None:
+            if cve_lugares is None:
+                cve_lugares = self.lugares
+            cve_lugares = [cve for cve in cve_lugares if cve in self.idx_lugar]
+            aniomes = self.aniomes[tramo]
+            return (
+                np.asarray(cve_lugares),
+                aniomes,
+                np.full((len(cve_lugares), len(aniomes)), np.nan),
+            )
+
+        if cve_lugares is None:
+            return self.lugares, self.aniomes[tramo], valores[:, pos_agrupador, tramo]
+
+        cve_lugares = [cve for cve in cve_lugares if cve in self.idx_lugar]
+        pos_lugar = [self.idx_lugar[cve] for cve in cve_lugares]
+        return (
+            np.asarray(cve_lugares),
+            self.aniomes[tramo],
+            valores[pos_lugar, pos_agrupador, tramo],
+        )
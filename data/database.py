@@ -1,21 +1,147 @@
-from pymongo.mongo_client import MongoClient
-from sqlalchemy import create_engine
-from config.settings import BASE_DE_DATOS, MONGODB_URI, MONGODB_DB_NAME, PG_DATABASE_URL
+import threading
+import time
 
+import streamlit as st
+from config.settings import (
+    MONGODB_URI,
+    MONGODB_DB_NAME,
+    MONGODB_MAX_POOL_SIZE,
+    MONGODB_MIN_POOL_SIZE,
+    MONGODB_MAX_IDLE_TIME_MS,
+    PG_DATABASE_URL,
+    PG_POOL_SIZE,
+    PG_MAX_OVERFLOW,
+    PG_POOL_TIMEOUT,
+    PG_POOL_RECYCLE,
+    PG_POOL_PRE_PING,
+    get_backend,
+)
+from data.sources import get_data_source
 
-def init_connections():
-    """Initialize database connections based on configuration.
+
+class ConnectionManager:
+    """Long-lived database connections shared by every session of the process.
+
+    The MongoDB client and the SQLAlchemy engine are created lazily on first
+    use and keep their own connection pools, so Streamlit reruns reuse open
+    connections instead of paying a new TLS handshake each time. Only the
+    driver of the configured backend is imported; the embedded duckdb backend
+    needs neither.
+    """
+
+    def __init__(
+        self,
+        backend=None,
+        pg_pool_size=PG_POOL_SIZE,
+        pg_max_overflow=PG_MAX_OVERFLOW,
+        pg_pool_timeout=PG_POOL_TIMEOUT,
+        pg_pool_recycle=PG_POOL_RECYCLE,
+        pg_pool_pre_ping=PG_POOL_PRE_PING,
+        mongo_max_pool_size=MONGODB_MAX_POOL_SIZE,
+        mongo_min_pool_size=MONGODB_MIN_POOL_SIZE,
+        mongo_max_idle_time_ms=MONGODB_MAX_IDLE_TIME_MS,
+    ):
+        self.backend = backend or get_backend()
+        self.pg_pool_size = pg_pool_size
+        self.pg_max_overflow = pg_max_overflow
+        self.pg_pool_timeout = pg_pool_timeout
+        self.pg_pool_recycle = pg_pool_recycle
+        self.pg_pool_pre_ping = pg_pool_pre_ping
+        self.mongo_max_pool_size = mongo_max_pool_size
+        self.mongo_min_pool_size = mongo_min_pool_size
+        self.mongo_max_idle_time_ms = mongo_max_idle_time_ms
+
+        self._client = None
+        self._engine = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self):
+        """MongoDB client (None when MongoDB is not the configured backend)."""
+        if self.backend != "mongodb":
+            return None
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from pymongo.mongo_client import MongoClient
+
+                    self._client = MongoClient(
+                        MONGODB_URI,
+                        maxPoolSize=self.mongo_max_pool_size,
+                        minPoolSize=self.mongo_min_pool_size,
+                        maxIdleTimeMS=self.mongo_max_idle_time_ms,
+                    )
+        return self._client
+
+    @property
+    def engine(self):
+        """SQLAlchemy engine (None when PostgreSQL is not the configured backend)."""
+        if self.backend != "postgresql":
+            return None
+        if self._engine is None:
+            with self._lock:
+                if self._engine is None:
+                    from sqlalchemy import create_engine
+
+                    self._engine = create_engine(
+                        PG_DATABASE_URL,
+                        pool_size=self.pg_pool_size,
+                        max_overflow=self.pg_max_overflow,
+                        pool_timeout=self.pg_pool_timeout,
+                        pool_recycle=self.pg_pool_recycle,
+                        pool_pre_ping=self.pg_pool_pre_ping,
+                    )
+        return self._engine
+
+    def health(self):
+        """Report the state of the configured backend.
+
+        Returns:
+            dict: Backend name, reachability, round-trip latency and pool status
+        """
+        estado = {"backend": self.backend, "ok": False, "latency_ms": None}
+        inicio = time.perf_counter()
+        try:
+            get_data_source(self.client, self.engine, self.backend).ping()
+            if self.backend == "mongodb":
+                estado["pool"] = {"max_pool_size": self.mongo_max_pool_size}
+            elif self.backend == "postgresql":
+                estado["pool"] = self.engine.pool.status()
+            estado["ok"] = True
+        except Exception as error:
+            estado["error"] = str(error)
+        estado["latency_ms"] = round((time.perf_counter() - inicio) * 1000, 1)
+        return estado
+
+    def close(self):
+        """Close the pools. Only meant for process shutdown."""
+        with self._lock:
+            if self._client is not None:
+                self._client.close()
+                self._client = None
+            if self._engine is not None:
+                self._engine.dispose()
+                self._engine = None
+
+
+@st.cache_resource
+def get_connection_manager():
+    """Get the process-wide connection manager.
 
     Returns:
-        tuple: (mongodb_client, sqlalchemy_engine)
+        ConnectionManager: Manager shared by all sessions
     """
-    # MongoDB connection
-    client = MongoClient(MONGODB_URI)
+    return ConnectionManager()
 
-    # PostgreSQL connection
-    engine = create_engine(PG_DATABASE_URL)
 
-    return client, engine
+def init_connections():
+    """Get the shared database connections for the configured backend.
+
+    Returns:
+        tuple: (mongodb_client, sqlalchemy_engine)
+    """
+    manager = get_connection_manager()
+    return manager.client, manager.engine
 
 
 def get_db(client):
@@ -33,6 +159,9 @@ def get_db(client):
 def close_connections(client, engine):
     """Close all database connections.
 
+    The connections returned by init_connections are shared by every session,
+    so this is only meant for process shutdown, not for the end of a rerun.
+
     Args:
         client: MongoDB client
         engine: SQLAlchemy engine
@@ -0,0 +1,300 @@
+"""Loader of the monthly SESNSP releases into "dfDefinitivo" and "col_aniomes".
+
+The municipal incidence CSV (one row per municipality, year and crime
+subtype/modality, one column per month) is read in chunks and reduced as it
+streams:
+
+1. each row is mapped to its "cat_delito" entry and, through
+   "det_agrupador_delito", to every crime group that includes it;
+2. the counts are summed per municipality, group and year (12 month columns);
+3. the municipalities are rolled up into their entity, the locations listed in
+   "det_lugar_municipio" (the municipality itself and its metropolitan areas)
+   and the whole country;
+4. "tasa" (per 100,000 inhabitants) is computed against "dfPobExtendida".
+
+The rows are then bulk-loaded (COPY on PostgreSQL, unordered insert_many on
+MongoDB) and the new year-months are appended to "col_aniomes" last, so the
+app never publishes a month before its rows are in place.
+
+Usage:
+    python -m data.etl [--backend mongodb|postgresql] [--reload] archivo.csv ...
+"""
+
+import argparse
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from config.settings import (
+    ETL_CHUNK_ROWS,
+    ETL_CSV_ENCODING,
+    QUERY_TIME_METROS,
+    get_backend,
+)
+from data.database import ConnectionManager
+from data.fanout import fan_out
+from data.rates import MEMBERSHIP_TABLE, compute_rates
+from data.sources import get_data_source
+
+# Month columns of the CSV, in calendar order
+MESES_CSV = [
+    "Enero",
+    "Febrero",
+    "Marzo",
+    "Abril",
+    "Mayo",
+    "Junio",
+    "Julio",
+    "Agosto",
+    "Septiembre",
+    "Octubre",
+    "Noviembre",
+    "Diciembre",
+]
+# CSV column -> "cat_delito" column identifying the crime
+DELITO_CSV = {
+    "Tipo de delito": "Tipo_Delito",
+    "Subtipo de delito": "Subtipo_Delito",
+    "Modalidad": "Modalidad",
+}
+# Other CSV columns used
+COLUMNAS_CSV = {
+    "Año": "Year",
+    "Clave_Ent": "Id_Entidad",
+    "Cve. Municipio": "Id_Municipio",
+}
+
+CLAVES_MUNICIPIO = ["Id_Entidad", "Id_Municipio", "Id_Agrupador_Delito", "Year"]
+
+
+def map_delitos(df_chunk, df_delito, df_det_agrp):
+    """Map the CSV rows to their crime groups and sum them per municipality.
+
+    Args:
+        df_chunk: Chunk of the CSV (renamed columns)
+        df_delito: "cat_delito" catalog
+        df_det_agrp: "det_agrupador_delito" catalog
+
+    Returns:
+        tuple: (DataFrame with CLAVES_MUNICIPIO plus the 12 month columns,
+        number of rows whose crime is not in "cat_delito")
+    """
+    columnas_delito = list(DELITO_CSV.values())
+    for columna in columnas_delito:
+        df_chunk[columna] = df_chunk[columna].astype(str).str.strip()
+
+    df_claves = df_delito[["Id_Delito"] + columnas_delito].astype(
+        {columna: str for columna in columnas_delito}
+    )
+    df_chunk = df_chunk.merge(df_claves, how="left", on=columnas_delito)
+    desconocidos = int(df_chunk["Id_Delito"].isna().sum())
+
+    # One CSV row counts in every group that includes its crime
+    df_chunk = df_chunk.merge(
+        df_det_agrp[["Id_Delito", "Id_Agrupador_Delito"]], how="inner", on="Id_Delito"
+    )
+    df_mun = df_chunk.groupby(CLAVES_MUNICIPIO, as_index=False)[MESES_CSV].sum()
+    return df_mun, desconocidos
+
+
+def read_release(paths, df_delito, df_det_agrp, chunk_rows=ETL_CHUNK_ROWS):
+    """Stream the CSVs and reduce them to monthly counts per municipality.
+
+    Args:
+        paths: CSV files of the release
+        df_delito: "cat_delito" catalog
+        df_det_agrp: "det_agrupador_delito" catalog
+        chunk_rows: CSV rows read per chunk
+
+    Returns:
+        tuple: (DataFrame with Id_Entidad, Id_Municipio, Id_Agrupador_Delito,
+        Aniomes, Num_Delitos; sorted list of the year-months published in the
+        files; rows whose crime is not in "cat_delito")
+    """
+    usecols = list(COLUMNAS_CSV) + list(DELITO_CSV) + MESES_CSV
+    parciales = []
+    publicados = set()
+    desconocidos = 0
+
+    for path in paths:
+        chunks = pd.read_csv(
+            path,
+            usecols=usecols,
+            encoding=ETL_CSV_ENCODING,
+            chunksize=chunk_rows,
+            thousands=",",
+        )
+        for df_chunk in chunks:
+            df_chunk = df_chunk.rename(columns={**COLUMNAS_CSV, **DELITO_CSV})
+
+            # A month is published when any of its cells has a value
+            for year, df_year in df_chunk.groupby("Year"):
+                con_datos = df_year[MESES_CSV].notna().any().to_numpy()
+                meses = np.flatnonzero(con_datos) + 1
+                publicados.update((int(year) * 100 + meses).tolist())
+
+            df_mun, sin_delito = map_delitos(df_chunk, df_delito, df_det_agrp)
+            parciales.append(df_mun)
+            desconocidos += sin_delito
+
+    # Groups split across chunk boundaries are summed again
+    df_mun = pd.concat(parciales, ignore_index=True)
+    df_mun = df_mun.groupby(CLAVES_MUNICIPIO, as_index=False)[MESES_CSV].sum()
+
+    # Wide (12 month columns) -> long (one row per year-month), vectorized
+    n_meses = len(MESES_CSV)
+    aniomes = (
+        np.repeat(df_mun["Year"].to_numpy(dtype=np.int64) * 100, n_meses)
+        + np.tile(np.arange(1, n_meses + 1), len(df_mun))
+    )
+    df_long = pd.DataFrame(
+        {
+            columna: np.repeat(df_mun[columna].to_numpy(), n_meses)
+            for columna in CLAVES_MUNICIPIO[:-1]
+        }
+    )
+    df_long["Aniomes"] = aniomes
+    df_long["Num_Delitos"] = (
+        df_mun[MESES_CSV].fillna(0).to_numpy(dtype=np.int64).reshape(-1)
+    )
+    df_long = df_long.loc[df_long["Aniomes"].isin(publicados)]
+
+    return df_long.reset_index(drop=True), sorted(publicados), desconocidos
+
+
+def rollup_locations(df_mun, df_lugar, df_membresia, metros=not QUERY_TIME_METROS):
+    """Sum the municipal counts into every location of "dfLugar".
+
+    Args:
+        df_mun: Monthly counts per municipality (see read_release)
+        df_lugar: "dfLugar" catalog
+        df_membresia: MEMBERSHIP_TABLE (CVE_LUGAR, Id_Municipio)
+        metros: Whether to store metropolitan areas (not needed when they are
+            aggregated at query time)
+
+    Returns:
+        DataFrame: CVE_LUGAR, Id_Agrupador_Delito, Aniomes, Num_Delitos
+    """
+    claves = ["CVE_LUGAR", "Id_Agrupador_Delito", "Aniomes"]
+
+    # Municipalities and metropolitan areas
+    df_membresia = df_membresia[["CVE_LUGAR", "Id_Municipio"]].astype(
+        {"CVE_LUGAR": str, "Id_Municipio": int}
+    )
+    if not metros:
+        df_metros = df_lugar.loc[df_lugar["TIPO_LUGAR"] == "Metropoli", "CVE_LUGAR"]
+        df_membresia = df_membresia.loc[
+            ~df_membresia["CVE_LUGAR"].isin(df_metros.astype(str))
+        ]
+    df_miembros = df_mun.merge(df_membresia, how="inner", on="Id_Municipio")
+    df_miembros = df_miembros.groupby(claves, as_index=False)["Num_Delitos"].sum()
+
+    # Entities, through the CVE_ENT of their "dfLugar" row
+    df_ent = df_lugar.loc[df_lugar["TIPO_LUGAR"] == "Entidad", ["CVE_LUGAR", "CVE_ENT"]]
+    cve_lugar_ent = dict(zip(df_ent["CVE_ENT"].astype(int), df_ent["CVE_LUGAR"]))
+    df_entidades = df_mun.assign(CVE_LUGAR=df_mun["Id_Entidad"].map(cve_lugar_ent))
+    df_entidades = df_entidades.groupby(claves, as_index=False)["Num_Delitos"].sum()
+
+    # Country
+    cve_lugar_pais = df_lugar.loc[df_lugar["TIPO_LUGAR"] == "Pais", "CVE_LUGAR"]
+    df_pais = df_mun.groupby(claves[1:], as_index=False)["Num_Delitos"].sum()
+    df_pais.insert(0, "CVE_LUGAR", cve_lugar_pais.iloc[0])
+
+    df_res = pd.concat([df_miembros, df_entidades, df_pais], ignore_index=True)
+    df_res["CVE_LUGAR"] = df_res["CVE_LUGAR"].astype(str)
+    return df_res
+
+
+def load_release(source, paths, reload=False):
+    """Load a SESNSP release into the backend.
+
+    Args:
+        source: DataSource of a remote backend
+        paths: CSV files of the release
+        reload: Also replace the year-months already loaded (by default only
+            the ones newer than the latest "col_aniomes" are loaded)
+
+    Returns:
+        dict: "aniomes" (year-months loaded), "rows" and "unknown_crimes"
+    """
+    catalogos = fan_out(
+        {
+            **{
+                tabla: partial(source.read_table, tabla)
+                for tabla in [
+                    "cat_delito",
+                    "det_agrupador_delito",
+                    "dfLugar",
+                    "dfPobExtendida",
+                    MEMBERSHIP_TABLE,
+                ]
+            },
+            "latest": source.latest_aniomes,
+        }
+    )
+    df_lugar = catalogos["dfLugar"]
+    df_pob_extendida = catalogos["dfPobExtendida"]
+    df_membresia = catalogos[MEMBERSHIP_TABLE]
+
+    df_mun, publicados, desconocidos = read_release(
+        paths, catalogos["cat_delito"], catalogos["det_agrupador_delito"]
+    )
+
+    latest = catalogos["latest"]
+    if reload or latest is None:
+        aniomes = publicados
+    else:
+        aniomes = [valor for valor in publicados if valor > latest]
+    resultado = {"aniomes": aniomes, "rows": 0, "unknown_crimes": desconocidos}
+    if not aniomes:
+        return resultado
+
+    df_mun = df_mun.loc[df_mun["Aniomes"].isin(aniomes)]
+    df_res = compute_rates(
+        rollup_locations(df_mun, df_lugar, df_membresia), df_pob_extendida
+    )
+    resultado["rows"] = source.bulk_load(
+        "dfDefinitivo", df_res, replace_aniomes=aniomes
+    )
+
+    # Publish the new year-months only once their rows are loaded
+    nuevos = [valor for valor in aniomes if latest is None or valor > latest]
+    if nuevos:
+        source.bulk_load("col_aniomes", pd.DataFrame({"Aniomes": nuevos}))
+    return resultado
+
+
+def main():
+    """Run the loader from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", help="SESNSP municipal incidence CSVs")
+    parser.add_argument("--backend", default=get_backend())
+    parser.add_argument(
+        "--reload", action="store_true", help="replace already loaded year-months"
+    )
+    args = parser.parse_args()
+
+    manager = ConnectionManager(args.backend)
+    try:
+        source = get_data_source(manager.client, manager.engine, args.backend)
+        resultado = load_release(source, args.paths, reload=args.reload)
+    finally:
+        manager.close()
+
+    if not resultado["aniomes"]:
+        print("No new year-months in the files")
+        return
+    print(
+        f"Loaded {resultado['rows']:,} rows for Aniomes "
+        f"{resultado['aniomes'][0]}-{resultado['aniomes'][-1]}"
+    )
+    if resultado["unknown_crimes"]:
+        print(f"  {resultado['unknown_crimes']:,} CSV rows not in cat_delito (skipped)")
+    print(
+        "Run 'python -m data.sync' to update the local store "
+        "(reloaded year-months are pulled again)"
+    )
+
+
+if __name__ == "__main__":
+    main()
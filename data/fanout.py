@@ -0,0 +1,149 @@
+"""Run independent fetches concurrently, each with a timeout.
+
+The database drivers are blocking, so the fetches run in a thread pool: the
+wall-clock time of a fan-out is that of its slowest fetch, not the sum.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
+from config.settings import QUERY_TIMEOUT, QUERY_WORKERS
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+
+class FanOutError(Exception):
+    """A fetch of a fan-out failed, timed out or was not submitted."""
+
+    def __init__(self, nombre, mensaje):
+        super().__init__(f"{nombre}: {mensaje}")
+        self.nombre = nombre
+
+
+# Fetches still running, by (session, name): exclusive fetches are not
+# submitted again while their previous run holds a thread (and a connection)
+_en_curso = {}
+_en_curso_lock = threading.Lock()
+
+
+def _registrar(clave, future):
+    """Track an exclusive fetch until it finishes, abandoned or not."""
+    with _en_curso_lock:
+        _en_curso[clave] = future
+
+    def terminar(_):
+        with _en_curso_lock:
+            if _en_curso.get(clave) is future:
+                del _en_curso[clave]
+
+    future.add_done_callback(terminar)
+
+
+def _with_script_context(tarea, ctx):
+    """Run a fetch with the Streamlit context of the calling session, so the
+    cached functions it calls behave as in the script thread."""
+
+    def ejecutar():
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return tarea()
+
+    return ejecutar
+
+
+def fan_out(
+    tareas,
+    timeout=QUERY_TIMEOUT,
+    timeouts=None,
+    max_workers=QUERY_WORKERS,
+    parcial=False,
+    exclusivas=False,
+):
+    """Run independent fetches concurrently and collect their results.
+
+    A fetch that runs past its timeout is cancelled if it has not started.
+    Fetches already running cannot be interrupted from Python; their results
+    are discarded, and the pool's threads are released when they finish,
+    without blocking the caller. By default the first failure cancels every
+    fetch not started yet and is raised; with parcial, each fetch succeeds
+    or fails on its own.
+
+    Args:
+        tareas: dict name -> callable without arguments
+        timeout: Seconds allowed to each fetch, counted from the fan-out start
+        timeouts: dict name -> seconds, overriding timeout (optional)
+        max_workers: Maximum concurrent fetches
+        parcial: Return a FanOutError in place of the result of each failed
+            fetch instead of raising
+        exclusivas: Do not submit a fetch while the previous run with the same
+            name in the same Streamlit session is still in flight (e.g. after
+            a timeout); it fails with a FanOutError instead
+
+    Returns:
+        dict: name -> result (or FanOutError with parcial), in the order of
+        tareas
+
+    Raises:
+        FanOutError: When a fetch fails, times out or is still in flight,
+        unless parcial (chained to the cause)
+    """
+    if not tareas:
+        return {}
+    timeouts = timeouts or {}
+    ctx = get_script_run_ctx()
+    sesion = ctx.session_id if ctx is not None else None
+
+    resultados = {}
+    if exclusivas:
+        with _en_curso_lock:
+            ocupadas = [nombre for nombre in tareas if (sesion, nombre) in _en_curso]
+        for nombre in ocupadas:
+            resultados[nombre] = FanOutError(nombre, "previous request still running")
+        if ocupadas and not parcial:
+            raise resultados[ocupadas[0]]
+    pendientes = {
+        nombre: tarea for nombre, tarea in tareas.items() if nombre not in resultados
+    }
+    if ctx is not None:
+        pendientes = {
+            nombre: _with_script_context(tarea, ctx)
+            for nombre, tarea in pendientes.items()
+        }
+    if not pendientes:
+        return {nombre: resultados[nombre] for nombre in tareas}
+
+    executor = ThreadPoolExecutor(
+        max_workers=min(max_workers, len(pendientes)), thread_name_prefix="fanout"
+    )
+    inicio = time.monotonic()
+    try:
+        futures = {}
+        for nombre, tarea in pendientes.items():
+            futures[nombre] = executor.submit(tarea)
+            if exclusivas:
+                _registrar((sesion, nombre), futures[nombre])
+
+        # Shortest deadlines first, so a timeout is noticed as soon as it expires
+        for nombre in sorted(futures, key=lambda nombre: timeouts.get(nombre, timeout)):
+            limite = inicio + timeouts.get(nombre, timeout)
+            try:
+                resultados[nombre] = futures[nombre].result(
+                    timeout=max(0.0, limite - time.monotonic())
+                )
+            except FutureTimeoutError as error:
+                # Never starts if it is still queued behind slower fetches
+                futures[nombre].cancel()
+                fallo = FanOutError(nombre, "timed out")
+                fallo.__cause__ = error
+                if not parcial:
+                    raise fallo
+                resultados[nombre] = fallo
+            except Exception as error:
+                fallo = FanOutError(nombre, str(error))
+                fallo.__cause__ = error
+                if not parcial:
+                    raise fallo
+                resultados[nombre] = fallo
+        return {nombre: resultados[nombre] for nombre in tareas}
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,132 @@
+"""Custom crime groupings: any set of "cat_delito" subtypes.
+
+"dfDefinitivo" only stores the precomputed groups of "cab_agrupador_delito".
+A custom grouping is answered as a disjoint union of those groups (read from
+"det_agrupador_delito"), so its Num_Delitos is a sum of stored series and no
+combination is ever materialized.
+"""
+
+import hashlib
+
+# "cat_delito" columns shown to identify a subtype (those present are used)
+COLUMNAS_DELITO = ["Tipo_Delito", "Subtipo_Delito", "Modalidad"]
+
+
+def grouping_key(id_delitos):
+    """Canonical key of a set of subtypes (order and duplicates ignored).
+
+    Args:
+        id_delitos: Iterable of Id_Delito
+
+    Returns:
+        str: "G" plus a hash of the sorted set
+    """
+    canonico = ",".join(str(id_delito) for id_delito in sorted(set(id_delitos)))
+    return "G" + hashlib.sha1(canonico.encode()).hexdigest()[:16]
+
+
+def build_grouping_index(df_det_agrp):
+    """Map each precomputed group to the subtypes it includes.
+
+    Args:
+        df_det_agrp: "det_agrupador_delito" catalog
+
+    Returns:
+        dict: Id_Agrupador_Delito -> frozenset of Id_Delito
+    """
+    return {
+        int(id_agrup): frozenset(int(id_delito) for id_delito in id_delitos)
+        for id_agrup, id_delitos in df_det_agrp.groupby("Id_Agrupador_Delito")[
+            "Id_Delito"
+        ]
+    }
+
+
+def decompose_grouping(id_delitos, idx_grupos):
+    """Express a set of subtypes as a disjoint union of precomputed groups.
+
+    Groups are taken largest first among those contained in the set, which
+    finds the cover whenever the groups are nested (types contain subtypes,
+    subtypes contain modalities), as in the SESNSP catalogs.
+
+    Args:
+        id_delitos: Iterable of Id_Delito
+        idx_grupos: Output of build_grouping_index
+
+    Returns:
+        tuple: Sorted Id_Agrupador_Delito of the cover
+
+    Raises:
+        ValueError: When some subtypes are not isolated by any group
+    """
+    seleccion = frozenset(int(id_delito) for id_delito in id_delitos)
+    candidatos = sorted(
+        (
+            (len(miembros), id_agrup, miembros)
+            for id_agrup, miembros in idx_grupos.items()
+            if miembros and miembros <= seleccion
+        ),
+        key=lambda candidato: (-candidato[0], candidato[1]),
+    )
+
+    cubiertos = set()
+    ids_agrupador = []
+    for _, id_agrup, miembros in candidatos:
+        if cubiertos.isdisjoint(miembros):
+            cubiertos |= miembros
+            ids_agrupador.append(id_agrup)
+
+    faltantes = seleccion - cubiertos
+    if faltantes:
+        raise ValueError(
+            f"No precomputed group isolates the subtypes {sorted(faltantes)}"
+        )
+    return tuple(sorted(ids_agrupador))
+
+
+class CustomGrouping:
+    """A set of subtypes, used wherever an Id_Agrupador_Delito is accepted.
+
+    Equality and hashing go through the canonical key, so caches keyed on the
+    crime group (st.cache_data, SeriesCache) share entries for the same set
+    whatever the order the subtypes were picked in. ids_agrupador, when
+    already known (unpickling), skips the decomposition over idx_grupos.
+    """
+
+    def __init__(self, id_delitos, idx_grupos=None, ids_agrupador=None):
+        self.id_delitos = tuple(sorted(set(int(id_delito) for id_delito in id_delitos)))
+        self.key = grouping_key(self.id_delitos)
+        if ids_agrupador is None:
+            ids_agrupador = decompose_grouping(self.id_delitos, idx_grupos)
+        self.ids_agrupador = tuple(ids_agrupador)
+
+    def __eq__(self, other):
+        return isinstance(other, CustomGrouping) and self.key == other.key
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return f"CustomGrouping({self.key}, {len(self.id_delitos)} subtipos)"
+
+    def __reduce__(self):
+        # Pickled (and hashed by st.cache_data, which hashes a class by its
+        # name) by its canonical content only, without the group index
+        return (CustomGrouping, (self.id_delitos, None, self.ids_agrupador))
+
+
+def delito_labels(df_delito):
+    """Build the labels of the subtypes offered for custom groupings.
+
+    Args:
+        df_delito: "cat_delito" catalog
+
+    Returns:
+        dict: Label -> Id_Delito
+    """
+    columnas = [columna for columna in COLUMNAS_DELITO if columna in df_delito.columns]
+    if columnas:
+        etiquetas = df_delito[columnas].astype(str).agg(" - ".join, axis=1)
+    else:
+        etiquetas = df_delito["Id_Delito"].astype(str)
+    return dict(zip(etiquetas, df_delito["Id_Delito"].astype(int)))
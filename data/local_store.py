@@ -0,0 +1,222 @@
+"""Local memory-mapped Parquet mirror of the remote tables.
+
+Layout of LOCAL_STORE_DIR:
+    dfLugar.parquet, dfPobExtendida.parquet   full copies
+    col_aniomes.parquet, cat_*.parquet, ...   catalogs (duckdb backend only)
+    dfDefinitivo/part-<ini>-<fin>.parquet     one file per synced batch
+    rollup_<nivel>.parquet                    aggregates (data/rollups.py)
+    _meta.json                                high-water mark, revision and
+                                              sync info
+
+pyarrow is imported on first read/write so that the app does not pay for it
+when the mirror is not in use.
+"""
+
+import json
+import os
+
+from config.settings import LOCAL_STORE_DIR
+
+MIRRORED_TABLES = ["dfDefinitivo", "dfLugar", "dfPobExtendida"]
+# Tables derived locally from the mirror (see data/rollups.py)
+ROLLUP_TABLES = ["rollup_anual", "rollup_trimestral", "rollup_movil12"]
+# Catalogs copied only so the embedded duckdb backend has every table; the
+# other backends keep reading them remotely
+CATALOG_TABLES = [
+    "col_aniomes",
+    "cat_poblacion",
+    "cat_entidad",
+    "cat_municipio",
+    "cat_delito",
+    "cat_mes",
+    "cab_agrupador_delito",
+    "det_agrupador_delito",
+]
+# Catalogs a remote database may lack (the membership table is only read with
+# QUERY_TIME_METROS): the sync skips them, with a warning, when absent
+OPTIONAL_CATALOG_TABLES = ["det_lugar_municipio"]
+PARTITIONED_TABLES = ["dfDefinitivo"]
+META_FILE = "_meta.json"
+
+
+def table_path(table_name):
+    """Get the path of a mirrored table.
+
+    Args:
+        table_name: Name of the table
+
+    Returns:
+        str: Parquet file (or directory for partitioned tables)
+    """
+    if table_name in PARTITIONED_TABLES:
+        return os.path.join(LOCAL_STORE_DIR, table_name)
+    return os.path.join(LOCAL_STORE_DIR, f"{table_name}.parquet")
+
+
+def has_table(table_name):
+    """Check whether a table is available in the mirror.
+
+    Args:
+        table_name: Name of the table
+
+    Returns:
+        bool: True if the table has been synced
+    """
+    if table_name not in MIRRORED_TABLES + ROLLUP_TABLES:
+        return False
+    path = table_path(table_name)
+    if table_name in PARTITIONED_TABLES:
+        return os.path.isdir(path) and any(
+            nombre.endswith(".parquet") for nombre in os.listdir(path)
+        )
+    return os.path.isfile(path)
+
+
+def read_meta():
+    """Read the sync metadata of the mirror.
+
+    Returns:
+        dict: Metadata (empty when the mirror has never been synced)
+    """
+    path = os.path.join(LOCAL_STORE_DIR, META_FILE)
+    if not os.path.isfile(path):
+        return {}
+    with open(path, encoding="utf-8") as meta_file:
+        return json.load(meta_file)
+
+
+def write_meta(meta):
+    """Write the sync metadata of the mirror atomically.
+
+    Args:
+        meta: Metadata dictionary
+    """
+    os.makedirs(LOCAL_STORE_DIR, exist_ok=True)
+    path = os.path.join(LOCAL_STORE_DIR, META_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as meta_file:
+        json.dump(meta, meta_file, indent=2)
+    os.replace(tmp_path, path)
+
+
+def get_high_water_mark():
+    """Get the most recent Aniomes stored in the mirror.
+
+    Returns:
+        int or None: Latest synced year-month
+    """
+    return read_meta().get("high_water_mark")
+
+
+def get_revision():
+    """Get the number of times mirrored year-months have been rewritten.
+
+    Bumped by the sync when reloaded year-months are pulled again, so caches
+    keyed on it drop data the reload replaced.
+
+    Returns:
+        int: Mirror revision (0 when never rewritten)
+    """
+    return read_meta().get("revision", 0)
+
+
+def read_table(table_name, columns=None, filters=None):
+    """Read a mirrored table through memory-mapped Parquet.
+
+    Args:
+        table_name: Name of the table
+        columns: List of columns to read (optional)
+        filters: pyarrow filters, e.g. [("Aniomes", ">=", 202301)] (optional)
+
+    Returns:
+        DataFrame: Table data
+    """
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(
+        table_path(table_name), columns=columns, filters=filters, memory_map=True
+    )
+    return table.to_pandas()
+
+
+def write_table(df, table_name):
+    """Replace a (non-partitioned) mirrored table.
+
+    Args:
+        df: DataFrame to store
+        table_name: Name of the table
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    os.makedirs(LOCAL_STORE_DIR, exist_ok=True)
+    path = table_path(table_name)
+    tmp_path = path + ".tmp"
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def append_partition(df, table_name, aniomes_ini, aniomes_fin):
+    """Add a batch of year-months to a partitioned mirrored table.
+
+    Args:
+        df: DataFrame with the rows of the batch
+        table_name: Name of the table
+        aniomes_ini: First year-month of the batch
+        aniomes_fin: Last year-month of the batch
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = table_path(table_name)
+    os.makedirs(directory, exist_ok=True)
+    file_name = f"part-{aniomes_ini}-{aniomes_fin}.parquet"
+    path = os.path.join(directory, file_name)
+    # Hidden temporary name so readers never pick up a half-written file
+    tmp_path = os.path.join(directory, f".{file_name}.tmp")
+    pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp_path)
+    os.replace(tmp_path, path)
+
+
+def replace_aniomes(df, table_name, list_aniomes):
+    """Replace the rows of some year-months in a partitioned mirrored table.
+
+    The new rows are written first, one part per year-month, and then the
+    year-months are removed from the other parts, so readers never miss a
+    year-month (at worst they briefly see it twice).
+
+    Args:
+        df: DataFrame with the new rows of those year-months
+        table_name: Name of the table
+        list_aniomes: Year-months being replaced
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    list_aniomes = sorted(int(aniomes) for aniomes in list_aniomes)
+    nuevos = set()
+    for aniomes in list_aniomes:
+        append_partition(
+            df.loc[df["Aniomes"] == aniomes], table_name, aniomes, aniomes
+        )
+        nuevos.add(f"part-{aniomes}-{aniomes}.parquet")
+
+    directory = table_path(table_name)
+    reemplazados = pa.array(list_aniomes, type=pa.int64())
+    for file_name in sorted(os.listdir(directory)):
+        if not file_name.endswith(".parquet") or file_name in nuevos:
+            continue
+        path = os.path.join(directory, file_name)
+        table = pq.read_table(path)
+        aniomes = pc.cast(table["Aniomes"], pa.int64())
+        conservar = pc.invert(pc.is_in(aniomes, value_set=reemplazados))
+        if pc.all(conservar).as_py():
+            continue
+        table = table.filter(conservar)
+        if table.num_rows:
+            tmp_path = os.path.join(directory, f".{file_name}.tmp")
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, path)
+        else:
+            os.remove(path)
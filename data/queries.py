@@ -1,170 +1,675 @@
+import numpy as np
 import pandas as pd
-from config.settings import BASE_DE_DATOS
+import streamlit as st
+from config.settings import (
+    CATALOG_VERSION_TTL,
+    SERIES_CACHE_MAX_ENTRIES,
+    QUERY_TIME_METROS,
+    USE_CUBE,
+    USE_LOCAL_STORE,
+    USE_SERIES_CACHE,
+)
+from data import local_store
+from data.cube import CrimeCube
+from data.groupings import CustomGrouping
+from data.rates import MEMBERSHIP_TABLE, compute_rates
+from data.rollups import (
+    COLUMNAS_ROLLUP,
+    TABLAS_ROLLUP,
+    build_rollups,
+    choose_rollup,
+    periodo_range,
+    shift_aniomes,
+)
+from data.schema import normalize_dtypes
+from data.series_cache import SeriesCache
+from data.regions import Region, aggregate_regions, build_membership_index
+from data.sources import (
+    GROUP_SERIES_COLUMNS,
+    RANKING_COLUMNS,
+    SERIES_COLUMNS,
+    get_data_source,
+)
 
 
-def get_collection_data(client, engine, collection_name, query=None):
-    """Get data from either MongoDB or PostgreSQL.
+
+def to_python_scalar(value):
+    """Convert numpy scalars to plain Python values for the database drivers.
+
+    Args:
+        value: Scalar value (numpy or Python)
+
+    Returns:
+        Plain Python value
+    """
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+
+def get_collection_data(client, engine, collection_name, filters=None, columns=None):
+    """Get data from the local mirror, or from the configured backend.
+
+    Args:
+        client: MongoDB client
+        engine: SQLAlchemy engine
+        collection_name: Name of the collection/table
+        filters: List of (column, operator, value) conditions (optional, see
+            DataSource.read_table)
+        columns: List of columns to return (optional, all by default)
+
+    Returns:
+        DataFrame: Data from the mirror or the database
+    """
+    if USE_LOCAL_STORE and local_store.has_table(collection_name):
+        df = local_store.read_table(
+            collection_name, columns=columns, filters=filters or None
+        )
+    else:
+        df = get_remote_collection_data(
+            client, engine, collection_name, filters, columns
+        )
+
+    # Compact dtypes before the frame is cached and copied per session
+    return normalize_dtypes(df)
+
+
+def get_remote_collection_data(
+    client, engine, collection_name, filters=None, columns=None
+):
+    """Get data from the configured backend.
 
     Args:
         client: MongoDB client
         engine: SQLAlchemy engine
         collection_name: Name of the collection/table
-        query: Query parameters (optional)
+        filters: List of (column, operator, value) conditions (optional, see
+            DataSource.read_table)
+        columns: List of columns to return (optional, all by default)
 
     Returns:
         DataFrame: Data from the database
     """
-    if BASE_DE_DATOS == "mongodb":
-        db = client["dbmongo_sesnsp"]
-        collection = db[collection_name]
+    return get_data_source(client, engine).read_table(
+        collection_name, columns, filters
+    )
 
-        if query:
-            cursor = collection.find(query)
-        else:
-            cursor = collection.find()
 
-        df = pd.DataFrame(list(cursor))
-        if "_id" in df.columns:
-            df.drop(columns=["_id"], inplace=True)
+@st.cache_resource(max_entries=1)
+def _load_cube(_client, _engine, version, revision=0):
+    """Build the crime cube from the local mirror.
 
-    elif BASE_DE_DATOS == "postgresql":
-        if query:
-            df = pd.read_sql_query(query, engine)
-        else:
-            table_name = collection_name
-            # Handle special cases for table names that might need quotes
-            if collection_name in ["dfLugar", "dfPobExtendida", "dfDefinitivo"]:
-                table_name = f'"{collection_name}"'
-            df = pd.read_sql_query(f"SELECT * FROM {table_name}", engine)
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+        version: Mirror high-water mark (a new value rebuilds the cube)
+        revision: Mirror revision (bumped when reloaded year-months are
+            pulled again; a new value rebuilds the cube too)
 
-    return df
+    Returns:
+        CrimeCube: Cube shared read-only by all sessions
+    """
+    df_definitivo = local_store.read_table("dfDefinitivo", columns=SERIES_COLUMNS)
+    df_lugar = get_collection_data(_client, _engine, "dfLugar", columns=["CVE_LUGAR"])
+    df_cab_agrp = get_collection_data(_client, _engine, "cab_agrupador_delito")
+    df_aniomes = get_collection_data(_client, _engine, "col_aniomes")
+    aniomes = df_aniomes.loc[df_aniomes["Aniomes"] <= version, "Aniomes"]
+
+    return CrimeCube.from_frames(
+        df_definitivo,
+        df_lugar["CVE_LUGAR"],
+        df_cab_agrp["Id_Agrupador_Delito"],
+        aniomes,
+    )
 
 
-def get_crime_data(client, engine, id_ubic, id_agrup_del, aniomes_ini, aniomes_fin):
-    """Get crime data for specific location, crime type and time period.
+def get_cube(client, engine):
+    """Get the crime cube when the local mirror is available.
 
     Args:
         client: MongoDB client
         engine: SQLAlchemy engine
-        id_ubic: Location ID
+
+    Returns:
+        CrimeCube or None: Cube for the current mirror version
+    """
+    if not (USE_CUBE and USE_LOCAL_STORE):
+        return None
+    meta = local_store.read_meta()
+    high_water_mark = meta.get("high_water_mark")
+    if high_water_mark is None:
+        return None
+    return _load_cube(client, engine, high_water_mark, meta.get("revision", 0))
+
+
+@st.cache_data(ttl=CATALOG_VERSION_TTL)
+def get_metro_index(_client, _engine):
+    """Get the member municipalities of every metropolitan area.
+
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+
+    Returns:
+        dict: Metro CVE_LUGAR -> tuple of municipal CVE_LUGAR
+    """
+    df_membresia = get_collection_data(_client, _engine, MEMBERSHIP_TABLE)
+    df_lugar = get_collection_data(
+        _client, _engine, "dfLugar", columns=["CVE_LUGAR", "TIPO_LUGAR"]
+    )
+    return build_membership_index(df_membresia, df_lugar)
+
+
+def get_region_members(client, engine, cve_lugares):
+    """Get the locations to aggregate from municipalities at query time.
+
+    Args:
+        client: MongoDB client
+        engine: SQLAlchemy engine
+        cve_lugares: List of location keys
+
+    Returns:
+        dict: CVE_LUGAR -> member municipal CVE_LUGAR, for ad-hoc Regions and
+        (with QUERY_TIME_METROS) metropolitan areas
+    """
+    miembros = {
+        cve_lugar: cve_lugar.miembros
+        for cve_lugar in cve_lugares
+        if isinstance(cve_lugar, Region)
+    }
+    if QUERY_TIME_METROS:
+        idx_metros = get_metro_index(client, engine)
+        miembros.update(
+            (cve_lugar, idx_metros[cve_lugar])
+            for cve_lugar in cve_lugares
+            if cve_lugar in idx_metros and cve_lugar not in miembros
+        )
+    return miembros
+
+
+def _read_series(client, engine, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+    """Read crime series with compact dtypes (see _fetch_series).
+
+    Regions aggregated at query time are summed from their municipalities,
+    fetched in the same call as the other locations.
+
+    Args:
+        client: MongoDB client
+        engine: SQLAlchemy engine
+        cve_lugares: List of location keys
         id_agrup_del: Crime group ID
         aniomes_ini: Start year-month
         aniomes_fin: End year-month
 
     Returns:
-        DataFrame: Crime data
-    """
-    if BASE_DE_DATOS == "mongodb":
-        db = client["dbmongo_sesnsp"]
-        collection = db["dfDefinitivo"]
-        query = {
-            "$and": [
-                {"CVE_LUGAR": id_ubic},
-                {"Aniomes": {"$gte": aniomes_ini}},
-                {"Aniomes": {"$lte": aniomes_fin}},
-                {"Id_Agrupador_Delito": id_agrup_del},
-            ]
-        }
-        results = collection.find(query)
-        df_res = pd.DataFrame(list(results))
-        if "_id" in df_res.columns:
-            df_res.drop(columns=["_id"], inplace=True)
-    elif BASE_DE_DATOS == "postgresql":
-        query = f"""
-            SELECT * FROM "dfDefinitivo" 
-            WHERE "CVE_LUGAR" = '{id_ubic}' 
-            AND "Aniomes" >= '{aniomes_ini}' 
-            AND "Aniomes" <= '{aniomes_fin}' 
-            AND "Id_Agrupador_Delito" = '{id_agrup_del}'
-        """
-        df_res = pd.read_sql_query(query, engine)
+        DataFrame: Crime data with the SERIES_COLUMNS columns
+    """
+    miembros = get_region_members(client, engine, cve_lugares)
+    directos = [cve_lugar for cve_lugar in cve_lugares if cve_lugar not in miembros]
+    todos_miembros = sorted(
+        {miembro for lista in miembros.values() for miembro in lista}
+    )
 
-    return df_res
+    df_res = _fetch_series(
+        client,
+        engine,
+        list(dict.fromkeys(directos + todos_miembros)),
+        id_agrup_del,
+        aniomes_ini,
+        aniomes_fin,
+    )
+    if miembros:
+        df_regiones = aggregate_regions(
+            df_res, miembros, get_population_data(client, engine)
+        )
+        df_res = pd.concat(
+            [df_res.loc[df_res["CVE_LUGAR"].isin(directos)], df_regiones],
+            ignore_index=True,
+        )
+    return normalize_dtypes(df_res, categorical=False)
+
+
+def _fetch_series(client, engine, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+    """Read crime series with bound parameters and column projection.
+
+    Args:
+        client: MongoDB client
+        engine: SQLAlchemy engine
+        cve_lugares: List of location keys
+        id_agrup_del: Crime group ID or CustomGrouping
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+
+    Returns:
+        DataFrame: Crime data with the SERIES_COLUMNS columns
+    """
+    cve_lugares = [to_python_scalar(cve_lugar) for cve_lugar in cve_lugares]
+    id_agrup_del = to_python_scalar(id_agrup_del)
+    aniomes_ini = int(aniomes_ini)
+    aniomes_fin = int(aniomes_fin)
+
+    if isinstance(id_agrup_del, CustomGrouping):
+        return _fetch_custom_series(
+            client, engine, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin
+        )
 
+    # Serve from the in-memory cube: array slices, no query at all
+    cube = get_cube(client, engine)
+    # Crime groups added remotely after the cube was built go to the backend
+    if (
+        cube is not None
+        and cube.covers(aniomes_fin)
+        and id_agrup_del in cube.idx_agrupador
+    ):
+        return cube.series(cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin)
 
-def get_national_crime_data(client, engine, id_agrup_del, aniomes_ini, aniomes_fin):
-    """Get national crime data for specific crime type and time period.
+    # Serve from the local mirror when it already covers the requested range
+    high_water_mark = local_store.get_high_water_mark() if USE_LOCAL_STORE else None
+    if high_water_mark is not None and aniomes_fin <= high_water_mark:
+        return local_store.read_table(
+            "dfDefinitivo",
+            columns=SERIES_COLUMNS,
+            filters=[
+                ("CVE_LUGAR", "in", cve_lugares),
+                ("Id_Agrupador_Delito", "=", id_agrup_del),
+                ("Aniomes", ">=", aniomes_ini),
+                ("Aniomes", "<=", aniomes_fin),
+            ],
+        )
+
+    return get_data_source(client, engine).read_series(
+        cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin
+    )
+
+
+@st.cache_data(ttl=CATALOG_VERSION_TTL)
+def get_population_data(_client, _engine):
+    """Get the population of every location and year, to compute rates.
+
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+
+    Returns:
+        DataFrame: CVE_LUGAR, Year and Num_Habs from "dfPobExtendida"
+    """
+    return get_collection_data(
+        _client, _engine, "dfPobExtendida", columns=["CVE_LUGAR", "Year", "Num_Habs"]
+    )
+
+
+def _fetch_custom_series(
+    client, engine, cve_lugares, grouping, aniomes_ini, aniomes_fin
+):
+    """Read the series of a custom grouping as the sum of its groups.
+
+    Num_Delitos is summed where the data live (cube, local mirror or backend)
+    and tasa is recomputed from the population, vectorized.
 
     Args:
         client: MongoDB client
         engine: SQLAlchemy engine
+        cve_lugares: List of location keys
+        grouping: CustomGrouping
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+
+    Returns:
+        DataFrame: SERIES_COLUMNS, with the grouping key as Id_Agrupador_Delito
+    """
+    ids_agrupador = list(grouping.ids_agrupador)
+    claves = ["CVE_LUGAR", "Aniomes"]
+
+    cube = get_cube(client, engine)
+    high_water_mark = local_store.get_high_water_mark() if USE_LOCAL_STORE else None
+    # Crime groups added remotely after the cube was built go to the backend
+    if (
+        cube is not None
+        and cube.covers(aniomes_fin)
+        and all(id_agrup in cube.idx_agrupador for id_agrup in ids_agrupador)
+    ):
+        df_res = pd.concat(
+            [
+                cube.series(cve_lugares, id_agrup, aniomes_ini, aniomes_fin)
+                for id_agrup in ids_agrupador
+            ],
+            ignore_index=True,
+        )
+    elif high_water_mark is not None and aniomes_fin <= high_water_mark:
+        df_res = local_store.read_table(
+            "dfDefinitivo",
+            columns=GROUP_SERIES_COLUMNS,
+            filters=[
+                ("CVE_LUGAR", "in", cve_lugares),
+                ("Id_Agrupador_Delito", "in", ids_agrupador),
+                ("Aniomes", ">=", aniomes_ini),
+                ("Aniomes", "<=", aniomes_fin),
+            ],
+        )
+    else:
+        df_res = get_data_source(client, engine).read_group_series(
+            cve_lugares, ids_agrupador, aniomes_ini, aniomes_fin
+        )
+
+    # The groups are disjoint, so their counts add up
+    df_res = df_res.groupby(claves, as_index=False, observed=True)[
+        GROUP_SERIES_COLUMNS[-1]
+    ].sum()
+    df_res.insert(1, "Id_Agrupador_Delito", grouping.key)
+    # A location-year without population degrades to NaN rates, not an error
+    df_res = compute_rates(df_res, get_population_data(client, engine), estricto=False)
+    return df_res.sort_values(by=claves, ignore_index=True)
+
+
+@st.cache_resource
+def get_series_cache():
+    """Get the process-wide full-history series cache.
+
+    Returns:
+        SeriesCache: Cache shared by all sessions
+    """
+    return SeriesCache(SERIES_CACHE_MAX_ENTRIES)
+
+
+def get_series_data(
+    client, engine, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin, version=None
+):
+    """Get crime data for several locations in a single round trip.
+
+    When the data version is given, the complete history of each location is
+    fetched once and later ranges are sliced locally (see SeriesCache).
+
+    Args:
+        client: MongoDB client
+        engine: SQLAlchemy engine
+        cve_lugares: List of location keys (e.g. [id_ubic, "E<ent>", "P00"])
+        id_agrup_del: Crime group ID
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+        version: Data version, (latest Aniomes in col_aniomes, mirror
+            revision) as in the catalog bundle (optional)
+
+    Returns:
+        DataFrame: Long-format crime data, one row per location and year-month
+    """
+    # Remove duplicates while keeping order (e.g. national location + "P00")
+    cve_lugares = list(dict.fromkeys(cve_lugares))
+
+    if USE_SERIES_CACHE and version is not None:
+        latest, _ = version
+
+        def fetch_history(faltantes, id_agrup):
+            return _read_series(client, engine, faltantes, id_agrup, 0, latest)
+
+        return get_series_cache().get_range(
+            fetch_history,
+            version,
+            cve_lugares,
+            to_python_scalar(id_agrup_del),
+            aniomes_ini,
+            aniomes_fin,
+        )
+
+    return _read_series(
+        client, engine, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin
+    )
+
+
+def get_comparison_data(
+    client,
+    engine,
+    cve_lugares,
+    id_agrup_del,
+    aniomes_ini,
+    aniomes_fin,
+    version=None,
+    campo="tasa",
+):
+    """Get one series per location in a single fetch, as a wide frame.
+
+    Args:
+        client: MongoDB client
+        engine: SQLAlchemy engine
+        cve_lugares: List of location keys
+        id_agrup_del: Crime group ID
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+        version: Data version, as in get_series_data (optional)
+        campo: Value to compare ("tasa" or "Num_Delitos")
+
+    Returns:
+        DataFrame: "Aniomes" plus one column per CVE_LUGAR (in the given
+        order); months without data are NaN, so the variation statistics
+        skip them instead of reading a 0
+    """
+    cve_lugares = list(dict.fromkeys(cve_lugares))
+    df_series = get_series_data(
+        client, engine, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin, version
+    )
+
+    # Single reshape instead of one merge per location
+    df_wide = df_series.pivot_table(
+        index="Aniomes", columns="CVE_LUGAR", values=campo, aggfunc="sum"
+    )
+    df_wide = df_wide.reindex(columns=cve_lugares)
+    df_wide.columns.name = None
+    return df_wide.reset_index()
+
+
+def get_ranking_data(
+    client, engine, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin
+):
+    """Rank locations by crime rate over a period, aggregated in the database.
+
+    Only one row per location comes back: the aggregation runs in the backend
+    (GROUP BY or $group), or over the in-memory cube when available.
+
+    Args:
+        client: MongoDB client
+        engine: SQLAlchemy engine
+        cve_lugares: Location keys to rank (e.g. every municipality)
         id_agrup_del: Crime group ID
         aniomes_ini: Start year-month
         aniomes_fin: End year-month
 
     Returns:
-        DataFrame: National crime data
-    """
-    if BASE_DE_DATOS == "mongodb":
-        db = client["dbmongo_sesnsp"]
-        collection = db["dfDefinitivo"]
-        query = {
-            "$and": [
-                {"CVE_LUGAR": "P00"},
-                {"Aniomes": {"$gte": aniomes_ini}},
-                {"Aniomes": {"$lte": aniomes_fin}},
-                {"Id_Agrupador_Delito": id_agrup_del},
-            ]
-        }
-        results = collection.find(query)
-        df_res = pd.DataFrame(list(results))
-        if "_id" in df_res.columns:
-            df_res.drop(columns=["_id"], inplace=True)
-    elif BASE_DE_DATOS == "postgresql":
-        query = f"""
-            SELECT * FROM "dfDefinitivo" 
-            WHERE "CVE_LUGAR" = 'P00' 
-            AND "Aniomes" >= '{aniomes_ini}' 
-            AND "Aniomes" <= '{aniomes_fin}' 
-            AND "Id_Agrupador_Delito" = '{id_agrup_del}'
-        """
-        df_res = pd.read_sql_query(query, engine)
-
-    df_res.rename(columns={"tasa": "tasa_nal"}, inplace=True)
-    return df_res[["Aniomes", "tasa_nal"]]
-
-
-def get_estatal_crime_data(
-    client, engine, id_agrup_del, id_ent_asoc, aniomes_ini, aniomes_fin
+        DataFrame: CVE_LUGAR, Num_Delitos (sum), tasa (sum of monthly rates),
+        tasa_promedio (mean over the months with data) and meses, sorted by
+        tasa_promedio descending, so places with missing months are not
+        ranked below places with full data
+    """
+    cve_lugares = [to_python_scalar(cve_lugar) for cve_lugar in cve_lugares]
+    id_agrup_del = to_python_scalar(id_agrup_del)
+    aniomes_ini = int(aniomes_ini)
+    aniomes_fin = int(aniomes_fin)
+
+    # Custom groupings and aggregated regions have no stored rows to aggregate:
+    # their series are read and reduced here
+    if isinstance(id_agrup_del, CustomGrouping):
+        por_series = cve_lugares
+    else:
+        por_series = list(get_region_members(client, engine, cve_lugares))
+    excluidos = set(por_series)
+    directos = [cve_lugar for cve_lugar in cve_lugares if cve_lugar not in excluidos]
+
+    partes = []
+    if por_series:
+        df_series = _read_series(
+            client, engine, por_series, id_agrup_del, aniomes_ini, aniomes_fin
+        )
+        partes.append(
+            df_series.groupby("CVE_LUGAR", as_index=False, observed=True).agg(
+                Num_Delitos=("Num_Delitos", "sum"),
+                tasa=("tasa", "sum"),
+                tasa_promedio=("tasa", "mean"),
+                meses=("tasa", "size"),
+            )
+        )
+
+    cube = get_cube(client, engine) if directos else None
+    # Crime groups added remotely after the cube was built go to the backend
+    if (
+        cube is not None
+        and cube.covers(aniomes_fin)
+        and id_agrup_del in cube.idx_agrupador
+    ):
+        claves, _, tasa = cube.panel(id_agrup_del, aniomes_ini, aniomes_fin, directos)
+        _, _, num_delitos = cube.panel(
+            id_agrup_del, aniomes_ini, aniomes_fin, directos, "Num_Delitos"
+        )
+        meses = (~np.isnan(tasa)).sum(axis=1)
+        df_cubo = pd.DataFrame(
+            {
+                "CVE_LUGAR": claves,
+                "Num_Delitos": np.nansum(num_delitos, axis=1),
+                "tasa": np.nansum(tasa, axis=1),
+                "tasa_promedio": np.nansum(tasa, axis=1) / np.maximum(meses, 1),
+                "meses": meses,
+            }
+        )
+        partes.append(df_cubo.loc[df_cubo["meses"] > 0])
+    elif directos:
+        partes.append(
+            get_data_source(client, engine).read_ranking(
+                directos, id_agrup_del, aniomes_ini, aniomes_fin
+            )
+        )
+
+    if not partes:
+        return pd.DataFrame(columns=RANKING_COLUMNS)
+    df_res = pd.concat(partes, ignore_index=True)
+    return df_res.sort_values(
+        by=["tasa_promedio", "meses"], ascending=False, ignore_index=True
+    )
+
+
+def get_rollup_series(
+    client, engine, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin, nivel=None
 ):
-    """Get estatal crime data for specific crime type and time period.
+    """Get aggregated series from the coarsest rollup that answers the range.
+
+    Full years come from the annual rollup and full quarters from the
+    quarterly one; "movil12" gives trailing-12-month sums. Rollups are read
+    from the local store and computed from monthly rows when unavailable.
 
     Args:
         client: MongoDB client
         engine: SQLAlchemy engine
+        cve_lugares: List of location keys
         id_agrup_del: Crime group ID
-        id_ent_asoc: State of Mexico
         aniomes_ini: Start year-month
         aniomes_fin: End year-month
+        nivel: "anual", "trimestral", "movil12" (optional, chosen from the
+            range by default)
+
+    Returns:
+        tuple: (level used, or None for monthly data; DataFrame with
+        CVE_LUGAR, Id_Agrupador_Delito, Periodo, Num_Delitos, tasa, meses)
+    """
+    if nivel is None:
+        nivel = choose_rollup(aniomes_ini, aniomes_fin)
+    cve_lugares = [to_python_scalar(cve_lugar) for cve_lugar in cve_lugares]
+    id_agrup_del = to_python_scalar(id_agrup_del)
+
+    if nivel is None:
+        df_res = _read_series(
+            client, engine, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin
+        )
+        df_res = df_res.rename(columns={"Aniomes": "Periodo"}).assign(meses=1)
+        return None, df_res[COLUMNAS_ROLLUP]
+
+    periodo_ini, periodo_fin = periodo_range(nivel, aniomes_ini, aniomes_fin)
+    high_water_mark = local_store.get_high_water_mark() if USE_LOCAL_STORE else None
+    tabla = TABLAS_ROLLUP[nivel]
+    # Custom groupings and aggregated regions are never materialized
+    materializado = not (
+        isinstance(id_agrup_del, CustomGrouping)
+        or get_region_members(client, engine, cve_lugares)
+    )
+    if (
+        materializado
+        and high_water_mark is not None
+        and int(aniomes_fin) <= high_water_mark
+        and local_store.has_table(tabla)
+    ):
+        df_res = local_store.read_table(
+            tabla,
+            filters=[
+                ("CVE_LUGAR", "in", cve_lugares),
+                ("Id_Agrupador_Delito", "=", id_agrup_del),
+                ("Periodo", ">=", periodo_ini),
+                ("Periodo", "<=", periodo_fin),
+            ],
+        )
+        return nivel, df_res.sort_values(by=["CVE_LUGAR", "Periodo"], ignore_index=True)
+
+    df_res = None
+    if materializado:
+        df_res = get_data_source(client, engine).read_rollup(
+            tabla, cve_lugares, id_agrup_del, periodo_ini, periodo_fin
+        )
+    if df_res is not None:
+        return nivel, df_res.sort_values(by=["CVE_LUGAR", "Periodo"], ignore_index=True)
+
+    # No materialized rollup: aggregate the monthly rows (trailing windows
+    # need the 11 months before the range)
+    aniomes_desde = int(aniomes_ini)
+    if nivel == "movil12":
+        aniomes_desde = shift_aniomes(aniomes_desde, -11)
+    df_mensual = _read_series(
+        client, engine, cve_lugares, id_agrup_del, aniomes_desde, aniomes_fin
+    )
+    df_res = build_rollups(df_mensual, aniomes_desde=int(aniomes_ini))[nivel]
+    df_res = df_res.loc[df_res["Periodo"].between(periodo_ini, periodo_fin)]
+    return nivel, df_res.sort_values(by=["CVE_LUGAR", "Periodo"], ignore_index=True)
+
+
+def split_series_data(df_series, cve_lugar, nom_campo_tasa="tasa"):
+    """Extract the series of one location from a long-format frame.
+
+    Args:
+        df_series: Long-format frame returned by get_series_data
+        cve_lugar: Location key to extract
+        nom_campo_tasa: Name for the rate column in the result
+
+    Returns:
+        DataFrame: Crime data of the location
+    """
+    if not len(df_series):
+        return pd.DataFrame(columns=["Aniomes", nom_campo_tasa])
+
+    df_res = df_series.loc[df_series["CVE_LUGAR"] == cve_lugar].copy()
+    if nom_campo_tasa != "tasa":
+        df_res.rename(columns={"tasa": nom_campo_tasa}, inplace=True)
+        return df_res[["Aniomes", nom_campo_tasa]]
+    return df_res
+
+
+def get_rows_by_aniomes(client, engine, list_aniomes):
+    """Get every "dfDefinitivo" row of the given year-months from the database.
+
+    Args:
+        client: MongoDB client
+        engine: SQLAlchemy engine
+        list_aniomes: List of year-months
 
     Returns:
-        DataFrame: Estatal crime data
-    """
-    clave_consolidada = "E" + str(id_ent_asoc)
-    if BASE_DE_DATOS == "mongodb":
-        db = client["dbmongo_sesnsp"]
-        collection = db["dfDefinitivo"]
-        query = {
-            "$and": [
-                {"CVE_LUGAR": clave_consolidada},
-                {"Aniomes": {"$gte": aniomes_ini}},
-                {"Aniomes": {"$lte": aniomes_fin}},
-                {"Id_Agrupador_Delito": id_agrup_del},
-            ]
-        }
-        results = collection.find(query)
-        df_res = pd.DataFrame(list(results))
-        if "_id" in df_res.columns:
-            df_res.drop(columns=["_id"], inplace=True)
-    elif BASE_DE_DATOS == "postgresql":
-        query = f"""
-            SELECT * FROM "dfDefinitivo" 
-            WHERE "CVE_LUGAR" = '{clave_consolidada}' 
-            AND "Aniomes" >= '{aniomes_ini}' 
-            AND "Aniomes" <= '{aniomes_fin}' 
-            AND "Id_Agrupador_Delito" = '{id_agrup_del}'
-        """
-        df_res = pd.read_sql_query(query, engine)
-
-    df_res.rename(columns={"tasa": "tasa_est"}, inplace=True)
-    return df_res[["Aniomes", "tasa_est"]]
+        DataFrame: Crime data of those year-months
+    """
+    list_aniomes = [int(aniomes) for aniomes in list_aniomes]
+    return get_data_source(client, engine).read_rows_by_aniomes(list_aniomes)
+
+
+def get_latest_aniomes(client, engine):
+    """Get the most recent year-month published in "col_aniomes".
+
+    This is a single-value query, cheap enough to check data freshness often.
+
+    Args:
+        client: MongoDB client
+        engine: SQLAlchemy engine
+
+    Returns:
+        int or None: Latest year-month
+    """
+    return get_data_source(client, engine).latest_aniomes()
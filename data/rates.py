@@ -0,0 +1,43 @@
+"""Crime rates and location membership, shared by the loader and the queries."""
+
+import numpy as np
+from data.sources import SERIES_COLUMNS
+
+# Location -> member municipalities (municipalities and metropolitan areas)
+MEMBERSHIP_TABLE = "det_lugar_municipio"
+
+
+def compute_rates(df, df_pob_extendida, estricto=True):
+    """Add "tasa" (crimes per 100,000 inhabitants of the year), vectorized.
+
+    Args:
+        df: CVE_LUGAR, Id_Agrupador_Delito, Aniomes, Num_Delitos
+        df_pob_extendida: "dfPobExtendida" catalog
+        estricto: Raise when a population is missing (the loader must not
+            store incomplete rates); with False, used at query time, those
+            rows get a NaN "tasa" instead
+
+    Returns:
+        DataFrame: SERIES_COLUMNS
+
+    Raises:
+        ValueError: When a location has no population for a year (estricto)
+    """
+    df_pob = df_pob_extendida[["CVE_LUGAR", "Year", "Num_Habs"]].astype(
+        {"CVE_LUGAR": str, "Year": int}
+    )
+    df = df.assign(Year=df["Aniomes"] // 100).merge(
+        df_pob, how="left", on=["CVE_LUGAR", "Year"]
+    )
+
+    sin_poblacion = df["Num_Habs"].isna() | (df["Num_Habs"] <= 0)
+    if estricto and sin_poblacion.any():
+        faltantes = df.loc[sin_poblacion, ["CVE_LUGAR", "Year"]].drop_duplicates()
+        raise ValueError(
+            f"No population in dfPobExtendida for {len(faltantes)} location-years, "
+            f"e.g. {faltantes.head(5).to_records(index=False).tolist()}"
+        )
+
+    num_habs = np.where(sin_poblacion, np.nan, df["Num_Habs"].to_numpy(dtype=float))
+    df["tasa"] = df["Num_Delitos"].to_numpy() * 100_000 / num_habs
+    return df[SERIES_COLUMNS]
@@ -0,0 +1,115 @@
+"""Regions aggregated from their member municipalities at query time.
+
+Metropolitan areas are listed with their municipalities in MEMBERSHIP_TABLE
+(data/rates.py; CVE_LUGAR, Id_Municipio), the table the loader uses to roll
+municipalities up. With QUERY_TIME_METROS their series are no longer
+read from "dfDefinitivo" but summed from the municipal series, so a changed
+definition needs no reload. Ad-hoc regions (any set of municipalities) are
+answered the same way.
+"""
+
+import hashlib
+
+import pandas as pd
+from data.rates import compute_rates
+
+
+class Region(str):
+    """Ad-hoc region: a location key standing for a set of municipalities.
+
+    The string value is a canonical hash of the sorted member keys, so a
+    Region is accepted (and cached) wherever a CVE_LUGAR is.
+    """
+
+    def __new__(cls, miembros, nombre=None):
+        miembros = tuple(sorted(set(str(miembro) for miembro in miembros)))
+        canonico = ",".join(miembros)
+        region = super().__new__(
+            cls, "R" + hashlib.sha1(canonico.encode()).hexdigest()[:16]
+        )
+        region.miembros = miembros
+        region.nombre = nombre or f"Región ({len(miembros)} municipios)"
+        return region
+
+    def __getnewargs__(self):
+        return (self.miembros, self.nombre)
+
+
+def build_membership_index(df_membresia, df_lugar, tipo_lugar="Metropoli"):
+    """Map each location of a type to the keys of its member municipalities.
+
+    Args:
+        df_membresia: MEMBERSHIP_TABLE
+        df_lugar: "dfLugar" catalog
+        tipo_lugar: TIPO_LUGAR of the aggregated locations
+
+    Returns:
+        dict: CVE_LUGAR -> tuple of municipal CVE_LUGAR
+    """
+    df_membresia = df_membresia[["CVE_LUGAR", "Id_Municipio"]].astype(
+        {"CVE_LUGAR": str}
+    )
+    tipos = dict(zip(df_lugar["CVE_LUGAR"].astype(str), df_lugar["TIPO_LUGAR"]))
+    df_tipo = df_membresia["CVE_LUGAR"].map(tipos)
+
+    df_municipios = df_membresia.loc[df_tipo == "Municipio"].rename(
+        columns={"CVE_LUGAR": "CVE_MIEMBRO"}
+    )
+    df_miembros = df_membresia.loc[df_tipo == tipo_lugar].merge(
+        df_municipios, how="inner", on="Id_Municipio"
+    )
+    return {
+        cve_lugar: tuple(sorted(df_grupo["CVE_MIEMBRO"]))
+        for cve_lugar, df_grupo in df_miembros.groupby("CVE_LUGAR")
+    }
+
+
+def aggregate_regions(df_series, miembros, df_poblacion):
+    """Build region series from the series of their members in one reduction.
+
+    Num_Delitos is the sum over members; tasa is the population-weighted mean
+    of the member rates, i.e. the summed crimes per 100,000 inhabitants of
+    the summed population (members without data in a month count as zero).
+    A year in which some member has no population gets a NaN tasa rather
+    than the rate of a partial population.
+
+    Args:
+        df_series: Long-format member series (SERIES_COLUMNS)
+        miembros: dict region CVE_LUGAR -> member CVE_LUGAR
+        df_poblacion: CVE_LUGAR, Year, Num_Habs of the members
+
+    Returns:
+        DataFrame: SERIES_COLUMNS, one row per region, group and month
+    """
+    df_membresia = pd.DataFrame(
+        [
+            (region, miembro)
+            for region, lista in miembros.items()
+            for miembro in lista
+        ],
+        columns=["CVE_REGION", "CVE_LUGAR"],
+    )
+
+    df_res = df_series.astype({"CVE_LUGAR": str}).merge(
+        df_membresia, how="inner", on="CVE_LUGAR"
+    )
+    df_res = df_res.groupby(
+        ["CVE_REGION", "Id_Agrupador_Delito", "Aniomes"], as_index=False
+    )["Num_Delitos"].sum()
+
+    # Population of each region: all of its members, with or without data
+    df_pob = (
+        df_poblacion.loc[df_poblacion["Num_Habs"] > 0]
+        .astype({"CVE_LUGAR": str})
+        .merge(df_membresia, how="inner", on="CVE_LUGAR")
+        .groupby(["CVE_REGION", "Year"], as_index=False)
+        .agg(Num_Habs=("Num_Habs", "sum"), con_poblacion=("CVE_LUGAR", "nunique"))
+    )
+    n_miembros = df_pob["CVE_REGION"].map(
+        df_membresia.groupby("CVE_REGION")["CVE_LUGAR"].nunique()
+    )
+    df_pob["Num_Habs"] = df_pob["Num_Habs"].where(df_pob["con_poblacion"] == n_miembros)
+    df_pob = df_pob.rename(columns={"CVE_REGION": "CVE_LUGAR"})
+
+    df_res = df_res.rename(columns={"CVE_REGION": "CVE_LUGAR"})
+    return compute_rates(df_res, df_pob, estricto=False)
@@ -0,0 +1,236 @@
+"""Annual, quarterly and trailing-12-month rollups of "dfDefinitivo".
+
+The rollups are materialized in the local store next to the mirror. Each one
+holds CVE_LUGAR, Id_Agrupador_Delito, Periodo, Num_Delitos, tasa (sum of the
+monthly rates of the period) and meses (months with data). Periodo is YYYY
+(annual), YYYYQ (quarterly) or the YYYYMM closing the window (trailing-12).
+"""
+
+import numpy as np
+import pandas as pd
+from data import local_store
+
+CLAVES = ["CVE_LUGAR", "Id_Agrupador_Delito"]
+COLUMNAS_ROLLUP = CLAVES + ["Periodo", "Num_Delitos", "tasa", "meses"]
+
+# Rollup level -> local store table
+TABLAS_ROLLUP = {
+    "anual": "rollup_anual",
+    "trimestral": "rollup_trimestral",
+    "movil12": "rollup_movil12",
+}
+
+
+def periodo_anual(aniomes):
+    """YYYYMM -> YYYY."""
+    return np.asarray(aniomes) // 100
+
+
+def periodo_trimestral(aniomes):
+    """YYYYMM -> YYYYQ."""
+    aniomes = np.asarray(aniomes)
+    return aniomes // 100 * 10 + (aniomes % 100 - 1) // 3 + 1
+
+
+def _indice_mes(aniomes):
+    """YYYYMM -> consecutive month number."""
+    aniomes = np.asarray(aniomes, dtype=np.int64)
+    return aniomes // 100 * 12 + aniomes % 100 - 1
+
+
+def _aniomes_de_indice(indice):
+    """Consecutive month number -> YYYYMM."""
+    indice = np.asarray(indice, dtype=np.int64)
+    return indice // 12 * 100 + indice % 12 + 1
+
+
+def shift_aniomes(aniomes, meses):
+    """Move a year-month by a number of months.
+
+    Args:
+        aniomes: Year-month (YYYYMM)
+        meses: Months to add (negative to go back)
+
+    Returns:
+        int: Resulting year-month
+    """
+    return int(_aniomes_de_indice(_indice_mes(aniomes) + meses))
+
+
+def _rollup_calendario(df, periodos):
+    """Group monthly rows into calendar periods (years or quarters)."""
+    df_rollup = (
+        df.assign(Periodo=periodos)
+        .groupby(CLAVES + ["Periodo"], as_index=False)
+        .agg(
+            Num_Delitos=("Num_Delitos", "sum"),
+            tasa=("tasa", "sum"),
+            meses=("Aniomes", "count"),
+        )
+    )
+    return df_rollup[COLUMNAS_ROLLUP]
+
+
+def _rollup_movil12(df, aniomes_desde=None):
+    """Trailing-12-month sums, one row per (key, closing month)."""
+    if not len(df):
+        return pd.DataFrame(columns=COLUMNAS_ROLLUP)
+
+    indice = _indice_mes(df["Aniomes"])
+    inicio, fin = indice.min(), indice.max()
+    claves = pd.MultiIndex.from_frame(df[CLAVES]).unique()
+    fila = claves.get_indexer(pd.MultiIndex.from_frame(df[CLAVES]))
+    columna = indice - inicio
+
+    # Dense (keys x consecutive months) matrices; rolling sums via cumsum
+    forma = (len(claves), fin - inicio + 1)
+    acumulados = {}
+    for campo, valores in [
+        ("Num_Delitos", df["Num_Delitos"].to_numpy(dtype=float)),
+        ("tasa", df["tasa"].to_numpy(dtype=float)),
+        ("meses", np.ones(len(df))),
+    ]:
+        matriz = np.zeros(forma)
+        np.add.at(matriz, (fila, columna), np.nan_to_num(valores))
+        acumulado = np.cumsum(matriz, axis=1)
+        acumulado[:, 12:] -= acumulado[:, :-12].copy()
+        acumulados[campo] = acumulado
+
+    cierre = np.arange(inicio, fin + 1)
+    df_rollup = pd.DataFrame(
+        {
+            "CVE_LUGAR": np.repeat(claves.get_level_values(0), forma[1]),
+            "Id_Agrupador_Delito": np.repeat(claves.get_level_values(1), forma[1]),
+            "Periodo": np.tile(_aniomes_de_indice(cierre), forma[0]),
+            "Num_Delitos": acumulados["Num_Delitos"].ravel(),
+            "tasa": acumulados["tasa"].ravel(),
+            "meses": acumulados["meses"].ravel().astype(np.int64),
+        }
+    )
+    validos = df_rollup["meses"] > 0
+    if aniomes_desde is not None:
+        validos &= df_rollup["Periodo"] >= aniomes_desde
+    return df_rollup.loc[validos, COLUMNAS_ROLLUP].reset_index(drop=True)
+
+
+def build_rollups(df_definitivo, aniomes_desde=None):
+    """Compute every rollup level from monthly rows.
+
+    Args:
+        df_definitivo: Monthly rows (CVE_LUGAR, Id_Agrupador_Delito, Aniomes,
+            Num_Delitos, tasa)
+        aniomes_desde: Only keep trailing-12 windows closing on or after this
+            year-month (optional)
+
+    Returns:
+        dict: Rollup level -> DataFrame
+    """
+    return {
+        "anual": _rollup_calendario(
+            df_definitivo, periodo_anual(df_definitivo["Aniomes"])
+        ),
+        "trimestral": _rollup_calendario(
+            df_definitivo, periodo_trimestral(df_definitivo["Aniomes"])
+        ),
+        "movil12": _rollup_movil12(df_definitivo, aniomes_desde),
+    }
+
+
+def refresh_rollups(nuevos_aniomes=()):
+    """Bring the materialized rollups up to date with the local mirror.
+
+    A level without a table yet (e.g. a mirror synced before the rollups
+    existed) is built from the whole mirror, since the readers treat an
+    existing table as complete. The other levels only recompute the periods
+    touched by the new year-months, reading the full years of those months
+    and the 11 months before the first one (for the trailing-12 windows).
+
+    Args:
+        nuevos_aniomes: Year-months just added to the mirror
+    """
+    if not local_store.has_table("dfDefinitivo"):
+        return
+    columnas = CLAVES + ["Aniomes", "Num_Delitos", "tasa"]
+
+    faltantes = [
+        nivel
+        for nivel, tabla in TABLAS_ROLLUP.items()
+        if not local_store.has_table(tabla)
+    ]
+    if faltantes:
+        completos = build_rollups(
+            local_store.read_table("dfDefinitivo", columns=columnas)
+        )
+        for nivel in faltantes:
+            local_store.write_table(completos[nivel], TABLAS_ROLLUP[nivel])
+
+    niveles = [nivel for nivel in TABLAS_ROLLUP if nivel not in faltantes]
+    if not len(nuevos_aniomes) or not niveles:
+        return
+    nuevos_aniomes = np.sort(np.asarray(nuevos_aniomes, dtype=np.int64))
+    primero = int(nuevos_aniomes[0])
+
+    inicio_anual = primero // 100 * 100 + 1
+    inicio_movil = shift_aniomes(primero, -11)
+    df_definitivo = local_store.read_table(
+        "dfDefinitivo",
+        columns=columnas,
+        filters=[("Aniomes", ">=", min(inicio_anual, inicio_movil))],
+    )
+    rollups = build_rollups(df_definitivo, aniomes_desde=primero)
+
+    tocados = {
+        "anual": set(periodo_anual(nuevos_aniomes).tolist()),
+        "trimestral": set(periodo_trimestral(nuevos_aniomes).tolist()),
+    }
+    for nivel in niveles:
+        tabla = TABLAS_ROLLUP[nivel]
+        df_nuevo = rollups[nivel]
+        df_actual = local_store.read_table(tabla)
+        if nivel in tocados:
+            df_nuevo = df_nuevo.loc[df_nuevo["Periodo"].isin(tocados[nivel])]
+            conservar = ~df_actual["Periodo"].isin(tocados[nivel])
+        else:
+            conservar = df_actual["Periodo"] < primero
+        df_nuevo = pd.concat([df_actual.loc[conservar], df_nuevo], ignore_index=True)
+        local_store.write_table(df_nuevo, tabla)
+
+
+def choose_rollup(aniomes_ini, aniomes_fin):
+    """Choose the coarsest calendar rollup that answers a range exactly.
+
+    Args:
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+
+    Returns:
+        str or None: "anual", "trimestral" or None (monthly data needed)
+    """
+    mes_ini = int(aniomes_ini) % 100
+    mes_fin = int(aniomes_fin) % 100
+    if mes_ini == 1 and mes_fin == 12:
+        return "anual"
+    if mes_ini % 3 == 1 and mes_fin % 3 == 0:
+        return "trimestral"
+    return None
+
+
+def periodo_range(nivel, aniomes_ini, aniomes_fin):
+    """Convert a year-month range to the Periodo range of a rollup level.
+
+    Args:
+        nivel: "anual", "trimestral" or "movil12"
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+
+    Returns:
+        tuple: (periodo_ini, periodo_fin)
+    """
+    if nivel == "anual":
+        return int(periodo_anual(aniomes_ini)), int(periodo_anual(aniomes_fin))
+    if nivel == "trimestral":
+        return (
+            int(periodo_trimestral(aniomes_ini)),
+            int(periodo_trimestral(aniomes_fin)),
+        )
+    return int(aniomes_ini), int(aniomes_fin)
@@ -0,0 +1,80 @@
+"""Compact dtypes for the frames crossing the data-layer boundary."""
+
+import numpy as np
+import pandas as pd
+
+# Column -> compact dtype. Categorical columns are only applied to catalog
+# tables (see normalize_dtypes), where the same strings repeat many times.
+SCHEMA = {
+    "CVE_LUGAR": "category",
+    "TIPO_LUGAR": "category",
+    "NOM_LUGAR": "category",
+    "Aniomes": "int32",
+    "Year": "int16",
+    "Num_Habs": "int32",
+    "IndexOrder": "int32",
+    "Id_Agrupador_Delito": "int32",
+    "Num_Delitos": "int32",
+    "tasa": "float32",
+}
+
+
+def normalize_dtypes(df, categorical=True):
+    """Cast the known columns of a frame to their compact dtypes.
+
+    Integer casts are skipped for columns with missing values or values that
+    do not fit, so the data never change, only their representation.
+
+    Args:
+        df: DataFrame to normalize (modified in place)
+        categorical: Whether to apply the categorical casts
+
+    Returns:
+        DataFrame: The same frame
+    """
+    for columna, dtype in SCHEMA.items():
+        if columna not in df.columns or df[columna].dtype == dtype:
+            continue
+        serie = df[columna]
+
+        if dtype == "category":
+            if categorical and (
+                serie.dtype == object or pd.api.types.is_string_dtype(serie)
+            ):
+                df[columna] = serie.astype("category")
+        elif dtype.startswith("int"):
+            if not pd.api.types.is_numeric_dtype(serie) or serie.isna().any():
+                continue
+            limites = np.iinfo(dtype)
+            if len(serie) and (serie.min() < limites.min or serie.max() > limites.max):
+                continue
+            if pd.api.types.is_float_dtype(serie) and not (serie % 1 == 0).all():
+                continue
+            df[columna] = serie.astype(dtype)
+        elif pd.api.types.is_numeric_dtype(serie):
+            df[columna] = serie.astype(dtype)
+
+    return df
+
+
+def memory_report(objetos):
+    """Report the memory used by cached objects.
+
+    Args:
+        objetos: Dictionary name -> DataFrame (other values are ignored)
+
+    Returns:
+        DataFrame: Name, rows, columns and deep memory in MB, largest first
+    """
+    filas = [
+        {
+            "Objeto": nombre,
+            "Filas": len(valor),
+            "Columnas": len(valor.columns),
+            "MB": valor.memory_usage(deep=True).sum() / 2**20,
+        }
+        for nombre, valor in objetos.items()
+        if isinstance(valor, pd.DataFrame)
+    ]
+    df_report = pd.DataFrame(filas, columns=["Objeto", "Filas", "Columnas", "MB"])
+    return df_report.sort_values(by="MB", ascending=False, ignore_index=True).round(3)
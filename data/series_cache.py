@@ -0,0 +1,123 @@
+"""Full-history series cache answering any year-month range locally."""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+SERIES_COLUMNS = ["CVE_LUGAR", "Id_Agrupador_Delito", "Aniomes", "Num_Delitos", "tasa"]
+
+
+class SeriesCache:
+    """LRU cache of complete series per (CVE_LUGAR, Id_Agrupador_Delito).
+
+    Each entry holds the sorted Aniomes with their Num_Delitos and tasa, so a
+    range is answered with a binary search. The whole cache is dropped when
+    the data version (latest Aniomes and mirror revision) changes.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _store(self, df_history, cve_lugares, id_agrup_del):
+        """Split a long-format full-history frame into cache entries."""
+        grupos = dict(tuple(df_history.groupby("CVE_LUGAR", sort=False)))
+        for cve_lugar in cve_lugares:
+            # Locations without data are cached as empty series as well
+            df_lugar = grupos.get(cve_lugar, df_history.iloc[0:0])
+            entrada = self._history_to_entry(df_lugar)
+            self._entries[(cve_lugar, id_agrup_del)] = entrada
+            self._entries.move_to_end((cve_lugar, id_agrup_del))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_range(
+        self,
+        fetch_history,
+        version,
+        cve_lugares,
+        id_agrup_del,
+        aniomes_ini,
+        aniomes_fin,
+    ):
+        """Get several series for a range, fetching only uncached histories.
+
+        Args:
+            fetch_history: Callable (cve_lugares, id_agrup_del) -> long-format
+                frame with the complete history of those locations
+            version: Current data version (latest Aniomes and mirror revision)
+            cve_lugares: List of location keys
+            id_agrup_del: Crime group ID
+            aniomes_ini: Start year-month
+            aniomes_fin: End year-month
+
+        Returns:
+            DataFrame: Long-format crime data of the range
+        """
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self.version = version
+            faltantes = []
+            for cve in cve_lugares:
+                if (cve, id_agrup_del) in self._entries:
+                    # Touch hits first so storing the misses cannot evict them
+                    self._entries.move_to_end((cve, id_agrup_del))
+                else:
+                    faltantes.append(cve)
+
+        # Fetch outside the lock so other sessions keep reading the cache
+        if faltantes:
+            df_history = fetch_history(faltantes, id_agrup_del)
+            with self._lock:
+                if version == self.version:
+                    self._store(df_history, faltantes, id_agrup_del)
+
+        with self._lock:
+            entradas = {
+                cve: self._entries.get((cve, id_agrup_del)) for cve in cve_lugares
+            }
+
+        partes = []
+        for cve, entrada in entradas.items():
+            if entrada is None:
+                # Evicted or invalidated meanwhile: fetch again
+                entrada = self._history_to_entry(fetch_history([cve], id_agrup_del))
+            aniomes, num_delitos, tasa = entrada
+            inicio = np.searchsorted(aniomes, int(aniomes_ini), side="left")
+            fin = np.searchsorted(aniomes, int(aniomes_fin), side="right")
+            partes.append(
+                pd.DataFrame(
+                    {
+                        "CVE_LUGAR": cve,
+                        "Id_Agrupador_Delito": id_agrup_del,
+                        "Aniomes": aniomes[inicio:fin],
+                        "Num_Delitos": num_delitos[inicio:fin],
+                        "tasa": tasa[inicio:fin],
+                    },
+                    columns=SERIES_COLUMNS,
+                )
+            )
+
+        if not partes:
+            return pd.DataFrame(columns=SERIES_COLUMNS)
+        return pd.concat(partes, ignore_index=True)
+
+    @staticmethod
+    def _history_to_entry(df_history):
+        """Convert the history of one location to sorted arrays."""
+        df_history = df_history.sort_values(by="Aniomes", kind="stable")
+        return (
+            df_history["Aniomes"].to_numpy(dtype=np.int64),
+            df_history["Num_Delitos"].to_numpy(dtype=float),
+            df_history["tasa"].to_numpy(dtype=float),
+        )
+
+    def clear(self):
+        """Drop every cached series."""
+        with self._lock:
+            self._entries.clear()
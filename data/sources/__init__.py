@@ -0,0 +1,56 @@
+"""Pluggable data sources: one DataSource implementation per backend."""
+
+from functools import lru_cache
+
+from config.settings import get_backend
+from data.sources.base import (
+    GROUP_SERIES_COLUMNS,
+    RANKING_COLUMNS,
+    SERIES_COLUMNS,
+    DataSource,
+)
+from data.sources.embedded import DuckDBSource
+from data.sources.mongo import MongoSource
+from data.sources.postgres import PostgresSource
+
+BACKENDS = ["mongodb", "postgresql", "duckdb"]
+
+
+@lru_cache(maxsize=1)
+def _duckdb_source():
+    """Process-wide DuckDB source (it owns its in-process connection)."""
+    return DuckDBSource()
+
+
+def get_data_source(client=None, engine=None, backend=None):
+    """Get the data source of a backend.
+
+    Args:
+        client: MongoDB client (mongodb backend)
+        engine: SQLAlchemy engine (postgresql backend)
+        backend: Backend name (optional, the configured one by default)
+
+    Returns:
+        DataSource: Source for the backend
+    """
+    backend = backend or get_backend()
+    if backend == "mongodb":
+        return MongoSource(client)
+    if backend == "postgresql":
+        return PostgresSource(engine)
+    if backend == "duckdb":
+        return _duckdb_source()
+    raise ValueError(f"Unknown backend: {backend!r} (expected one of {BACKENDS})")
+
+
+__all__ = [
+    "BACKENDS",
+    "GROUP_SERIES_COLUMNS",
+    "RANKING_COLUMNS",
+    "SERIES_COLUMNS",
+    "DataSource",
+    "DuckDBSource",
+    "MongoSource",
+    "PostgresSource",
+    "get_data_source",
+]
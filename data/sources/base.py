@@ -0,0 +1,178 @@
+"""Interface shared by every backend."""
+
+# Columns read from "dfDefinitivo" for a crime series
+SERIES_COLUMNS = ["CVE_LUGAR", "Id_Agrupador_Delito", "Aniomes", "Num_Delitos", "tasa"]
+
+# Columns of a custom grouping series, summed over several groups
+GROUP_SERIES_COLUMNS = ["CVE_LUGAR", "Aniomes", "Num_Delitos"]
+
+# Columns of a ranking: one aggregated row per location
+RANKING_COLUMNS = ["CVE_LUGAR", "Num_Delitos", "tasa", "tasa_promedio", "meses"]
+
+# Columns of the per-month summary used to detect reloaded year-months
+MONTH_SUMMARY_COLUMNS = ["Aniomes", "filas", "Num_Delitos", "tasa"]
+
+# Operators of the read_table filters: (column, operator, value) tuples, the
+# same form as the pyarrow filters of the local store
+FILTER_OPERATORS = ["=", "!=", "<", "<=", ">", ">=", "in", "not in"]
+
+
+def check_filters(filters):
+    """Validate read_table filters.
+
+    Args:
+        filters: List of (column, operator, value) tuples, or None
+
+    Returns:
+        list: The filters as (column, operator, value) tuples
+
+    Raises:
+        ValueError: If an operator is not in FILTER_OPERATORS
+    """
+    filters = [tuple(condition) for condition in filters or []]
+    for column, operator, _ in filters:
+        if operator not in FILTER_OPERATORS:
+            raise ValueError(
+                f"Unsupported filter operator {operator!r} on {column!r} "
+                f"(expected one of {FILTER_OPERATORS})"
+            )
+    return filters
+
+
+def quote_identifier(name):
+    """Quote a column or table name for SQL."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class DataSource:
+    """Backend-specific reads used by data/queries.py.
+
+    Arguments are already plain Python values (no numpy scalars) and year-months
+    are ints. Caching, the local mirror, the cube and the rollups live above
+    this layer and work the same for every backend.
+    """
+
+    backend = None
+
+    def read_table(self, table_name, columns=None, filters=None):
+        """Read a collection/table.
+
+        Args:
+            table_name: Name of the collection/table
+            columns: List of columns to return (optional, all by default)
+            filters: List of (column, operator, value) conditions combined
+                with AND, e.g. [("Aniomes", ">=", 202301)]; operators are
+                FILTER_OPERATORS ("in"/"not in" take a list) and values are
+                always bound as parameters (optional)
+
+        Returns:
+            DataFrame: Table data
+        """
+        raise NotImplementedError
+
+    def read_series(self, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+        """Read the crime series of several locations.
+
+        Args:
+            cve_lugares: List of location keys
+            id_agrup_del: Crime group ID
+            aniomes_ini: Start year-month
+            aniomes_fin: End year-month
+
+        Returns:
+            DataFrame: Long-format data with the SERIES_COLUMNS columns
+        """
+        raise NotImplementedError
+
+    def read_group_series(self, cve_lugares, ids_agrupador, aniomes_ini, aniomes_fin):
+        """Sum the series of several crime groups, inside the backend.
+
+        Args:
+            cve_lugares: List of location keys
+            ids_agrupador: List of crime group IDs (disjoint groups)
+            aniomes_ini: Start year-month
+            aniomes_fin: End year-month
+
+        Returns:
+            DataFrame: GROUP_SERIES_COLUMNS, one row per location and month
+        """
+        raise NotImplementedError
+
+    def read_ranking(self, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+        """Aggregate one row per location over a period, inside the backend.
+
+        Args:
+            cve_lugares: List of location keys
+            id_agrup_del: Crime group ID
+            aniomes_ini: Start year-month
+            aniomes_fin: End year-month
+
+        Returns:
+            DataFrame: RANKING_COLUMNS columns, unsorted
+        """
+        raise NotImplementedError
+
+    def read_rollup(self, tabla, cve_lugares, id_agrup_del, periodo_ini, periodo_fin):
+        """Read a materialized rollup (see data/rollups.py).
+
+        Args:
+            tabla: Rollup table name (TABLAS_ROLLUP)
+            cve_lugares: List of location keys
+            id_agrup_del: Crime group ID
+            periodo_ini: First period
+            periodo_fin: Last period
+
+        Returns:
+            DataFrame or None: Rollup rows, None when the backend does not hold
+            the rollup (it is then computed from the monthly rows)
+        """
+        return None
+
+    def read_rows_by_aniomes(self, list_aniomes):
+        """Read every "dfDefinitivo" row of the given year-months.
+
+        Args:
+            list_aniomes: List of year-months
+
+        Returns:
+            DataFrame: All columns of those rows
+        """
+        raise NotImplementedError
+
+    def read_month_summary(self):
+        """Summarize "dfDefinitivo" per year-month, inside the backend.
+
+        Used by the mirror sync to find year-months reloaded after they were
+        mirrored (their summary no longer matches the local one).
+
+        Returns:
+            DataFrame: MONTH_SUMMARY_COLUMNS (row count and sums of
+            Num_Delitos and tasa), one row per Aniomes
+        """
+        raise NotImplementedError
+
+    def bulk_load(self, table_name, df, replace_aniomes=None):
+        """Bulk-insert rows, replacing those of some year-months atomically.
+
+        Args:
+            table_name: Name of the collection/table
+            df: Rows to insert
+            replace_aniomes: Year-months whose current rows are deleted first
+                (optional), so reloading a release is idempotent
+
+        Returns:
+            int: Rows inserted
+        """
+        raise NotImplementedError(f"{self.backend} does not support bulk loads")
+
+    def latest_aniomes(self):
+        """Get the most recent year-month in "col_aniomes".
+
+        Returns:
+            int or None: Latest year-month
+        """
+        raise NotImplementedError
+
+    def ping(self):
+        """Check that the backend answers (raises when it does not)."""
+        self.latest_aniomes()
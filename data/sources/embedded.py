@@ -0,0 +1,149 @@
+"""Embedded DuckDB backend over the Parquet files of the local store.
+
+Runs every query in-process, so a single-node deployment (or CI) needs no
+database server. The files are the ones written by ``python -m data.sync``.
+"""
+
+import threading
+
+from data import local_store
+from data.sources.base import DataSource, check_filters, quote_identifier
+
+
+class DuckDBSource(DataSource):
+    """Reads the local Parquet files with DuckDB."""
+
+    backend = "duckdb"
+
+    def __init__(self):
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _cursor(self):
+        """Get a cursor of the shared in-memory connection (one per query)."""
+        if self._connection is None:
+            with self._lock:
+                if self._connection is None:
+                    import duckdb
+
+                    self._connection = duckdb.connect(database=":memory:")
+        return self._connection.cursor()
+
+    @staticmethod
+    def _source(table_name):
+        """SQL expression reading the Parquet file(s) of a table."""
+        path = local_store.table_path(table_name)
+        if table_name in local_store.PARTITIONED_TABLES:
+            path = f"{path}/*.parquet"
+        return "read_parquet('" + path.replace("'", "''") + "')"
+
+    def _query(self, sql, params=None):
+        cursor = self._cursor()
+        try:
+            return cursor.execute(sql, params or []).df()
+        finally:
+            cursor.close()
+
+    def read_table(self, table_name, columns=None, filters=None):
+        select_list = "*"
+        if columns:
+            select_list = ", ".join(quote_identifier(column) for column in columns)
+        sql = f"SELECT {select_list} FROM {self._source(table_name)}"
+
+        condiciones, params = [], []
+        for column, operator, value in check_filters(filters):
+            if operator in ("in", "not in"):
+                negacion = "NOT " if operator == "not in" else ""
+                condiciones.append(
+                    f"{negacion}list_contains(?, {quote_identifier(column)})"
+                )
+                value = list(value)
+            else:
+                condiciones.append(f"{quote_identifier(column)} {operator} ?")
+            params.append(value)
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        return self._query(sql, params)
+
+    def read_series(self, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+        return self._query(
+            f"""
+            SELECT "CVE_LUGAR", "Id_Agrupador_Delito", "Aniomes", "Num_Delitos", "tasa"
+            FROM {self._source("dfDefinitivo")}
+            WHERE list_contains(?, "CVE_LUGAR")
+            AND "Id_Agrupador_Delito" = ?
+            AND "Aniomes" BETWEEN ? AND ?
+            """,
+            [cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin],
+        )
+
+    def read_group_series(self, cve_lugares, ids_agrupador, aniomes_ini, aniomes_fin):
+        return self._query(
+            f"""
+            SELECT "CVE_LUGAR", "Aniomes", SUM("Num_Delitos") AS "Num_Delitos"
+            FROM {self._source("dfDefinitivo")}
+            WHERE list_contains(?, "CVE_LUGAR")
+            AND list_contains(?, "Id_Agrupador_Delito")
+            AND "Aniomes" BETWEEN ? AND ?
+            GROUP BY "CVE_LUGAR", "Aniomes"
+            """,
+            [cve_lugares, ids_agrupador, aniomes_ini, aniomes_fin],
+        )
+
+    def read_ranking(self, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+        return self._query(
+            f"""
+            SELECT "CVE_LUGAR",
+                SUM("Num_Delitos") AS "Num_Delitos",
+                SUM("tasa") AS "tasa",
+                AVG("tasa") AS "tasa_promedio",
+                COUNT(*) AS "meses"
+            FROM {self._source("dfDefinitivo")}
+            WHERE list_contains(?, "CVE_LUGAR")
+            AND "Id_Agrupador_Delito" = ?
+            AND "Aniomes" BETWEEN ? AND ?
+            GROUP BY "CVE_LUGAR"
+            """,
+            [cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin],
+        )
+
+    def read_rollup(self, tabla, cve_lugares, id_agrup_del, periodo_ini, periodo_fin):
+        if not local_store.has_table(tabla):
+            return None
+        return self._query(
+            f"""
+            SELECT * FROM {self._source(tabla)}
+            WHERE list_contains(?, "CVE_LUGAR")
+            AND "Id_Agrupador_Delito" = ?
+            AND "Periodo" BETWEEN ? AND ?
+            """,
+            [cve_lugares, id_agrup_del, periodo_ini, periodo_fin],
+        )
+
+    def read_rows_by_aniomes(self, list_aniomes):
+        return self._query(
+            f"""
+            SELECT * FROM {self._source("dfDefinitivo")}
+            WHERE list_contains(?, "Aniomes")
+            """,
+            [list_aniomes],
+        )
+
+    def read_month_summary(self):
+        return self._query(
+            f"""
+            SELECT "Aniomes",
+                COUNT(*) AS "filas",
+                SUM("Num_Delitos") AS "Num_Delitos",
+                SUM("tasa") AS "tasa"
+            FROM {self._source("dfDefinitivo")}
+            GROUP BY "Aniomes"
+            """
+        )
+
+    def latest_aniomes(self):
+        df = self._query(
+            f'SELECT MAX("Aniomes") AS "Aniomes" FROM {self._source("col_aniomes")}'
+        )
+        latest = df["Aniomes"].iloc[0] if len(df) else None
+        return int(latest) if latest is not None and latest == latest else None
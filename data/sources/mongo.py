@@ -0,0 +1,177 @@
+"""MongoDB backend through pymongo."""
+
+import pandas as pd
+from config.settings import ETL_INSERT_BATCH, MONGODB_DB_NAME
+from data.sources.base import (
+    GROUP_SERIES_COLUMNS,
+    MONTH_SUMMARY_COLUMNS,
+    RANKING_COLUMNS,
+    SERIES_COLUMNS,
+    DataSource,
+    check_filters,
+)
+
+# read_table filter operator -> MongoDB query operator
+OPERADORES_MONGO = {
+    "=": "$eq",
+    "!=": "$ne",
+    "<": "$lt",
+    "<=": "$lte",
+    ">": "$gt",
+    ">=": "$gte",
+    "in": "$in",
+    "not in": "$nin",
+}
+
+
+class MongoSource(DataSource):
+    """Reads from MongoDB with projections and server-side pipelines."""
+
+    backend = "mongodb"
+
+    def __init__(self, client):
+        self.client = client
+
+    @property
+    def db(self):
+        return self.client[MONGODB_DB_NAME]
+
+    def read_table(self, table_name, columns=None, filters=None):
+        projection = None
+        if columns:
+            projection = {"_id": 0, **{column: 1 for column in columns}}
+
+        condiciones = []
+        for column, operator, value in check_filters(filters):
+            if operator in ("in", "not in"):
+                value = list(value)
+            condiciones.append({column: {OPERADORES_MONGO[operator]: value}})
+        query = {"$and": condiciones} if condiciones else {}
+        cursor = self.db[table_name].find(query, projection)
+        df = pd.DataFrame(list(cursor))
+        if "_id" in df.columns:
+            df.drop(columns=["_id"], inplace=True)
+        return df
+
+    def read_series(self, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+        query = {
+            "CVE_LUGAR": (
+                cve_lugares[0] if len(cve_lugares) == 1 else {"$in": cve_lugares}
+            ),
+            "Id_Agrupador_Delito": id_agrup_del,
+            "Aniomes": {"$gte": aniomes_ini, "$lte": aniomes_fin},
+        }
+        projection = {"_id": 0, **{column: 1 for column in SERIES_COLUMNS}}
+        results = self.db["dfDefinitivo"].find(query, projection)
+        return pd.DataFrame(list(results), columns=SERIES_COLUMNS)
+
+    def read_group_series(self, cve_lugares, ids_agrupador, aniomes_ini, aniomes_fin):
+        pipeline = [
+            {
+                "$match": {
+                    "CVE_LUGAR": {"$in": cve_lugares},
+                    "Id_Agrupador_Delito": {"$in": ids_agrupador},
+                    "Aniomes": {"$gte": aniomes_ini, "$lte": aniomes_fin},
+                }
+            },
+            {
+                "$group": {
+                    "_id": {"CVE_LUGAR": "$CVE_LUGAR", "Aniomes": "$Aniomes"},
+                    "Num_Delitos": {"$sum": "$Num_Delitos"},
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "CVE_LUGAR": "$_id.CVE_LUGAR",
+                    "Aniomes": "$_id.Aniomes",
+                    "Num_Delitos": 1,
+                }
+            },
+        ]
+        results = self.db["dfDefinitivo"].aggregate(pipeline)
+        return pd.DataFrame(list(results), columns=GROUP_SERIES_COLUMNS)
+
+    def read_ranking(self, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+        pipeline = [
+            {
+                "$match": {
+                    "CVE_LUGAR": {"$in": cve_lugares},
+                    "Id_Agrupador_Delito": id_agrup_del,
+                    "Aniomes": {"$gte": aniomes_ini, "$lte": aniomes_fin},
+                }
+            },
+            {
+                "$group": {
+                    "_id": "$CVE_LUGAR",
+                    "Num_Delitos": {"$sum": "$Num_Delitos"},
+                    "tasa": {"$sum": "$tasa"},
+                    "tasa_promedio": {"$avg": "$tasa"},
+                    "meses": {"$sum": 1},
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "CVE_LUGAR": "$_id",
+                    **{columna: 1 for columna in RANKING_COLUMNS[1:]},
+                }
+            },
+        ]
+        results = self.db["dfDefinitivo"].aggregate(pipeline)
+        return pd.DataFrame(list(results), columns=RANKING_COLUMNS)
+
+    def read_rows_by_aniomes(self, list_aniomes):
+        results = self.db["dfDefinitivo"].find(
+            {"Aniomes": {"$in": list_aniomes}}, {"_id": 0}
+        )
+        return pd.DataFrame(list(results))
+
+    def read_month_summary(self):
+        pipeline = [
+            {
+                "$group": {
+                    "_id": "$Aniomes",
+                    "filas": {"$sum": 1},
+                    "Num_Delitos": {"$sum": "$Num_Delitos"},
+                    "tasa": {"$sum": "$tasa"},
+                }
+            },
+            {
+                "$project": {
+                    "_id": 0,
+                    "Aniomes": "$_id",
+                    **{columna: 1 for columna in MONTH_SUMMARY_COLUMNS[1:]},
+                }
+            },
+        ]
+        results = self.db["dfDefinitivo"].aggregate(pipeline)
+        return pd.DataFrame(list(results), columns=MONTH_SUMMARY_COLUMNS)
+
+    def bulk_load(self, table_name, df, replace_aniomes=None):
+        """Unordered insert_many in batches: the server inserts each batch in
+        parallel instead of one document per round trip. Unlike PostgreSQL,
+        the delete and the inserts are not one transaction.
+        """
+        collection = self.db[table_name]
+        if replace_aniomes:
+            collection.delete_many(
+                {"Aniomes": {"$in": [int(aniomes) for aniomes in replace_aniomes]}}
+            )
+
+        # Plain Python values for BSON (no numpy scalars)
+        documentos = df.astype(object).to_dict("records")
+        for inicio in range(0, len(documentos), ETL_INSERT_BATCH):
+            collection.insert_many(
+                documentos[inicio : inicio + ETL_INSERT_BATCH], ordered=False
+            )
+        return len(documentos)
+
+    def latest_aniomes(self):
+        documento = self.db["col_aniomes"].find_one(
+            {}, {"_id": 0, "Aniomes": 1}, sort=[("Aniomes", -1)]
+        )
+        return int(documento["Aniomes"]) if documento else None
+
+    def ping(self):
+        self.client.admin.command("ping")
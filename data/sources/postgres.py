@@ -0,0 +1,209 @@
+"""PostgreSQL backend through SQLAlchemy."""
+
+import io
+from functools import lru_cache
+
+import pandas as pd
+from data.sources.base import DataSource, check_filters, quote_identifier
+
+# Tables whose names need quotes (mixed case)
+QUOTED_TABLES = ["dfLugar", "dfPobExtendida", "dfDefinitivo"]
+
+
+@lru_cache(maxsize=None)
+def _statement(nombre):
+    """Get a parameterized statement, compiled once per process.
+
+    The SQL text never changes between requests, only the bound values, so
+    the compiled statement is reused. "Aniomes" is compared as an integer range
+    so an index on ("Id_Agrupador_Delito", "Aniomes") applies. SQLAlchemy is
+    imported here so it only loads when PostgreSQL is actually queried.
+
+    Args:
+        nombre: "series", "group_series", "ranking", "rows_by_aniomes",
+            "month_summary" or "latest_aniomes"
+
+    Returns:
+        TextClause: Statement
+    """
+    from sqlalchemy import bindparam, text
+
+    if nombre == "series":
+        return text(
+            """
+            SELECT "CVE_LUGAR", "Id_Agrupador_Delito", "Aniomes",
+                "Num_Delitos", "tasa"
+            FROM "dfDefinitivo"
+            WHERE "CVE_LUGAR" IN :cve_lugares
+            AND "Id_Agrupador_Delito" = :id_agrup_del
+            AND "Aniomes" BETWEEN :aniomes_ini AND :aniomes_fin
+            """
+        ).bindparams(bindparam("cve_lugares", expanding=True))
+    if nombre == "group_series":
+        return text(
+            """
+            SELECT "CVE_LUGAR", "Aniomes", SUM("Num_Delitos") AS "Num_Delitos"
+            FROM "dfDefinitivo"
+            WHERE "CVE_LUGAR" IN :cve_lugares
+            AND "Id_Agrupador_Delito" IN :ids_agrupador
+            AND "Aniomes" BETWEEN :aniomes_ini AND :aniomes_fin
+            GROUP BY "CVE_LUGAR", "Aniomes"
+            """
+        ).bindparams(
+            bindparam("cve_lugares", expanding=True),
+            bindparam("ids_agrupador", expanding=True),
+        )
+    if nombre == "ranking":
+        return text(
+            """
+            SELECT "CVE_LUGAR",
+                SUM("Num_Delitos") AS "Num_Delitos",
+                SUM("tasa") AS "tasa",
+                AVG("tasa") AS "tasa_promedio",
+                COUNT(*) AS "meses"
+            FROM "dfDefinitivo"
+            WHERE "CVE_LUGAR" IN :cve_lugares
+            AND "Id_Agrupador_Delito" = :id_agrup_del
+            AND "Aniomes" BETWEEN :aniomes_ini AND :aniomes_fin
+            GROUP BY "CVE_LUGAR"
+            """
+        ).bindparams(bindparam("cve_lugares", expanding=True))
+    if nombre == "rows_by_aniomes":
+        return text(
+            'SELECT * FROM "dfDefinitivo" WHERE "Aniomes" IN :list_aniomes'
+        ).bindparams(bindparam("list_aniomes", expanding=True))
+    if nombre == "month_summary":
+        return text(
+            """
+            SELECT "Aniomes",
+                COUNT(*) AS "filas",
+                SUM("Num_Delitos") AS "Num_Delitos",
+                SUM("tasa") AS "tasa"
+            FROM "dfDefinitivo"
+            GROUP BY "Aniomes"
+            """
+        )
+    if nombre == "latest_aniomes":
+        return text('SELECT MAX("Aniomes") FROM col_aniomes')
+    raise ValueError(f"Unknown statement: {nombre}")
+
+
+class PostgresSource(DataSource):
+    """Reads from PostgreSQL (Supabase pooler) with bound parameters."""
+
+    backend = "postgresql"
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def read_table(self, table_name, columns=None, filters=None):
+        from sqlalchemy import bindparam, text
+
+        # Handle special cases for table names that might need quotes
+        if table_name in QUOTED_TABLES:
+            table_name = f'"{table_name}"'
+        select_list = "*"
+        if columns:
+            select_list = ", ".join(quote_identifier(column) for column in columns)
+        sql = f"SELECT {select_list} FROM {table_name}"
+
+        condiciones, params, expandidos = [], {}, []
+        for posicion, (column, operator, value) in enumerate(check_filters(filters)):
+            nombre = f"p{posicion}"
+            if operator in ("in", "not in"):
+                value = list(value)
+                expandidos.append(bindparam(nombre, expanding=True))
+            condiciones.append(
+                f"{quote_identifier(column)} {operator.upper()} :{nombre}"
+            )
+            params[nombre] = value
+        if condiciones:
+            sql += " WHERE " + " AND ".join(condiciones)
+        return pd.read_sql_query(
+            text(sql).bindparams(*expandidos), self.engine, params=params
+        )
+
+    def read_series(self, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+        return pd.read_sql_query(
+            _statement("series"),
+            self.engine,
+            params={
+                "cve_lugares": cve_lugares,
+                "id_agrup_del": id_agrup_del,
+                "aniomes_ini": aniomes_ini,
+                "aniomes_fin": aniomes_fin,
+            },
+        )
+
+    def read_group_series(self, cve_lugares, ids_agrupador, aniomes_ini, aniomes_fin):
+        return pd.read_sql_query(
+            _statement("group_series"),
+            self.engine,
+            params={
+                "cve_lugares": cve_lugares,
+                "ids_agrupador": ids_agrupador,
+                "aniomes_ini": aniomes_ini,
+                "aniomes_fin": aniomes_fin,
+            },
+        )
+
+    def read_ranking(self, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin):
+        return pd.read_sql_query(
+            _statement("ranking"),
+            self.engine,
+            params={
+                "cve_lugares": cve_lugares,
+                "id_agrup_del": id_agrup_del,
+                "aniomes_ini": aniomes_ini,
+                "aniomes_fin": aniomes_fin,
+            },
+        )
+
+    def read_rows_by_aniomes(self, list_aniomes):
+        return pd.read_sql_query(
+            _statement("rows_by_aniomes"),
+            self.engine,
+            params={"list_aniomes": list_aniomes},
+        )
+
+    def read_month_summary(self):
+        return pd.read_sql_query(_statement("month_summary"), self.engine)
+
+    def bulk_load(self, table_name, df, replace_aniomes=None):
+        """COPY the rows in, in one transaction with the DELETE of the
+        replaced year-months. Readers keep seeing the previous rows (MVCC)
+        until the commit; no table lock blocks them.
+        """
+        columnas = ", ".join(f'"{column}"' for column in df.columns)
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False)
+        buffer.seek(0)
+
+        conn = self.engine.raw_connection()
+        try:
+            cursor = conn.cursor()
+            if replace_aniomes:
+                cursor.execute(
+                    f'DELETE FROM "{table_name}" WHERE "Aniomes" = ANY(%s)',
+                    ([int(aniomes) for aniomes in replace_aniomes],),
+                )
+            cursor.copy_expert(
+                f'COPY "{table_name}" ({columnas}) FROM STDIN WITH (FORMAT csv)',
+                buffer,
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+        return len(df)
+
+    def latest_aniomes(self):
+        with self.engine.connect() as conn:
+            latest = conn.execute(_statement("latest_aniomes")).scalar()
+        return int(latest) if latest is not None else None
+
+    def ping(self):
+        with self.engine.connect() as conn:
+            conn.exec_driver_sql("SELECT 1")
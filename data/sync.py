@@ -0,0 +1,190 @@
+"""Incremental sync of the local mirror from the remote database.
+
+The mirror is also the storage of the embedded duckdb backend, so the source
+is always a remote backend (the configured one, or the one given).
+
+Usage:
+    python -m data.sync [mongodb|postgresql]
+"""
+
+import datetime
+import sys
+import warnings
+from functools import partial
+
+import numpy as np
+import pandas as pd
+from config.settings import LOCAL_STORE_SYNC_BATCH, get_backend
+from data import local_store
+from data.database import ConnectionManager
+from data.fanout import FanOutError, fan_out
+from data.rollups import refresh_rollups
+from data.sources import get_data_source
+
+REMOTE_BACKENDS = ["mongodb", "postgresql"]
+
+
+def get_pending_aniomes(source, high_water_mark, df_aniomes=None):
+    """Get the remote year-months newer than the local high-water mark.
+
+    Args:
+        source: DataSource of the remote backend
+        high_water_mark: Latest year-month in the mirror (None if empty)
+        df_aniomes: Remote "col_aniomes" when already read (optional)
+
+    Returns:
+        list: Sorted list of pending year-months
+    """
+    if df_aniomes is None:
+        df_aniomes = source.read_table("col_aniomes")
+    list_aniomes = sorted(int(aniomes) for aniomes in df_aniomes["Aniomes"].unique())
+    if high_water_mark is None:
+        return list_aniomes
+    return [aniomes for aniomes in list_aniomes if aniomes > high_water_mark]
+
+
+def get_reloaded_aniomes(source, high_water_mark):
+    """Get the mirrored year-months whose remote rows changed after the sync.
+
+    A release loaded again with 'python -m data.etl --reload' rewrites
+    year-months below the high-water mark. They are found by comparing the
+    per-month row count and sums of Num_Delitos and tasa of both sides (the
+    mirror is summarized in-process with DuckDB).
+
+    Args:
+        source: DataSource of the remote backend
+        high_water_mark: Latest year-month in the mirror (None if empty)
+
+    Returns:
+        tuple: (sorted list of year-months to pull again, DataFrame with the
+        local summary)
+    """
+    if high_water_mark is None or not local_store.has_table("dfDefinitivo"):
+        return [], None
+
+    df_remoto = source.read_month_summary()
+    df_local = get_data_source(backend="duckdb").read_month_summary()
+    df = pd.merge(
+        df_remoto.loc[df_remoto["Aniomes"] <= high_water_mark],
+        df_local,
+        on="Aniomes",
+        how="outer",
+        suffixes=("_remoto", "_local"),
+    ).fillna(0)
+    distintos = (
+        (df["filas_remoto"] != df["filas_local"])
+        | ~np.isclose(df["Num_Delitos_remoto"], df["Num_Delitos_local"])
+        | ~np.isclose(df["tasa_remoto"], df["tasa_local"])
+    )
+    return sorted(int(aniomes) for aniomes in df.loc[distintos, "Aniomes"]), df_local
+
+
+def sync_local_store(source, batch_size=LOCAL_STORE_SYNC_BATCH):
+    """Bring the local mirror up to date.
+
+    dfLugar, dfPobExtendida and the catalogs are small and fully replaced
+    (the optional ones are skipped when the remote database lacks them);
+    dfDefinitivo pulls the year-months newer than the high-water mark, in
+    batches, and pulls again the mirrored year-months that were reloaded
+    remotely (bumping the mirror revision, so caches drop them). The rollups
+    are then refreshed for the periods of both (and built from the whole
+    mirror when missing).
+
+    Args:
+        source: DataSource of the remote backend
+        batch_size: Number of year-months pulled per query
+
+    Returns:
+        dict: Updated sync metadata
+    """
+    meta = local_store.read_meta()
+    tables = meta.setdefault("tables", {})
+    synced_at = datetime.datetime.now().isoformat(timespec="seconds")
+
+    # The small tables are independent reads: fetch them concurrently
+    remote_tables = fan_out(
+        {
+            table_name: partial(source.read_table, table_name)
+            for table_name in ["dfLugar", "dfPobExtendida"]
+            + local_store.CATALOG_TABLES
+            + local_store.OPTIONAL_CATALOG_TABLES
+        },
+        parcial=True,
+    )
+    for table_name, df in list(remote_tables.items()):
+        if table_name in local_store.OPTIONAL_CATALOG_TABLES:
+            if isinstance(df, FanOutError) or df.empty:
+                # Keep the copy of an earlier sync, if any
+                warnings.warn(f"Optional table {table_name} not synced ({df})")
+                del remote_tables[table_name]
+        elif isinstance(df, FanOutError):
+            raise df
+    for table_name, df in remote_tables.items():
+        tables[table_name] = {"rows": len(df), "synced_at": synced_at}
+
+    reloaded, df_local = get_reloaded_aniomes(source, meta.get("high_water_mark"))
+    if reloaded:
+        filas_local = dict(zip(df_local["Aniomes"], df_local["filas"]))
+        for inicio in range(0, len(reloaded), batch_size):
+            batch = reloaded[inicio : inicio + batch_size]
+            df = source.read_rows_by_aniomes(batch)
+            local_store.replace_aniomes(df, "dfDefinitivo", batch)
+
+            info = tables.setdefault("dfDefinitivo", {"rows": 0})
+            info["rows"] += len(df) - int(
+                sum(filas_local.get(aniomes, 0) for aniomes in batch)
+            )
+            info["synced_at"] = synced_at
+        meta["revision"] = meta.get("revision", 0) + 1
+        local_store.write_meta(meta)
+
+    pending = get_pending_aniomes(
+        source, meta.get("high_water_mark"), remote_tables["col_aniomes"]
+    )
+    for inicio in range(0, len(pending), batch_size):
+        batch = pending[inicio : inicio + batch_size]
+        df = source.read_rows_by_aniomes(batch)
+        local_store.append_partition(df, "dfDefinitivo", batch[0], batch[-1])
+
+        # Move the high-water mark after each batch so an interrupted sync
+        # resumes where it stopped
+        info = tables.setdefault("dfDefinitivo", {"rows": 0})
+        info["rows"] += len(df)
+        info["synced_at"] = synced_at
+        meta["high_water_mark"] = batch[-1]
+        local_store.write_meta(meta)
+
+    # Catalogs last: col_aniomes never lists a year-month the mirror lacks
+    for table_name, df in remote_tables.items():
+        local_store.write_table(df, table_name)
+    local_store.write_meta(meta)
+
+    # Annual, quarterly and trailing-12 rollups: only the touched periods,
+    # or the whole mirror for levels not built yet
+    refresh_rollups(reloaded + pending)
+    return meta
+
+
+def main():
+    """Run the sync from the command line."""
+    backend = sys.argv[1] if len(sys.argv) > 1 else get_backend()
+    if backend not in REMOTE_BACKENDS:
+        sys.exit(f"The mirror is synced from a remote backend: {REMOTE_BACKENDS}")
+
+    manager = ConnectionManager(backend)
+    try:
+        source = get_data_source(manager.client, manager.engine, backend)
+        meta = sync_local_store(source)
+    finally:
+        manager.close()
+
+    print(
+        f"Mirror up to Aniomes {meta.get('high_water_mark')} "
+        f"(revision {meta.get('revision', 0)})"
+    )
+    for table_name, info in meta.get("tables", {}).items():
+        print(f"  {table_name}: {info['rows']:,} rows ({info['synced_at']})")
+
+
+if __name__ == "__main__":
+    main()
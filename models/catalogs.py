@@ -1,95 +1,171 @@
 """Functions to load and transform catalog data."""
 
+from functools import partial
+from types import MappingProxyType
+
 import streamlit as st
 import pandas as pd
-from data.queries import get_collection_data
-from config.settings import BASE_DE_DATOS
-
+from data import local_store
+from data.fanout import fan_out
+from data.groupings import build_grouping_index, delito_labels
+from data.queries import get_collection_data, get_latest_aniomes
+from utils.helpers import (
+    TIPOS_UBICACION,
+    LocationPopulationIndex,
+    aniomes_to_dt64,
+    get_ubicaciones,
+)
+from config.settings import CATALOG_LOAD_WORKERS, CATALOG_VERSION_TTL, USE_LOCAL_STORE
+
+# Catalog key -> collection/table name
+CATALOG_TABLES = {
+    "aniomes": "col_aniomes",
+    "poblacion": "cat_poblacion",
+    "entidad": "cat_entidad",
+    "municipio": "cat_municipio",
+    "delito": "cat_delito",
+    "mes": "cat_mes",
+    "cab_agrupador_delito": "cab_agrupador_delito",
+    "det_agrupador_delito": "det_agrupador_delito",
+    "lugar": "dfLugar",
+    "poblacion_extendida": "dfPobExtendida",
+}
+
+
+def fetch_raw_catalogs(_client, _engine):
+    """Get all catalog tables from database, fetched concurrently.
 
-@st.cache_data
-def get_aniomes(_client, _engine):
-    """Get year-month data from database."""
-    return get_collection_data(_client, _engine, "col_aniomes")
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
 
+    Returns:
+        dict: Dictionary of raw catalog dataframes (keys of CATALOG_TABLES)
+    """
+    return fan_out(
+        {
+            key: partial(get_collection_data, _client, _engine, table)
+            for key, table in CATALOG_TABLES.items()
+        },
+        max_workers=CATALOG_LOAD_WORKERS,
+    )
 
-@st.cache_data
-def get_poblacion(_client, _engine):
-    """Get population data from database."""
-    return get_collection_data(_client, _engine, "cat_poblacion")
 
+def build_lookup_indexes(df_lugar, df_pob_extendida, max_year):
+    """Build hash indexes used by the sidebar to resolve locations.
 
-@st.cache_data
-def get_entidad(_client, _engine):
-    """Get entity data from database."""
-    return get_collection_data(_client, _engine, "cat_entidad")
+    Args:
+        df_lugar: Location dataframe
+        df_pob_extendida: Extended population dataframe
+        max_year: Most recent year
 
+    Returns:
+        dict: Indexes "idx_lugar" ((TIPO_LUGAR, NOM_LUGAR) -> (CVE_LUGAR,
+        CVE_ENT)), "idx_poblacion" ((CVE_LUGAR, Year) -> Num_Habs) and
+        "opciones_ubicacion" (location type -> names sorted by IndexOrder) and
+        "idx_poblacion_mun" (municipalities sorted by population of max_year)
+    """
+    # First match wins, as with the previous boolean-mask lookups
+    df_claves = df_lugar.drop_duplicates(subset=["TIPO_LUGAR", "NOM_LUGAR"])
+    idx_lugar = dict(
+        zip(
+            zip(df_claves["TIPO_LUGAR"], df_claves["NOM_LUGAR"]),
+            zip(df_claves["CVE_LUGAR"], df_claves["CVE_ENT"]),
+        )
+    )
 
-@st.cache_data
-def get_municipio(_client, _engine):
-    """Get municipality data from database."""
-    return get_collection_data(_client, _engine, "cat_municipio")
+    df_pob_claves = df_pob_extendida.drop_duplicates(subset=["CVE_LUGAR", "Year"])
+    idx_poblacion = dict(
+        zip(
+            zip(df_pob_claves["CVE_LUGAR"], df_pob_claves["Year"]),
+            df_pob_claves["Num_Habs"],
+        )
+    )
 
+    idx_poblacion_mun = LocationPopulationIndex(df_lugar, df_pob_extendida, max_year)
 
-@st.cache_data
-def get_delito(_client, _engine):
-    """Get crime type data from database."""
-    return get_collection_data(_client, _engine, "cat_delito")
+    catalogs = {"lugar": df_lugar, "poblacion_extendida": df_pob_extendida}
+    opciones_ubicacion = {}
+    for tipo_ubicacion in TIPOS_UBICACION:
+        df_lugar_sel = get_ubicaciones(
+            catalogs, tipo_ubicacion, max_year, idx_poblacion_mun
+        )
+        opciones_ubicacion[tipo_ubicacion] = tuple(
+            df_lugar_sel.sort_values(by="IndexOrder")["NOM_LUGAR"]
+        )
 
+    return {
+        "idx_lugar": idx_lugar,
+        "idx_poblacion": idx_poblacion,
+        "opciones_ubicacion": opciones_ubicacion,
+        "idx_poblacion_mun": idx_poblacion_mun,
+    }
 
-@st.cache_data
-def get_mes(_client, _engine):
-    """Get month data from database."""
-    return get_collection_data(_client, _engine, "cat_mes")
 
+@st.cache_data(ttl=CATALOG_VERSION_TTL)
+def get_catalog_version(_client, _engine):
+    """Get the current data version, checked at most every TTL.
 
-@st.cache_data
-def get_cab_agrupador_delito(_client, _engine):
-    """Get crime group header data from database."""
-    return get_collection_data(_client, _engine, "cab_agrupador_delito")
+    The mirror revision changes when reloaded year-months are pulled again,
+    so the data caches keyed on the version drop them as well.
 
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
 
-@st.cache_data
-def get_det_agrupador_delito(_client, _engine):
-    """Get crime group detail data from database."""
-    return get_collection_data(_client, _engine, "det_agrupador_delito")
+    Returns:
+        tuple: (latest year-month in the database, mirror revision)
+    """
+    revision = local_store.get_revision() if USE_LOCAL_STORE else 0
+    return get_latest_aniomes(_client, _engine), revision
 
 
-@st.cache_data
-def get_lugar(_client, _engine):
-    """Get location data from database."""
-    return get_collection_data(_client, _engine, "dfLugar")
+def is_catalog_stale(catalogs, _client, _engine):
+    """Check whether a catalog bundle is older than the data in the database.
 
+    Args:
+        catalogs: Catalog bundle returned by load_catalogs
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
 
-@st.cache_data
-def get_poblacion_extendida(_client, _engine):
-    """Get extended population data from database."""
-    return get_collection_data(_client, _engine, "dfPobExtendida")
+    Returns:
+        bool: True if a newer Aniomes has been published (or the mirror
+        rewrote reloaded year-months)
+    """
+    return catalogs["version"] != get_catalog_version(_client, _engine)
 
 
-def load_catalogs(_client, _engine):
+@st.cache_resource(max_entries=2)
+def build_catalog_bundle(_client, _engine, version):
     """Load all catalog data and prepare related dataframes.
 
+    Built once per data version and shared by every session, so the returned
+    bundle and its dataframes must be treated as read-only.
+
     Args:
-        client: MongoDB client
-        engine: SQLAlchemy engine
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+        version: Data version (see get_catalog_version) the bundle is built for
 
     Returns:
-        dict: Dictionary containing all catalog dataframes
+        MappingProxyType: Read-only dictionary containing all catalog dataframes
     """
-    # Load basic catalogs
-    df_aniomes = get_aniomes(_client, _engine)
-    df_pob = get_poblacion(_client, _engine)
-    df_ent = get_entidad(_client, _engine)
-    df_mun = get_municipio(_client, _engine)
-    df_del = get_delito(_client, _engine)
-    df_mes = get_mes(_client, _engine)
-    df_cab_agrp = get_cab_agrupador_delito(_client, _engine)
-    df_det_agrp = get_det_agrupador_delito(_client, _engine)
-    df_lugar = get_lugar(_client, _engine)
-    df_pob_extendida = get_poblacion_extendida(_client, _engine)
+    # Load basic catalogs (concurrently)
+    raw_catalogs = fetch_raw_catalogs(_client, _engine)
+    df_aniomes = raw_catalogs["aniomes"]
+    df_pob = raw_catalogs["poblacion"]
+    df_ent = raw_catalogs["entidad"]
+    df_mun = raw_catalogs["municipio"]
+    df_del = raw_catalogs["delito"]
+    df_mes = raw_catalogs["mes"]
+    df_cab_agrp = raw_catalogs["cab_agrupador_delito"]
+    df_det_agrp = raw_catalogs["det_agrupador_delito"]
+    df_lugar = raw_catalogs["lugar"]
+    df_pob_extendida = raw_catalogs["poblacion_extendida"]
 
     # Calculate derived values
     max_year = df_aniomes["Aniomes"].max() // 100
+    df_aniomes["dt64"] = aniomes_to_dt64(df_aniomes["Aniomes"])
 
     # Create population dataframes for the maximum year
     df_pob_year_max = df_pob.loc[
@@ -116,17 +192,44 @@ def load_catalogs(_client, _engine):
         df_mun, df_pob_year_max, left_on="_CVEMUN", right_on="Id_Municipio", how="left"
     )
 
-    # Return all catalog data in a dictionary
-    return {
-        "aniomes": df_aniomes,
-        "poblacion": df_pob,
-        "entidad": df_ent,
-        "municipio": df_mun,
-        "delito": df_del,
-        "mes": df_mes,
-        "cab_agrupador_delito": df_cab_agrp,
-        "det_agrupador_delito": df_det_agrp,
-        "lugar": df_lugar,
-        "poblacion_extendida": df_pob_extendida,
-        "max_year": max_year,
-    }
+    # Lookup indexes for the sidebar
+    indexes = build_lookup_indexes(df_lugar, df_pob_extendida, max_year)
+
+    # Subtypes offered for custom groupings and the subtypes of each group
+    opciones_delito = delito_labels(df_del)
+    idx_grupos_delito = build_grouping_index(df_det_agrp)
+
+    # Return all catalog data in a read-only dictionary
+    return MappingProxyType(
+        {
+            "aniomes": df_aniomes,
+            "poblacion": df_pob,
+            "entidad": df_ent,
+            "municipio": df_mun,
+            "delito": df_del,
+            "mes": df_mes,
+            "cab_agrupador_delito": df_cab_agrp,
+            "det_agrupador_delito": df_det_agrp,
+            "lugar": df_lugar,
+            "poblacion_extendida": df_pob_extendida,
+            "max_year": max_year,
+            "version": version,
+            "opciones_delito": opciones_delito,
+            "idx_grupos_delito": idx_grupos_delito,
+            **indexes,
+        }
+    )
+
+
+def load_catalogs(_client, _engine):
+    """Get the catalog bundle for the current data version.
+
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+
+    Returns:
+        MappingProxyType: Read-only dictionary containing all catalog dataframes
+    """
+    version = get_catalog_version(_client, _engine)
+    return build_catalog_bundle(_client, _engine, version)
@@ -1,11 +1,14 @@
 """Main entry point for the Streamlit crime statistics application."""
 
 import streamlit as st
-from config.settings import setup_page_config
-from data.database import init_connections, close_connections
+from config.settings import SHOW_MEMORY_REPORT, setup_page_config
+from data.database import init_connections
+from data.fanout import FanOutError, fan_out
 from models.catalogs import load_catalogs
 from ui.sidebar import render_sidebar
-from ui.tabs.tab_general import render_general_tab
+from ui.tabs.tab_comparacion import render_comparison_controls
+from ui.tabs.tab_general import render_general_controls
+from ui.tabs.tab_ranking import render_ranking_controls
 
 
 def main():
@@ -13,7 +16,7 @@ def main():
     # Initialize page configuration
     setup_page_config()
 
-    # Initialize database connections
+    # Get the shared (pooled) database connections
     client, engine = init_connections()
 
     # Load all catalogs
@@ -25,18 +28,44 @@ def main():
     # Render sidebar and get selected options
     sidebar_options = render_sidebar(catalogs)
 
+    if SHOW_MEMORY_REPORT:
+        from data.schema import memory_report
+
+        with st.sidebar.expander(":floppy_disk: Memoria de catálogos"):
+            st.dataframe(memory_report(dict(catalogs)), hide_index=True)
+
     # Create tabs
-    tab1, tab2 = st.tabs(["Grafica general", "."])
+    tab1, tab2, tab3 = st.tabs(["Grafica general", "Comparación", "Ranking"])
 
-    # Render content for each tab
-    with tab1:
-        render_general_tab(catalogs, sidebar_options, client, engine)
+    # Controls of every tab first, so that their data stages (independent of
+    # each other) run concurrently: a rerun waits for the slowest one only
+    etapas = {}
+    for nombre, tab, render_controls in [
+        ("general", tab1, render_general_controls),
+        ("comparacion", tab2, render_comparison_controls),
+        ("ranking", tab3, render_ranking_controls),
+    ]:
+        with tab:
+            carga, mostrar = render_controls(catalogs, sidebar_options, client, engine)
+        if carga is not None:
+            etapas[nombre] = (tab, carga, mostrar)
 
-    with tab2:
-        pass
+    # A failed or timed-out stage only blanks its own tab; a stage still
+    # running from a previous rerun is not submitted again
+    with st.spinner("Consultando datos..."):
+        datos = fan_out(
+            {nombre: carga for nombre, (_, carga, _) in etapas.items()},
+            parcial=True,
+            exclusivas=True,
+        )
 
-    # Close database connections
-    close_connections(client, engine)
+    # Render content for each tab
+    for nombre, (tab, _, mostrar) in etapas.items():
+        with tab:
+            if isinstance(datos[nombre], FanOutError):
+                st.error(f"No se pudieron obtener los datos ({datos[nombre]})")
+            else:
+                mostrar(datos[nombre])
 
 
 if __name__ == "__main__":
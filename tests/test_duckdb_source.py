@@ -0,0 +1,69 @@
+"""Smoke test of the embedded DuckDB backend, no database server needed."""
+
+import pandas as pd
+import pytest
+
+from data import local_store, queries
+from data.sources import get_data_source
+
+
+@pytest.fixture
+def duckdb_store(tmp_path, monkeypatch):
+    """Local store with a few fixture rows, served by the duckdb backend."""
+    monkeypatch.setattr(local_store, "LOCAL_STORE_DIR", str(tmp_path))
+    monkeypatch.setenv("SESNSP_BACKEND", "duckdb")
+    # Go through the DataSource, not the cube or the mirror shortcuts
+    monkeypatch.setattr(queries, "USE_LOCAL_STORE", False)
+
+    df_definitivo = pd.DataFrame(
+        {
+            "CVE_LUGAR": ["M1", "M1", "M1", "P00", "P00", "M2"],
+            "Id_Agrupador_Delito": [1, 1, 2, 1, 1, 1],
+            "Aniomes": [202301, 202302, 202301, 202301, 202302, 202302],
+            "Num_Delitos": [10, 12, 3, 100, 90, 5],
+            "tasa": [1.0, 1.2, 0.3, 0.8, 0.7, 0.5],
+        }
+    )
+    local_store.append_partition(df_definitivo, "dfDefinitivo", 202301, 202302)
+    local_store.write_table(pd.DataFrame({"Aniomes": [202301, 202302]}), "col_aniomes")
+    return df_definitivo
+
+
+def test_get_series_data_reads_duckdb(duckdb_store):
+    df = queries.get_series_data(None, None, ["M1", "P00"], 1, 202301, 202302)
+
+    df = df.sort_values(by=["CVE_LUGAR", "Aniomes"], ignore_index=True)
+    assert df["CVE_LUGAR"].tolist() == ["M1", "M1", "P00", "P00"]
+    assert df["Aniomes"].tolist() == [202301, 202302, 202301, 202302]
+    assert df["Num_Delitos"].tolist() == [10, 12, 100, 90]
+    assert df["tasa"].tolist() == pytest.approx([1.0, 1.2, 0.8, 0.7])
+
+
+def test_get_series_data_range(duckdb_store):
+    df = queries.get_series_data(None, None, ["M1", "M2"], 1, 202302, 202302)
+
+    assert sorted(df["CVE_LUGAR"].tolist()) == ["M1", "M2"]
+    assert set(df["Aniomes"]) == {202302}
+
+
+def test_latest_aniomes(duckdb_store):
+    assert get_data_source().latest_aniomes() == 202302
+
+
+def test_read_table_filters_are_bound(duckdb_store):
+    source = get_data_source()
+
+    df = source.read_table(
+        "dfDefinitivo",
+        columns=["CVE_LUGAR", "Aniomes"],
+        filters=[("CVE_LUGAR", "in", ["M1", "M2"]), ("Aniomes", ">=", 202302)],
+    )
+    assert sorted(df["CVE_LUGAR"].tolist()) == ["M1", "M2"]
+
+    # Values are parameters, never SQL
+    inyeccion = "M1' OR '1'='1"
+    df = source.read_table("dfDefinitivo", filters=[("CVE_LUGAR", "=", inyeccion)])
+    assert df.empty
+
+    with pytest.raises(ValueError):
+        source.read_table("dfDefinitivo", filters=[("CVE_LUGAR", "LIKE", "M%")])
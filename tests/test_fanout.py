@@ -0,0 +1,63 @@
+"""Concurrent fetches (data/fanout.py): failures, timeouts and in-flight stages."""
+
+import threading
+
+import pytest
+
+from data.fanout import FanOutError, fan_out
+
+
+def fallar():
+    raise ValueError("sin conexión")
+
+
+def test_raises_first_failure():
+    with pytest.raises(FanOutError) as error:
+        fan_out({"a": lambda: 1, "b": fallar})
+    assert error.value.nombre == "b"
+    assert isinstance(error.value.__cause__, ValueError)
+
+
+def test_parcial_returns_failures_per_key():
+    datos = fan_out({"a": lambda: 1, "b": fallar}, parcial=True)
+    assert list(datos) == ["a", "b"]
+    assert datos["a"] == 1
+    assert isinstance(datos["b"], FanOutError)
+
+
+def test_timeout_fails_only_its_fetch():
+    liberar = threading.Event()
+    try:
+        datos = fan_out(
+            {"lenta": liberar.wait, "rapida": lambda: 2},
+            timeouts={"lenta": 0.05},
+            parcial=True,
+        )
+    finally:
+        liberar.set()
+    assert datos["rapida"] == 2
+    assert "timed out" in str(datos["lenta"])
+
+
+def test_exclusive_fetch_in_flight_is_not_resubmitted():
+    liberar = threading.Event()
+    llamadas = []
+
+    def lenta():
+        llamadas.append(1)
+        liberar.wait(5)
+        return "lenta"
+
+    try:
+        primera = fan_out(
+            {"lenta": lenta}, timeout=0.05, parcial=True, exclusivas=True
+        )
+        segunda = fan_out(
+            {"lenta": lenta, "otra": lambda: 3}, parcial=True, exclusivas=True
+        )
+    finally:
+        liberar.set()
+    assert isinstance(primera["lenta"], FanOutError)
+    assert "still running" in str(segunda["lenta"])
+    assert segunda["otra"] == 3
+    assert len(llamadas) == 1
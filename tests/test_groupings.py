@@ -0,0 +1,91 @@
+"""Custom crime groupings (data/groupings.py) through the caches and the cube."""
+
+import hashlib
+import pickle
+
+import pandas as pd
+import pytest
+
+from data import local_store, queries
+from data.groupings import CustomGrouping
+
+# Two disjoint groups (10, 11) and a group containing both (12)
+IDX_GRUPOS = {
+    10: frozenset({1}),
+    11: frozenset({2}),
+    12: frozenset({1, 2, 3}),
+}
+
+
+@pytest.fixture
+def cube_store(tmp_path, monkeypatch):
+    """Local mirror with two crime groups, served through the cube."""
+    monkeypatch.setattr(local_store, "LOCAL_STORE_DIR", str(tmp_path))
+    # Catalogs are read through the embedded backend
+    monkeypatch.setenv("SESNSP_BACKEND", "duckdb")
+    monkeypatch.setattr(queries, "USE_LOCAL_STORE", True)
+    monkeypatch.setattr(queries, "USE_CUBE", True)
+    _clear_caches()
+
+    df_definitivo = pd.DataFrame(
+        {
+            "CVE_LUGAR": ["P00", "P00", "P00", "E1", "E1"],
+            "Id_Agrupador_Delito": [10, 11, 10, 10, 11],
+            "Aniomes": [202301, 202301, 202302, 202301, 202302],
+            "Num_Delitos": [100, 50, 80, 10, 4],
+            "tasa": [1.0, 0.5, 0.8, 1.0, 0.4],
+        }
+    )
+    local_store.append_partition(df_definitivo, "dfDefinitivo", 202301, 202302)
+    local_store.write_table(pd.DataFrame({"Aniomes": [202301, 202302]}), "col_aniomes")
+    local_store.write_table(pd.DataFrame({"CVE_LUGAR": ["P00", "E1"]}), "dfLugar")
+    local_store.write_table(
+        pd.DataFrame({"Id_Agrupador_Delito": [10, 11, 12]}), "cab_agrupador_delito"
+    )
+    local_store.write_table(
+        pd.DataFrame(
+            {"CVE_LUGAR": ["P00", "E1"], "Year": [2023, 2023], "Num_Habs": [1e7, 1e6]}
+        ),
+        "dfPobExtendida",
+    )
+    local_store.write_meta({"high_water_mark": 202302})
+    yield
+    _clear_caches()
+
+
+def _clear_caches():
+    """Drop the cube and population cached for another fixture mirror."""
+    for funcion in [queries._load_cube, queries.get_population_data]:
+        if hasattr(funcion, "clear"):
+            funcion.clear()
+
+
+def test_hashed_by_content():
+    hashing = pytest.importorskip("streamlit.runtime.caching.hashing")
+    from streamlit.runtime.caching.cache_type import CacheType
+
+    def digest(grouping):
+        hasher = hashlib.new("md5")
+        hashing.update_hash(grouping, hasher, CacheType.DATA)
+        return hasher.hexdigest()
+
+    grouping = CustomGrouping([2, 1], IDX_GRUPOS)
+    assert grouping.ids_agrupador == (10, 11)
+    assert digest(grouping) == digest(CustomGrouping([1, 2, 2], IDX_GRUPOS))
+    assert digest(grouping) != digest(CustomGrouping([1], IDX_GRUPOS))
+
+    copia = pickle.loads(pickle.dumps(grouping))
+    assert copia == grouping
+    assert copia.ids_agrupador == grouping.ids_agrupador
+
+
+def test_series_from_cube(cube_store):
+    grouping = CustomGrouping([1, 2], IDX_GRUPOS)
+
+    df = queries.get_series_data(None, None, ["P00", "E1"], grouping, 202301, 202302)
+
+    df = df.sort_values(by=["CVE_LUGAR", "Aniomes"], ignore_index=True)
+    assert set(df["Id_Agrupador_Delito"]) == {grouping.key}
+    assert df["CVE_LUGAR"].tolist() == ["E1", "E1", "P00", "P00"]
+    assert df["Num_Delitos"].tolist() == [10, 4, 150, 80]
+    assert df["tasa"].tolist() == pytest.approx([1.0, 0.4, 1.5, 0.8])
@@ -0,0 +1,37 @@
+"""Rates per 100,000 inhabitants (data/rates.py)."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.rates import compute_rates
+
+
+def _frames():
+    df = pd.DataFrame(
+        {
+            "CVE_LUGAR": ["M1", "M1", "M2"],
+            "Id_Agrupador_Delito": [1, 1, 1],
+            "Aniomes": [202301, 202401, 202301],
+            "Num_Delitos": [10, 20, 5],
+        }
+    )
+    df_pob = pd.DataFrame(
+        {"CVE_LUGAR": ["M1", "M2"], "Year": [2023, 2023], "Num_Habs": [1000, 500]}
+    )
+    return df, df_pob
+
+
+def test_compute_rates_raises_on_missing_population():
+    df, df_pob = _frames()
+    with pytest.raises(ValueError):
+        compute_rates(df, df_pob)
+
+
+def test_compute_rates_query_time_leaves_nan():
+    df, df_pob = _frames()
+    df_res = compute_rates(df, df_pob, estricto=False)
+
+    assert df_res["tasa"].iloc[0] == pytest.approx(1000.0)
+    assert np.isnan(df_res["tasa"].iloc[1])
+    assert df_res["tasa"].iloc[2] == pytest.approx(1000.0)
@@ -0,0 +1,35 @@
+"""Regions aggregated from their municipalities (data/regions.py)."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.regions import Region, aggregate_regions
+
+
+def test_aggregate_regions_population_weighted():
+    region = Region(["M1", "M2"])
+    df_series = pd.DataFrame(
+        {
+            "CVE_LUGAR": ["M1", "M2", "M1"],
+            "Id_Agrupador_Delito": [1, 1, 1],
+            "Aniomes": [202301, 202301, 202401],
+            "Num_Delitos": [10, 5, 8],
+            "tasa": [1000.0, 1000.0, 800.0],
+        }
+    )
+    df_poblacion = pd.DataFrame(
+        {
+            "CVE_LUGAR": ["M1", "M2", "M1"],
+            "Year": [2023, 2023, 2024],
+            "Num_Habs": [1000, 500, 1000],
+        }
+    )
+
+    df_res = aggregate_regions(df_series, {region: region.miembros}, df_poblacion)
+
+    df_res = df_res.sort_values(by="Aniomes", ignore_index=True)
+    assert df_res["Num_Delitos"].tolist() == [15, 8]
+    assert df_res["tasa"].iloc[0] == pytest.approx(1000.0)
+    # M2 has no population in 2024: NaN, not the rate of M1 alone (or an error)
+    assert np.isnan(df_res["tasa"].iloc[1])
@@ -0,0 +1,151 @@
+"""Rollups (data/rollups.py) checked against a direct groupby."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data import local_store
+from data.rollups import TABLAS_ROLLUP, build_rollups, refresh_rollups
+
+COLUMNAS = ["CVE_LUGAR", "Id_Agrupador_Delito", "Aniomes", "Num_Delitos", "tasa"]
+
+
+def _mensual():
+    """Monthly rows of two places and two crime groups over 2022-2023."""
+    aniomes = [anio * 100 + mes for anio in (2022, 2023) for mes in range(1, 13)]
+    filas = [
+        (cve, id_agrup, am, float(i + j), (i + j) / 10)
+        for i, (cve, id_agrup) in enumerate(
+            [("M1", 1), ("M1", 2), ("M2", 1), ("M2", 2)]
+        )
+        for j, am in enumerate(aniomes)
+    ]
+    df = pd.DataFrame(filas, columns=COLUMNAS)
+    # A missing month, so meses must count only months with data
+    return df.loc[~((df["CVE_LUGAR"] == "M2") & (df["Aniomes"] == 202305))]
+
+
+def _esperado_calendario(df, periodos):
+    return (
+        df.assign(Periodo=periodos)
+        .groupby(["CVE_LUGAR", "Id_Agrupador_Delito", "Periodo"], as_index=False)
+        .agg(
+            Num_Delitos=("Num_Delitos", "sum"),
+            tasa=("tasa", "sum"),
+            meses=("Aniomes", "count"),
+        )
+    )
+
+
+def _esperado_movil12(df):
+    filas = []
+    for (cve, id_agrup), grupo in df.groupby(["CVE_LUGAR", "Id_Agrupador_Delito"]):
+        serie = grupo.set_index("Aniomes")
+        for cierre in sorted(df["Aniomes"].unique()):
+            indice = cierre // 100 * 12 + cierre % 100
+            desde = (indice - 12) // 12 * 100 + (indice - 12) % 12 + 1
+            ventana = serie.loc[(serie.index >= desde) & (serie.index <= cierre)]
+            if len(ventana):
+                filas.append(
+                    (
+                        cve,
+                        id_agrup,
+                        cierre,
+                        ventana["Num_Delitos"].sum(),
+                        ventana["tasa"].sum(),
+                        len(ventana),
+                    )
+                )
+    return pd.DataFrame(
+        filas,
+        columns=[
+            "CVE_LUGAR",
+            "Id_Agrupador_Delito",
+            "Periodo",
+            "Num_Delitos",
+            "tasa",
+            "meses",
+        ],
+    )
+
+
+def _ordenado(df):
+    claves = ["CVE_LUGAR", "Id_Agrupador_Delito", "Periodo"]
+    df = df.sort_values(by=claves, ignore_index=True)
+    return df.astype({"Periodo": np.int64, "meses": np.int64})
+
+
+def _comparar(obtenido, esperado):
+    pd.testing.assert_frame_equal(
+        _ordenado(obtenido), _ordenado(esperado), check_dtype=False
+    )
+
+
+def _esperados(df):
+    return {
+        "anual": _esperado_calendario(df, df["Aniomes"] // 100),
+        "trimestral": _esperado_calendario(
+            df, df["Aniomes"] // 100 * 10 + (df["Aniomes"] % 100 - 1) // 3 + 1
+        ),
+        "movil12": _esperado_movil12(df),
+    }
+
+
+def test_build_rollups_matches_groupby():
+    df = _mensual()
+    rollups = build_rollups(df)
+    for nivel, esperado in _esperados(df).items():
+        _comparar(rollups[nivel], esperado)
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_store, "LOCAL_STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def _leer_rollups():
+    return {
+        nivel: local_store.read_table(tabla) for nivel, tabla in TABLAS_ROLLUP.items()
+    }
+
+
+def test_refresh_rollups_builds_missing_tables_from_whole_mirror(store):
+    # Mirror synced before the rollups existed: no rollup table yet, and the
+    # next sync only brings one new month
+    df = _mensual()
+    antiguos = df.loc[df["Aniomes"] < 202312]
+    local_store.append_partition(antiguos, "dfDefinitivo", 202201, 202311)
+    local_store.append_partition(
+        df.loc[df["Aniomes"] == 202312], "dfDefinitivo", 202312, 202312
+    )
+
+    refresh_rollups([202312])
+
+    for nivel, esperado in _esperados(df).items():
+        _comparar(_leer_rollups()[nivel], esperado)
+
+
+def test_refresh_rollups_without_new_months_builds_missing_tables(store):
+    df = _mensual()
+    local_store.append_partition(df, "dfDefinitivo", 202201, 202312)
+
+    refresh_rollups([])
+
+    for nivel, esperado in _esperados(df).items():
+        _comparar(_leer_rollups()[nivel], esperado)
+
+
+def test_refresh_rollups_incremental_matches_full_build(store):
+    df = _mensual()
+    primeros = df.loc[df["Aniomes"] <= 202306]
+    local_store.append_partition(primeros, "dfDefinitivo", 202201, 202306)
+    refresh_rollups(sorted(primeros["Aniomes"].unique()))
+
+    local_store.append_partition(
+        df.loc[df["Aniomes"] > 202306], "dfDefinitivo", 202307, 202312
+    )
+    refresh_rollups(list(range(202307, 202313)))
+
+    for nivel, esperado in _esperados(df).items():
+        _comparar(_leer_rollups()[nivel], esperado)
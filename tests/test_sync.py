@@ -0,0 +1,112 @@
+"""Mirror sync (data/sync.py) against an in-memory remote source."""
+
+import pandas as pd
+import pytest
+
+from data import local_store
+from data.fanout import FanOutError
+from data.sources import DataSource
+from data.sync import sync_local_store
+
+
+class FakeSource(DataSource):
+    """Remote backend held in a DataFrame of "dfDefinitivo" rows."""
+
+    backend = "fake"
+
+    def __init__(self, df_definitivo):
+        self.df_definitivo = df_definitivo
+
+    def read_table(self, table_name, columns=None, filters=None):
+        if table_name == "col_aniomes":
+            aniomes = sorted(self.df_definitivo["Aniomes"].unique())
+            return pd.DataFrame({"Aniomes": aniomes})
+        return pd.DataFrame({"CVE_LUGAR": ["M1"]})
+
+    def read_rows_by_aniomes(self, list_aniomes):
+        df = self.df_definitivo
+        return df.loc[df["Aniomes"].isin(list_aniomes)].reset_index(drop=True)
+
+    def read_month_summary(self):
+        return self.df_definitivo.groupby("Aniomes", as_index=False).agg(
+            filas=("Aniomes", "size"),
+            Num_Delitos=("Num_Delitos", "sum"),
+            tasa=("tasa", "sum"),
+        )
+
+
+def _filas(aniomes, num_delitos):
+    return pd.DataFrame(
+        {
+            "CVE_LUGAR": ["M1"] * len(aniomes),
+            "Id_Agrupador_Delito": [1] * len(aniomes),
+            "Aniomes": aniomes,
+            "Num_Delitos": num_delitos,
+            "tasa": [valor / 10 for valor in num_delitos],
+        }
+    )
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_store, "LOCAL_STORE_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_sync_pulls_reloaded_months_again(store):
+    remoto = FakeSource(_filas([202301, 202302, 202303], [1, 2, 3]))
+    meta = sync_local_store(remoto, batch_size=2)
+    assert meta["high_water_mark"] == 202303
+    assert meta.get("revision", 0) == 0
+
+    # 202302 is reloaded remotely with other figures, and 202304 published
+    remoto.df_definitivo = _filas([202301, 202302, 202303, 202304], [1, 20, 3, 4])
+    meta = sync_local_store(remoto, batch_size=2)
+
+    assert meta["high_water_mark"] == 202304
+    assert meta["revision"] == 1
+    df = local_store.read_table("dfDefinitivo").sort_values(by="Aniomes")
+    assert df["Aniomes"].tolist() == [202301, 202302, 202303, 202304]
+    assert df["Num_Delitos"].tolist() == [1, 20, 3, 4]
+    assert meta["tables"]["dfDefinitivo"]["rows"] == 4
+
+    df_anual = local_store.read_table("rollup_anual")
+    assert df_anual["Num_Delitos"].tolist() == [28]
+
+    # Nothing changed: no new revision
+    meta = sync_local_store(remoto)
+    assert meta["revision"] == 1
+
+
+class SinTablaSource(FakeSource):
+    """Remote backend without some tables, as a production database."""
+
+    def __init__(self, df_definitivo, faltantes):
+        super().__init__(df_definitivo)
+        self.faltantes = faltantes
+
+    def read_table(self, table_name, columns=None, filters=None):
+        if table_name in self.faltantes:
+            raise LookupError(f'relation "{table_name}" does not exist')
+        return super().read_table(table_name, columns, filters)
+
+
+def test_sync_skips_missing_optional_table(store):
+    remoto = SinTablaSource(_filas([202301, 202302], [1, 2]), ["det_lugar_municipio"])
+
+    with pytest.warns(UserWarning, match="det_lugar_municipio"):
+        meta = sync_local_store(remoto)
+
+    assert meta["high_water_mark"] == 202302
+    assert "det_lugar_municipio" not in meta["tables"]
+    assert local_store.read_table("col_aniomes")["Aniomes"].tolist() == [
+        202301,
+        202302,
+    ]
+
+
+def test_sync_fails_on_missing_catalog(store):
+    remoto = SinTablaSource(_filas([202301], [1]), ["cat_delito"])
+
+    with pytest.raises(FanOutError, match="cat_delito"):
+        sync_local_store(remoto)
@@ -0,0 +1,70 @@
+"""Rollup chart of the General tab for the national and state selections."""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("streamlit.runtime.caching")
+
+from data import local_store, queries  # noqa: E402
+from data.rollups import refresh_rollups  # noqa: E402
+from ui.tabs.tab_general import (  # noqa: E402
+    _series_keys,
+    _series_names,
+    load_rollup_data,
+    render_rollup_chart,
+)
+
+
+@pytest.fixture
+def rollup_store(tmp_path, monkeypatch):
+    """Local mirror of 2023 with a municipality, a state and the country."""
+    monkeypatch.setattr(local_store, "LOCAL_STORE_DIR", str(tmp_path))
+    monkeypatch.setenv("SESNSP_BACKEND", "duckdb")
+    monkeypatch.setattr(queries, "USE_LOCAL_STORE", True)
+    load_rollup_data.clear()
+
+    aniomes = [202300 + mes for mes in range(1, 13)]
+    df_definitivo = pd.DataFrame(
+        [
+            (cve_lugar, 1, am, float(mes), mes / 10)
+            for cve_lugar in ["M1", "E1", "P00"]
+            for mes, am in enumerate(aniomes, start=1)
+        ],
+        columns=["CVE_LUGAR", "Id_Agrupador_Delito", "Aniomes", "Num_Delitos", "tasa"],
+    )
+    local_store.append_partition(df_definitivo, "dfDefinitivo", 202301, 202312)
+    local_store.write_meta({"high_water_mark": 202312})
+    refresh_rollups(aniomes)
+    yield
+    load_rollup_data.clear()
+
+
+@pytest.mark.parametrize(
+    "id_ubic, id_ent_asoc, claves, series",
+    [
+        ("P00", "0", ["P00"], ["Ubicación referida"]),
+        ("E1", "1", ["E1", "P00"], ["Ubicación referida", "Nacional"]),
+        (
+            "M1",
+            "1",
+            ["M1", "P00", "E1"],
+            ["Ubicación referida", "Nacional", "Entidad"],
+        ),
+    ],
+)
+def test_rollup_chart_without_repeated_keys(
+    rollup_store, id_ubic, id_ent_asoc, claves, series
+):
+    cve_lugares = tuple(_series_keys(id_ubic, id_ent_asoc))
+    assert list(cve_lugares) == claves
+
+    df = load_rollup_data(
+        None, None, (202312, 0), cve_lugares, 1, 202301, 202312, "trimestral"
+    )
+    assert df.columns.tolist() == ["Periodo", *claves, "meses"]
+    assert df["meses"].tolist() == [3, 3, 3, 3]
+
+    assert list(_series_names(id_ubic, id_ent_asoc).values()) == series
+
+    # st.dataframe rejects repeated column names
+    render_rollup_chart(df, "Trimestral", id_ubic, id_ent_asoc)
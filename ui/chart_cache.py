@@ -0,0 +1,207 @@
+"""Cache of rendered matplotlib charts keyed by data and chart parameters."""
+
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+import streamlit as st
+from config.settings import CHART_CACHE_MAX_BYTES, CHART_CACHE_MAX_ENTRIES, CHART_DPI
+
+
+class ChartRenderCache:
+    """Thread-safe LRU cache of image bytes with an entry and size cap."""
+
+    def __init__(
+        self, max_bytes=CHART_CACHE_MAX_BYTES, max_entries=CHART_CACHE_MAX_ENTRIES
+    ):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Get cached bytes (None on a miss) and mark them as recently used."""
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        """Store bytes, evicting least recently used entries over the caps."""
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= len(self._entries.pop(key))
+            self._entries[key] = data
+            self._bytes += len(data)
+            while self._entries and (
+                self._bytes > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def stats(self):
+        """Report entries, size and hit counts.
+
+        Returns:
+            dict: Cache statistics
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+@st.cache_resource
+def get_chart_cache():
+    """Get the process-wide chart cache.
+
+    Returns:
+        ChartRenderCache: Cache shared by all sessions
+    """
+    return ChartRenderCache()
+
+
+def chart_key(df, chart_parameteres, *extra):
+    """Hash the series data and the chart parameters into a cache key.
+
+    Args:
+        df: DataFrame plotted
+        chart_parameteres: Output of get_chart_parameters
+        *extra: Other values that change the image (titles, format)
+
+    Returns:
+        str: Hex digest
+    """
+    digest = hashlib.sha1()
+    digest.update(",".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    digest.update(repr(sorted(chart_parameteres.items())).encode())
+    digest.update(repr(extra).encode())
+    return digest.hexdigest()
+
+
+def render_figure(key, build_figure, image_format="png"):
+    """Get a figure as image bytes, building and rasterizing it on a cache miss.
+
+    Args:
+        key: Cache key (see chart_key)
+        build_figure: Callable returning a matplotlib figure
+        image_format: "png" or "svg"
+
+    Returns:
+        bytes: Rendered chart
+    """
+    cache = get_chart_cache()
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    import matplotlib.pyplot as plt
+
+    fig = build_figure()
+    try:
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=image_format, dpi=CHART_DPI)
+        data = buffer.getvalue()
+    finally:
+        # Figures are never shown interactively; release them from pyplot
+        plt.close(fig)
+
+    cache.put(key, data)
+    return data
+
+
+def render_crime_chart(
+    df,
+    chart_parameteres,
+    chart_options,
+    nom_agrupador_selecc,
+    nom_ubic_selecc,
+    image_format="png",
+):
+    """Get the crime chart as image bytes, rendering it only on a cache miss.
+
+    Args:
+        df: DataFrame with crime data
+        chart_parameteres: parámetros específicos
+        chart_options: Dictionary of chart format options
+        nom_agrupador_selecc: Selected crime group name
+        nom_ubic_selecc: Selected location name
+        image_format: "png" or "svg"
+
+    Returns:
+        bytes: Rendered chart
+    """
+    from ui.visualization import create_crime_chart
+
+    key = chart_key(
+        df, chart_parameteres, nom_agrupador_selecc, nom_ubic_selecc, image_format
+    )
+    return render_figure(
+        key,
+        lambda: create_crime_chart(
+            df, chart_parameteres, chart_options, nom_agrupador_selecc, nom_ubic_selecc
+        ),
+        image_format,
+    )
+
+
+def render_comparison_chart(
+    df_wide, nombres, nom_agrupador_selecc, modo="Superpuestas", image_format="png"
+):
+    """Get the multi-location comparison chart as image bytes (cached).
+
+    Args:
+        df_wide: Wide frame (Aniomes + one column per location)
+        nombres: Dictionary CVE_LUGAR -> location name
+        nom_agrupador_selecc: Selected crime group name
+        modo: "Superpuestas" (overlay) or "Paneles" (small multiples)
+        image_format: "png" or "svg"
+
+    Returns:
+        bytes: Rendered chart
+    """
+    from ui.visualization import create_comparison_chart
+
+    key = chart_key(df_wide, nombres, "comparacion", nom_agrupador_selecc, modo)
+    return render_figure(
+        key,
+        lambda: create_comparison_chart(df_wide, nombres, nom_agrupador_selecc, modo),
+        image_format,
+    )
+
+
+def render_heatmap_chart(df_wide, nombres, nom_agrupador_selecc, image_format="png"):
+    """Get the location x month heatmap as image bytes (cached).
+
+    Args:
+        df_wide: Wide frame (Aniomes + one column per CVE_LUGAR)
+        nombres: Dictionary CVE_LUGAR -> location name (rows, in order)
+        nom_agrupador_selecc: Selected crime group name
+        image_format: "png" or "svg"
+
+    Returns:
+        bytes: Rendered chart
+    """
+    from ui.visualization import create_heatmap_chart
+
+    key = chart_key(df_wide, nombres, "heatmap", nom_agrupador_selecc)
+    return render_figure(
+        key,
+        lambda: create_heatmap_chart(df_wide, nombres, nom_agrupador_selecc),
+        image_format,
+    )
@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 import plotly.graph_objects as go
 
 
@@ -37,3 +38,85 @@ def create_plotly_risk_chart(
     )
 
     return fig
+
+
+def create_plotly_comparison_chart(
+    df_wide, nombres, nom_agrupador_selecc, modo="Superpuestas"
+):
+    """Create an interactive chart comparing the rate of several locations.
+
+    Args:
+        df_wide: Wide frame (Aniomes + one column per CVE_LUGAR)
+        nombres: Dictionary CVE_LUGAR -> location name
+        nom_agrupador_selecc: Selected crime group name
+        modo: "Superpuestas" (overlay) or "Paneles" (small multiples)
+
+    Returns:
+        plotly figure: Generated chart
+    """
+    from plotly.subplots import make_subplots
+
+    claves = [clave for clave in df_wide.columns if clave in nombres]
+    fechas = pd.to_datetime(df_wide["Aniomes"].astype(str), format="%Y%m")
+
+    if modo == "Paneles":
+        n_columnas = min(3, max(1, len(claves)))
+        n_filas = -(-max(1, len(claves)) // n_columnas)
+        fig = make_subplots(
+            rows=n_filas,
+            cols=n_columnas,
+            shared_xaxes=True,
+            shared_yaxes=True,
+            subplot_titles=[nombres[clave] for clave in claves],
+        )
+        for posicion, clave in enumerate(claves):
+            fig.add_trace(
+                go.Scatter(x=fechas, y=df_wide[clave], name=nombres[clave]),
+                row=posicion // n_columnas + 1,
+                col=posicion % n_columnas + 1,
+            )
+        fig.update_layout(height=300 * n_filas, showlegend=False)
+    else:
+        fig = go.Figure()
+        for clave in claves:
+            fig.add_trace(
+                go.Scatter(
+                    x=fechas, y=df_wide[clave], mode="lines", name=nombres[clave]
+                )
+            )
+        fig.update_layout(xaxis_title="Periodo", yaxis_title="Tasa delictiva")
+
+    fig.update_layout(
+        title="Tasa delictiva mensual de " + nom_agrupador_selecc + " por ubicación"
+    )
+    return fig
+
+
+def create_plotly_heatmap_chart(df_wide, nombres, nom_agrupador_selecc):
+    """Create an interactive location x month heatmap of crime rates.
+
+    Args:
+        df_wide: Wide frame (Aniomes + one column per CVE_LUGAR)
+        nombres: Dictionary CVE_LUGAR -> location name (rows, in order)
+        nom_agrupador_selecc: Selected crime group name
+
+    Returns:
+        plotly figure: Generated chart
+    """
+    claves = [clave for clave in nombres if clave in df_wide.columns]
+    fig = go.Figure(
+        go.Heatmap(
+            z=df_wide[claves].to_numpy().T,
+            x=df_wide["Aniomes"].astype(str),
+            y=[nombres[clave] for clave in claves],
+            colorscale="Reds",
+            colorbar=dict(title="Tasa"),
+        )
+    )
+    fig.update_layout(
+        title="Tasa delictiva mensual de " + nom_agrupador_selecc,
+        xaxis_title="Periodo",
+        yaxis=dict(autorange="reversed"),
+        height=200 + 22 * len(claves),
+    )
+    return fig
@@ -2,7 +2,8 @@
 
 import streamlit as st
 import numpy as np
-from utils.helpers import get_ubicaciones
+from data.groupings import CustomGrouping
+from utils.helpers import TIPOS_UBICACION
 
 
 def render_sidebar(catalogs):
@@ -28,21 +29,57 @@ def render_sidebar(catalogs):
         ]
     )[0]
 
+    # Custom grouping of subtypes, replacing the selected group
+    custom_options = render_custom_grouping_controls(catalogs)
+    if custom_options is not None:
+        nom_agrupador_selecc, id_agrup_del = custom_options
+
     # Location controls
     location_options = render_location_controls(catalogs)
 
-    # Chart format controls
-    chart_options = render_chart_format_controls()
+    # Chart format controls are rendered by each tab inside its chart fragment
+    # (see render_chart_format_controls), so cosmetic changes skip this rerun
 
     # Return all selected options
     return {
         "nom_agrupador_selecc": nom_agrupador_selecc,
         "id_agrup_del": id_agrup_del,
         **location_options,
-        **chart_options,
     }
 
 
+def render_custom_grouping_controls(catalogs):
+    """Render the controls of a custom grouping of crime subtypes.
+
+    Args:
+        catalogs: Dictionary of catalog dataframes
+
+    Returns:
+        tuple or None: (name, CustomGrouping) when a valid grouping is selected
+    """
+    opciones_delito = catalogs["opciones_delito"]
+
+    with st.sidebar.expander(":jigsaw: Agrupación personalizada"):
+        activa = st.toggle("Usar agrupación personalizada")
+        seleccion = st.multiselect(
+            "Subtipos de delito:", list(opciones_delito), disabled=not activa
+        )
+        if not activa or not seleccion:
+            return None
+
+        try:
+            grouping = CustomGrouping(
+                [opciones_delito[etiqueta] for etiqueta in seleccion],
+                catalogs["idx_grupos_delito"],
+            )
+        except ValueError as error:
+            st.warning(f"No se puede formar la agrupación: {error}")
+            return None
+
+    nombre = f"agrupación personalizada ({len(grouping.id_delitos)} subtipos)"
+    return nombre, grouping
+
+
 def render_location_controls(catalogs):
     """Render location selection controls.
 
@@ -52,78 +89,26 @@ def render_location_controls(catalogs):
     Returns:
         dict: Dictionary of selected location options
     """
-    df_lugar = catalogs["lugar"]
-    df_pob_extendida = catalogs["poblacion_extendida"]
     max_year = catalogs["max_year"]
+    opciones_ubicacion = catalogs["opciones_ubicacion"]
 
     with st.sidebar.expander(":earth_americas: Control de ubicaciones"):
-        tipo_ubicacion = st.radio(
-            "Seleccione:",
-            [
-                "Nacional",
-                "Entidades",
-                "Metrópolis",
-                "Municipios 800K+",
-                "Municipios 400K+",
-                "Municipios 100K+",
-                "Todos los municipios",
-            ],
-        )
-
-        df_posibles_lugares = get_ubicaciones(catalogs, tipo_ubicacion, max_year)
-        df_posibles_lugares.sort_values(by="IndexOrder", inplace=True)
+        tipo_ubicacion = st.radio("Seleccione:", list(TIPOS_UBICACION))
 
         nom_ubic_selecc = st.selectbox(
             ":round_pushpin: Seleccione ubicación principal:",
-            df_posibles_lugares,
+            opciones_ubicacion[tipo_ubicacion],
         )
 
         # Get location ID based on selected location type
+        id_ubic, id_ent_asoc = catalogs["idx_lugar"][
+            (TIPOS_UBICACION[tipo_ubicacion], nom_ubic_selecc)
+        ]
         if tipo_ubicacion == "Nacional":
-            id_ubic = list(
-                df_lugar.loc[
-                    (df_lugar["TIPO_LUGAR"] == "Pais")
-                    & (df_lugar["NOM_LUGAR"] == nom_ubic_selecc),
-                    "CVE_LUGAR",
-                ]
-            )[0]
             id_ent_asoc = "0"
-        elif tipo_ubicacion == "Entidades":
-            id_ubic, id_ent_asoc = (
-                df_lugar.loc[
-                    (df_lugar["TIPO_LUGAR"] == "Entidad")
-                    & (df_lugar["NOM_LUGAR"] == nom_ubic_selecc),
-                    ["CVE_LUGAR", "CVE_ENT"],
-                ]
-            ).iloc[0]
-
-        elif tipo_ubicacion == "Metrópolis":
-            id_ubic, id_ent_asoc = (
-                df_lugar.loc[
-                    (df_lugar["TIPO_LUGAR"] == "Metropoli")
-                    & (df_lugar["NOM_LUGAR"] == nom_ubic_selecc),
-                    ["CVE_LUGAR", "CVE_ENT"],
-                ]
-            ).iloc[0]
-        else:
-            id_ubic, id_ent_asoc = (
-                df_lugar.loc[
-                    (df_lugar["TIPO_LUGAR"] == "Municipio")
-                    & (df_lugar["NOM_LUGAR"] == nom_ubic_selecc),
-                    ["CVE_LUGAR", "CVE_ENT"],
-                ]
-            ).iloc[0]
 
         # Get population for selected location
-        pob_ubi = int(
-            list(
-                df_pob_extendida.loc[
-                    (df_pob_extendida["CVE_LUGAR"] == id_ubic)
-                    & (df_pob_extendida["Year"] == max_year),
-                    "Num_Habs",
-                ]
-            )[0]
-        )
+        pob_ubi = int(catalogs["idx_poblacion"][(id_ubic, max_year)])
 
         # Display population information
         txt_habitantes = f"{pob_ubi:,}" + " habs." + " (est. " + str(max_year) + ")"
@@ -141,15 +126,19 @@ def render_location_controls(catalogs):
     }
 
 
-def render_chart_format_controls():
+def render_chart_format_controls(container=st.sidebar):
     """Render chart formatting controls.
 
+    Args:
+        container: Where to place the controls (st.sidebar, or st inside a
+            fragment, which cannot write to the sidebar)
+
     Returns:
         dict: Dictionary of selected chart formatting options
     """
     chart_options = {}
 
-    with st.sidebar.expander(":chart: Personalización de la gráfica"):
+    with container.expander(":chart: Personalización de la gráfica"):
         chart_options["multi_seleccion_ubi"] = st.multiselect(
             "Incluir adicional",
             ["Nacional", "Entidad", "Tendencia"],
@@ -169,7 +158,7 @@ def render_chart_format_controls():
             "Seleccione color para 3er elemento:", "#6cb6ef"
         )
 
-    with st.sidebar.expander(":chart_with_upwards_trend: Formato de las series"):
+    with container.expander(":chart_with_upwards_trend: Formato de las series"):
         chart_options["ancho_bar"] = st.select_slider(
             "Seleccione el ancho de barra:", options=np.arange(5, 20, 0.5), value=10.5
         )
@@ -0,0 +1,154 @@
+"""UI components for the multi-location comparison tab."""
+
+from functools import partial
+
+import streamlit as st
+from config.settings import GRAFICAS
+from data.queries import get_comparison_data
+from data.regions import Region
+
+
+def render_comparison_tab(catalogs, sidebar_options, client, engine):
+    """Render the comparison tab content.
+
+    Args:
+        catalogs: Dictionary of catalog dataframes
+        sidebar_options: Dictionary of selected sidebar options
+        client: MongoDB client
+        engine: SQLAlchemy engine
+    """
+    carga, mostrar = render_comparison_controls(
+        catalogs, sidebar_options, client, engine
+    )
+    if carga is not None:
+        mostrar(carga())
+
+
+def render_comparison_controls(catalogs, sidebar_options, client, engine):
+    """Render the controls of the comparison tab and prepare its stages.
+
+    Args:
+        catalogs: Dictionary of catalog dataframes
+        sidebar_options: Dictionary of selected sidebar options
+        client: MongoDB client
+        engine: SQLAlchemy engine
+
+    Returns:
+        tuple: (data stage: callable without arguments; render stage:
+        callable taking the result of the data stage), or (None, None) when
+        there is nothing to compare
+    """
+    idx_lugar = catalogs["idx_lugar"]
+    clave_actual = next(
+        (
+            clave
+            for clave, (id_ubic, _) in idx_lugar.items()
+            if id_ubic == sidebar_options["id_ubic"]
+        ),
+        None,
+    )
+
+    # Locations to compare: (TIPO_LUGAR, NOM_LUGAR) keys of the lookup index
+    seleccion = st.multiselect(
+        ":round_pushpin: Seleccione las ubicaciones a comparar:",
+        list(idx_lugar),
+        default=[clave_actual] if clave_actual else None,
+        format_func=lambda clave: f"{clave[1]} ({clave[0]})",
+        key="comparacion_lugares",
+    )
+
+    # Ad-hoc region: any set of municipalities, aggregated at query time
+    with st.expander(":jigsaw: Región personalizada"):
+        nombre_region = st.text_input(
+            "Nombre de la región:", "Región personalizada", key="comparacion_region"
+        )
+        municipios = st.multiselect(
+            "Municipios que la forman:",
+            [clave for clave in idx_lugar if clave[0] == "Municipio"],
+            format_func=lambda clave: clave[1],
+            key="comparacion_municipios",
+        )
+    region = None
+    if municipios:
+        region = Region([idx_lugar[clave][0] for clave in municipios], nombre_region)
+
+    df_aniomes = catalogs["aniomes"]
+    list_aniomes = df_aniomes["Aniomes"].unique()
+    list_aniomes.sort()
+    aniomes_ini, aniomes_fin = st.select_slider(
+        ":calendar: Seleccione los meses a considerar:",
+        options=list_aniomes,
+        value=(list_aniomes[max(0, len(list_aniomes) - 36)], list_aniomes[-1]),
+        key="comparacion_aniomes",
+    )
+    modo = st.radio("Presentación:", ["Superpuestas", "Paneles"], horizontal=True)
+
+    if not seleccion and region is None:
+        st.info("Seleccione al menos una ubicación.")
+        return None, None
+
+    nombres = {idx_lugar[clave][0]: clave[1] for clave in seleccion}
+    if region is not None:
+        nombres[region] = region.nombre
+    carga = partial(
+        load_comparison_data,
+        client,
+        engine,
+        catalogs["version"],
+        tuple(nombres),
+        sidebar_options["id_agrup_del"],
+        aniomes_ini,
+        aniomes_fin,
+    )
+
+    def mostrar(df_wide):
+        nom_agrupador_selecc = sidebar_options["nom_agrupador_selecc"]
+        if "matplotlib" in GRAFICAS:
+            from ui.chart_cache import render_comparison_chart
+
+            st.image(
+                render_comparison_chart(df_wide, nombres, nom_agrupador_selecc, modo)
+            )
+
+        with st.expander("Ver datos"):
+            st.dataframe(df_wide.rename(columns=nombres))
+
+        if "plotly" in GRAFICAS:
+            from ui.plotlyviz import create_plotly_comparison_chart
+
+            st.plotly_chart(
+                create_plotly_comparison_chart(
+                    df_wide, nombres, nom_agrupador_selecc, modo
+                )
+            )
+
+    return carga, mostrar
+
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def load_comparison_data(
+    _client, _engine, version, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin
+):
+    """Data stage of the comparison tab (cached per selection and range).
+
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+        version: Data version of the catalogs (part of the cache key)
+        cve_lugares: Tuple of location keys
+        id_agrup_del: Crime group ID
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+
+    Returns:
+        DataFrame: "Aniomes" plus one rate column per location
+    """
+    return get_comparison_data(
+        _client,
+        _engine,
+        list(cve_lugares),
+        id_agrup_del,
+        aniomes_ini,
+        aniomes_fin,
+        version,
+    )
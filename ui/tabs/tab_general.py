@@ -1,23 +1,57 @@
 """UI components for the General tab."""
 
+from functools import partial
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-from data.queries import get_crime_data, get_estatal_crime_data, get_national_crime_data
-from ui.plotlyviz import create_plotly_risk_chart
-from ui.visualization import create_crime_chart, calculate_variations
+from config.settings import GRAFICAS
+from data.queries import get_rollup_series, get_series_data, split_series_data
+from ui.sidebar import render_chart_format_controls
 from utils.helpers import get_chart_parameters, get_trend
+from utils.stats import stats_summary
+
+# Rollup offered below the monthly chart -> level of data/rollups.py
+NIVELES_ACUMULADO = {
+    "Trimestral": "trimestral",
+    "Anual": "anual",
+    "Móvil 12 meses": "movil12",
+}
 
 
 def render_general_tab(catalogs, sidebar_options, client, engine):
     """Render the General tab content.
 
+    Data are fetched in a cached stage keyed only on the location, crime group
+    and range; charts are drawn in a fragment, so format changes rerun the
+    fragment alone and never reach the data layer.
+
     Args:
         catalogs: Dictionary of catalog dataframes
         sidebar_options: Dictionary of selected sidebar options
         client: MongoDB client
         engine: SQLAlchemy engine
     """
+    carga, mostrar = render_general_controls(catalogs, sidebar_options, client, engine)
+    mostrar(carga())
+
+
+def render_general_controls(catalogs, sidebar_options, client, engine):
+    """Render the controls of the General tab and prepare its stages.
+
+    The data stage does not touch the page, so the app can run it
+    concurrently with the data stages of the other tabs.
+
+    Args:
+        catalogs: Dictionary of catalog dataframes
+        sidebar_options: Dictionary of selected sidebar options
+        client: MongoDB client
+        engine: SQLAlchemy engine
+
+    Returns:
+        tuple: (data stage: callable without arguments; render stage:
+        callable taking the result of the data stage)
+    """
     # Get list of year-months from catalog
     df_aniomes = catalogs["aniomes"]
     list_aniomes = df_aniomes["Aniomes"].unique()
@@ -27,82 +61,305 @@ def render_general_tab(catalogs, sidebar_options, client, engine):
     aniomes_ini, aniomes_fin = st.select_slider(
         ":calendar: Seleccione los meses a considerar:",
         options=list_aniomes,
-        value=(list_aniomes[-12], list_aniomes[-1]),
+        value=(list_aniomes[max(0, len(list_aniomes) - 12)], list_aniomes[-1]),
+    )
+    nom_nivel = st.radio(
+        ":bar_chart: Acumulados:",
+        list(NIVELES_ACUMULADO),
+        horizontal=True,
+        key="general_acumulados",
+    )
+
+    id_ubic = sidebar_options["id_ubic"]
+    id_ent_asoc = sidebar_options["id_ent_asoc"]
+    carga_general = partial(
+        load_general_data,
+        catalogs,
+        client,
+        engine,
+        catalogs["version"],
+        id_ubic,
+        sidebar_options["id_agrup_del"],
+        id_ent_asoc,
+        aniomes_ini,
+        aniomes_fin,
     )
+    carga_acumulados = partial(
+        load_rollup_data,
+        client,
+        engine,
+        catalogs["version"],
+        tuple(_series_keys(id_ubic, id_ent_asoc)),
+        sidebar_options["id_agrup_del"],
+        aniomes_ini,
+        aniomes_fin,
+        NIVELES_ACUMULADO[nom_nivel],
+    )
+
+    def carga():
+        return carga_general(), carga_acumulados()
+
+    def mostrar(datos):
+        (df, df_stats), df_acumulados = datos
+        render_general_charts(df, df_stats, sidebar_options)
+        render_rollup_chart(df_acumulados, nom_nivel, id_ubic, id_ent_asoc)
+
+    return carga, mostrar
+
+
+def _series_keys(id_ubic, id_ent_asoc):
+    """Location keys of the General tab: location, national and state.
+
+    Duplicates are removed while keeping order (the national location is
+    "P00" itself, and a state is its own associated state).
+    """
+    cve_lugares = [id_ubic, "P00"]
+    if id_ent_asoc != "0":
+        cve_lugares.append("E" + str(id_ent_asoc))
+    return list(dict.fromkeys(cve_lugares))
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def load_general_data(
+    _catalogs,
+    _client,
+    _engine,
+    version,
+    id_ubic,
+    id_agrup_del,
+    id_ent_asoc,
+    aniomes_ini,
+    aniomes_fin,
+):
+    """Data stage of the General tab: location, state, national and trend series.
+
+    Args:
+        _catalogs: Dictionary of catalog dataframes
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+        version: Data version of the catalogs (part of the cache key)
+        id_ubic: Location ID
+        id_agrup_del: Crime group ID
+        id_ent_asoc: Associated state ("0" for national)
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+
+    Returns:
+        tuple: (DataFrame with one row per year-month with tasa, tasa_est,
+        tasa_nal and rate_regression, NaN for months without data; DataFrame
+        of variation statistics of the three rates)
+    """
+    df_aniomes = _catalogs["aniomes"]
 
     # Get base dataframe with all year-months in the selected range
     df = df_aniomes.loc[
         (df_aniomes["Aniomes"] >= aniomes_ini) & (df_aniomes["Aniomes"] <= aniomes_fin),
-        "Aniomes",
+        ["Aniomes", "dt64"],
     ]
 
-    # Get crime data for selected location
-    df_res_ubi = get_crime_data(
-        client,
-        engine,
-        sidebar_options["id_ubic"],
-        sidebar_options["id_agrup_del"],
+    # Get location, state and national crime data in a single query
+    clave_estatal = "E" + str(id_ent_asoc)
+    cve_lugares = _series_keys(id_ubic, id_ent_asoc)
+
+    df_series = get_series_data(
+        _client,
+        _engine,
+        cve_lugares,
+        id_agrup_del,
         aniomes_ini,
         aniomes_fin,
+        version,
     )
+    df_res_ubi = split_series_data(df_series, id_ubic)
 
-    # Check if we got results
+    # Months without data stay NaN: a 0 would be a real value for the trend
+    # and the variations (the charts leave a gap)
     flag_resultados = bool(len(df_res_ubi))
     if flag_resultados:
-        df = pd.merge(df, df_res_ubi, on="Aniomes", how="left").fillna(0)
+        df = pd.merge(df, df_res_ubi, on="Aniomes", how="left")
+        df["CVE_LUGAR"] = id_ubic
+        df["Id_Agrupador_Delito"] = id_agrup_del
     else:
-        df = df.to_frame()
-        df["CVE_LUGAR"] = sidebar_options["id_ubic"]
-        df["Id_Agrupador_Delito"] = sidebar_options["id_agrup_del"]
-        df["Num_Delitos"] = df["tasa"] = 0
+        df = df.copy()
+        df["CVE_LUGAR"] = id_ubic
+        df["Id_Agrupador_Delito"] = id_agrup_del
+        df["Num_Delitos"] = df["tasa"] = np.nan
 
     # Get regression trend data for comparison
     df_trend = get_trend(df.copy())
 
-    # Get national data for comparison
-    df_res_nal = get_national_crime_data(
-        client, engine, sidebar_options["id_agrup_del"], aniomes_ini, aniomes_fin
-    )
+    # National data for comparison
+    df_res_nal = split_series_data(df_series, "P00", "tasa_nal")
 
-    # Get estatal data for comparison
-    if sidebar_options["id_ent_asoc"] == "0":
-        df["tasa_est"] = df_res_nal[["tasa_nal"]]
+    # Estatal data for comparison (national when there is no associated state)
+    if id_ent_asoc == "0":
+        df_res_est = df_res_nal.rename(columns={"tasa_nal": "tasa_est"})
     else:
-        df_res_est = get_estatal_crime_data(
-            client,
-            engine,
-            sidebar_options["id_agrup_del"],
-            sidebar_options["id_ent_asoc"],
-            aniomes_ini,
-            aniomes_fin,
-        )
-        df = pd.merge(df, df_res_est, how="inner", on="Aniomes")
+        df_res_est = split_series_data(df_series, clave_estatal, "tasa_est")
+    df = pd.merge(df, df_res_est, how="inner", on="Aniomes")
 
     # Join dataframes trend y nal
     df = pd.merge(df, df_trend, how="inner", on="Aniomes")
     df = pd.merge(df, df_res_nal, how="inner", on="Aniomes")
 
-    chart_parameteres = get_chart_parameters(sidebar_options)
+    # Variation statistics of the location, state and national rates
+    df_stats = stats_summary(df, ["tasa", "tasa_est", "tasa_nal"], nom_clave="Serie")
+    df_stats["Serie"] = df_stats["Serie"].map(
+        {"tasa": "Ubicación referida", "tasa_est": "Entidad", "tasa_nal": "Nacional"}
+    )
 
-    st.pyplot(
-        create_crime_chart(
-            df,
-            chart_parameteres,
-            sidebar_options,
-            sidebar_options["nom_agrupador_selecc"],
-            sidebar_options["nom_ubic_selecc"],
-        )
+    return df, df_stats
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def load_rollup_data(
+    _client,
+    _engine,
+    version,
+    cve_lugares,
+    id_agrup_del,
+    aniomes_ini,
+    aniomes_fin,
+    nivel,
+):
+    """Quarterly, annual or trailing-12 rollups of the General tab series.
+
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+        version: Data version of the catalogs (part of the cache key)
+        cve_lugares: Tuple of location keys
+        id_agrup_del: Crime group ID
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+        nivel: "trimestral", "anual" or "movil12"
+
+    Returns:
+        DataFrame: One row per Periodo with the accumulated rate of each
+        location key and the months with data of the first one ("meses")
+    """
+    _, df_rollup = get_rollup_series(
+        _client,
+        _engine,
+        list(cve_lugares),
+        id_agrup_del,
+        aniomes_ini,
+        aniomes_fin,
+        nivel,
+    )
+    df_wide = df_rollup.pivot_table(
+        index="Periodo", columns="CVE_LUGAR", values="tasa", aggfunc="sum"
+    ).reindex(columns=list(cve_lugares))
+    df_wide.columns.name = None
+    df_meses = df_rollup.loc[df_rollup["CVE_LUGAR"] == cve_lugares[0]]
+    df_wide["meses"] = df_meses.set_index("Periodo")["meses"]
+    return df_wide.reset_index()
+
+
+def render_rollup_chart(df_acumulados, nom_nivel, id_ubic, id_ent_asoc):
+    """Render the rollups of the location, state and national series.
+
+    Args:
+        df_acumulados: DataFrame returned by load_rollup_data
+        nom_nivel: Name of the rollup level (key of NIVELES_ACUMULADO)
+        id_ubic: Location ID
+        id_ent_asoc: Associated state ("0" for national)
+    """
+    nombres = _series_names(id_ubic, id_ent_asoc)
+    df = df_acumulados.rename(columns=nombres)
+    df["Periodo"] = [
+        _etiqueta_periodo(NIVELES_ACUMULADO[nom_nivel], periodo)
+        for periodo in df["Periodo"]
+    ]
+
+    st.subheader(f"Tasa acumulada: {nom_nivel}")
+    st.caption(
+        "Suma de las tasas mensuales de cada periodo; meses indica los meses "
+        "con datos de la ubicación referida."
     )
+    series = [nombre for nombre in nombres.values() if nombre in df.columns]
+    st.line_chart(df.set_index("Periodo")[series])
+    with st.expander("Ver acumulados"):
+        st.dataframe(df, hide_index=True)
+
+
+def _series_names(id_ubic, id_ent_asoc):
+    """Display name of each key of _series_keys, in the same order."""
+    # The location is named last, so it keeps its name when it is the state
+    # or the national series itself
+    nombres = {"P00": "Nacional", "E" + str(id_ent_asoc): "Entidad"}
+    nombres[id_ubic] = "Ubicación referida"
+    return {
+        cve_lugar: nombres[cve_lugar]
+        for cve_lugar in _series_keys(id_ubic, id_ent_asoc)
+    }
+
+
+def _etiqueta_periodo(nivel, periodo):
+    """Label of a rollup Periodo (YYYY, YYYY-Tn or YYYY-MM)."""
+    periodo = int(periodo)
+    if nivel == "anual":
+        return str(periodo)
+    if nivel == "trimestral":
+        return f"{periodo // 10}-T{periodo % 10}"
+    return f"{periodo // 100}-{periodo % 100:02d}"
+
+
+@st.fragment
+def render_general_charts(df, df_stats, sidebar_options):
+    """Render stage of the General tab: format controls and charts.
+
+    Args:
+        df: DataFrame returned by load_general_data
+        df_stats: Variation statistics returned by load_general_data
+        sidebar_options: Dictionary of selected sidebar options
+    """
+    chart_options = {**sidebar_options, **render_chart_format_controls(st)}
+    chart_parameteres = get_chart_parameters(chart_options)
+
+    # Chart modules (matplotlib, plotly) are imported on first use
+    if "matplotlib" in GRAFICAS:
+        from ui.chart_cache import render_crime_chart
+
+        st.image(
+            render_crime_chart(
+                df,
+                chart_parameteres,
+                chart_options,
+                chart_options["nom_agrupador_selecc"],
+                chart_options["nom_ubic_selecc"],
+            )
+        )
+
+    # Variation metrics of the selected location
+    if len(df_stats):
+        stats_ubi = df_stats.iloc[0]
+        col_mom, col_yoy, col_prom = st.columns(3)
+        col_mom.metric("Var. mensual", _formato_pct(stats_ubi["Var. mensual (%)"]))
+        col_yoy.metric("Var. anual", _formato_pct(stats_ubi["Var. anual (%)"]))
+        col_prom.metric(
+            "Var. mensual promedio",
+            _formato_pct(stats_ubi["Var. mensual promedio (%)"]),
+        )
 
     with st.expander("Ver datos"):
         st.dataframe(df)
+        st.dataframe(df_stats, hide_index=True)
+
+    if "plotly" in GRAFICAS:
+        from ui.plotlyviz import create_plotly_risk_chart
 
-    st.plotly_chart(
-        create_plotly_risk_chart(
-            df,
-            chart_parameteres,
-            sidebar_options,
-            sidebar_options["nom_agrupador_selecc"],
-            sidebar_options["nom_ubic_selecc"],
+        st.plotly_chart(
+            create_plotly_risk_chart(
+                df,
+                chart_parameteres,
+                chart_options,
+                chart_options["nom_agrupador_selecc"],
+                chart_options["nom_ubic_selecc"],
+            )
         )
-    )
+
+
+def _formato_pct(valor):
+    """Format a percentage for st.metric ("n.d." when not available)."""
+    return "n.d." if pd.isna(valor) else f"{valor:,.1f}%"
@@ -0,0 +1,186 @@
+"""UI components for the ranking tab."""
+
+import streamlit as st
+from config.settings import GRAFICAS
+from data.queries import get_comparison_data, get_ranking_data
+from utils.stats import stats_summary
+
+# Location type offered for ranking -> TIPO_LUGAR in dfLugar
+TIPOS_RANKING = {
+    "Entidades": "Entidad",
+    "Metrópolis": "Metropoli",
+    "Municipios": "Municipio",
+}
+
+
+def render_ranking_tab(catalogs, sidebar_options, client, engine):
+    """Render the ranking tab content.
+
+    Args:
+        catalogs: Dictionary of catalog dataframes
+        sidebar_options: Dictionary of selected sidebar options
+        client: MongoDB client
+        engine: SQLAlchemy engine
+    """
+    carga, mostrar = render_ranking_controls(catalogs, sidebar_options, client, engine)
+    mostrar(carga())
+
+
+def render_ranking_controls(catalogs, sidebar_options, client, engine):
+    """Render the controls of the ranking tab and prepare its stages.
+
+    Args:
+        catalogs: Dictionary of catalog dataframes
+        sidebar_options: Dictionary of selected sidebar options
+        client: MongoDB client
+        engine: SQLAlchemy engine
+
+    Returns:
+        tuple: (data stage: callable without arguments; render stage:
+        callable taking the result of the data stage)
+    """
+    df_lugar = catalogs["lugar"]
+
+    tipo_ranking = st.radio(
+        "Ubicaciones:", list(TIPOS_RANKING), horizontal=True, key="ranking_tipo"
+    )
+    df_aniomes = catalogs["aniomes"]
+    list_aniomes = df_aniomes["Aniomes"].unique()
+    list_aniomes.sort()
+    aniomes_ini, aniomes_fin = st.select_slider(
+        ":calendar: Seleccione los meses a considerar:",
+        options=list_aniomes,
+        value=(list_aniomes[max(0, len(list_aniomes) - 12)], list_aniomes[-1]),
+        key="ranking_aniomes",
+    )
+    n_heatmap = st.slider(
+        "Ubicaciones en el mapa de calor:", 5, 50, 20, key="ranking_heatmap"
+    )
+
+    df_tipo = df_lugar.loc[
+        df_lugar["TIPO_LUGAR"] == TIPOS_RANKING[tipo_ranking],
+        ["CVE_LUGAR", "NOM_LUGAR"],
+    ]
+    nombres = dict(zip(df_tipo["CVE_LUGAR"], df_tipo["NOM_LUGAR"]))
+    version = catalogs["version"]
+    id_agrup_del = sidebar_options["id_agrup_del"]
+
+    def carga():
+        df_ranking = load_ranking_data(
+            client,
+            engine,
+            version,
+            tuple(nombres),
+            id_agrup_del,
+            aniomes_ini,
+            aniomes_fin,
+        )
+        # Heatmap of the top places only, never the whole table
+        top_lugares = tuple(df_ranking["CVE_LUGAR"].head(n_heatmap))
+        heatmap = None
+        if top_lugares:
+            heatmap = load_heatmap_data(
+                client,
+                engine,
+                version,
+                top_lugares,
+                id_agrup_del,
+                aniomes_ini,
+                aniomes_fin,
+            )
+        return df_ranking, heatmap
+
+    def mostrar(datos):
+        df_ranking, heatmap = datos
+        top_nombres = {
+            cve: nombres[cve] for cve in df_ranking["CVE_LUGAR"].head(n_heatmap)
+        }
+        df_ranking.insert(0, "Posición", range(1, len(df_ranking) + 1))
+        df_ranking.insert(2, "NOM_LUGAR", df_ranking["CVE_LUGAR"].map(nombres))
+
+        st.subheader(
+            f"Ranking por tasa delictiva: {sidebar_options['nom_agrupador_selecc']}"
+        )
+        st.caption(
+            "Ordenado por la tasa mensual promedio de los meses con datos "
+            "(columna meses)."
+        )
+        st.dataframe(df_ranking, hide_index=True)
+
+        if heatmap is None:
+            return
+
+        df_wide, df_stats = heatmap
+        nom_agrupador_selecc = sidebar_options["nom_agrupador_selecc"]
+        if "plotly" in GRAFICAS:
+            from ui.plotlyviz import create_plotly_heatmap_chart
+
+            st.plotly_chart(
+                create_plotly_heatmap_chart(df_wide, top_nombres, nom_agrupador_selecc)
+            )
+        elif "matplotlib" in GRAFICAS:
+            from ui.chart_cache import render_heatmap_chart
+
+            st.image(render_heatmap_chart(df_wide, top_nombres, nom_agrupador_selecc))
+
+        st.subheader("Variaciones de las primeras posiciones")
+        df_stats.insert(1, "NOM_LUGAR", df_stats["CVE_LUGAR"].map(nombres))
+        st.dataframe(df_stats, hide_index=True)
+
+    return carga, mostrar
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_ranking_data(
+    _client, _engine, version, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin
+):
+    """Ranking of the locations for a crime group and period (cached).
+
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+        version: Data version of the catalogs (part of the cache key)
+        cve_lugares: Tuple of location keys
+        id_agrup_del: Crime group ID
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+
+    Returns:
+        DataFrame: One aggregated row per location, sorted by mean rate
+    """
+    return get_ranking_data(
+        _client, _engine, list(cve_lugares), id_agrup_del, aniomes_ini, aniomes_fin
+    )
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def load_heatmap_data(
+    _client, _engine, version, cve_lugares, id_agrup_del, aniomes_ini, aniomes_fin
+):
+    """Monthly rates and variation statistics of the top-ranked locations.
+
+    Cached per data version and selection.
+
+    Args:
+        _client: MongoDB client
+        _engine: SQLAlchemy engine
+        version: Data version of the catalogs (part of the cache key)
+        cve_lugares: Tuple of location keys
+        id_agrup_del: Crime group ID
+        aniomes_ini: Start year-month
+        aniomes_fin: End year-month
+
+    Returns:
+        tuple: (DataFrame with "Aniomes" plus one rate column per location,
+        DataFrame of variation statistics per location)
+    """
+    df_wide = get_comparison_data(
+        _client,
+        _engine,
+        list(cve_lugares),
+        id_agrup_del,
+        aniomes_ini,
+        aniomes_fin,
+        version,
+    )
+    return df_wide, stats_summary(df_wide, list(cve_lugares))
@@ -3,7 +3,8 @@
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
-from utils.helpers import get_dt64
+from utils.helpers import aniomes_to_dt64
+from utils.stats import pct_variation
 
 
 def create_crime_chart(
@@ -23,7 +24,8 @@ def create_crime_chart(
     """
     # Create a copy of the dataframe for visualization
     dftemp = df.copy()
-    dftemp["dt64"] = dftemp["Aniomes"].apply(get_dt64)
+    if "dt64" not in dftemp.columns:
+        dftemp["dt64"] = aniomes_to_dt64(dftemp["Aniomes"])
 
     # Set up date formatters
     years = mdates.YearLocator()
@@ -93,11 +95,101 @@ def calculate_variations(df):
     # Create a copy of the dataframe
     dftemp = df.copy()
 
-    # Calculate month-to-month percentage changes
-    dftemp["Variacion"] = dftemp["tasa"].pct_change() * 100
-    dftemp.replace([np.inf, -np.inf], np.nan, inplace=True)
+    # Calculate month-to-month percentage changes (NaN on a zero base)
+    dftemp["Variacion"] = pct_variation(dftemp["tasa"].to_numpy(), 1)[0]
 
     # Calculate average variation
     variacion_promedio = round(dftemp["Variacion"].mean(skipna=True), 1)
 
     return dftemp, variacion_promedio
+
+
+def create_comparison_chart(
+    df_wide, nombres, nom_agrupador_selecc, modo="Superpuestas"
+):
+    """Create a chart comparing the rate of several locations.
+
+    Args:
+        df_wide: Wide frame (Aniomes + one column per CVE_LUGAR)
+        nombres: Dictionary CVE_LUGAR -> location name
+        nom_agrupador_selecc: Selected crime group name
+        modo: "Superpuestas" (overlay) or "Paneles" (small multiples)
+
+    Returns:
+        matplotlib.figure.Figure: Generated chart
+    """
+    claves = [clave for clave in df_wide.columns if clave in nombres]
+    fechas = aniomes_to_dt64(df_wide["Aniomes"])
+    fmt = mdates.DateFormatter("%Y-%m")
+
+    if modo == "Paneles":
+        n_columnas = min(3, max(1, len(claves)))
+        n_filas = -(-max(1, len(claves)) // n_columnas)
+        fig, axes = plt.subplots(
+            n_filas,
+            n_columnas,
+            figsize=(16.0, 3.5 * n_filas + 1.5),
+            sharex=True,
+            sharey=True,
+            layout="constrained",
+            squeeze=False,
+        )
+        for ax, clave in zip(axes.ravel(), claves):
+            ax.plot(fechas, df_wide[clave], linewidth=2.5, color="darkslategrey")
+            ax.set_title(nombres[clave], fontsize=12, color="darkslategrey")
+            ax.xaxis.set_major_formatter(fmt)
+            ax.grid(which="major", alpha=0.2)
+        for ax in axes.ravel()[len(claves) :]:
+            ax.set_visible(False)
+    else:
+        fig, ax = plt.subplots(1, 1, figsize=(16.0, 10.0), layout="constrained")
+        for clave in claves:
+            ax.plot(fechas, df_wide[clave], linewidth=3, label=nombres[clave])
+        ax.xaxis.set_major_formatter(fmt)
+        ax.set_xlabel("Periodo", fontsize=14, color="black")
+        ax.set_ylabel("Tasa delictiva", fontsize=14, color="black")
+        ax.grid(which="major", alpha=0.2)
+        fig.legend(loc="lower right", fontsize="10", shadow=True)
+
+    fig.suptitle(
+        "Tasa delictiva mensual de " + nom_agrupador_selecc + " por ubicación",
+        fontsize=22,
+        color="darkslategrey",
+    )
+    return fig
+
+
+def create_heatmap_chart(df_wide, nombres, nom_agrupador_selecc):
+    """Create a location x month heatmap of crime rates.
+
+    Args:
+        df_wide: Wide frame (Aniomes + one column per CVE_LUGAR)
+        nombres: Dictionary CVE_LUGAR -> location name (rows, in order)
+        nom_agrupador_selecc: Selected crime group name
+
+    Returns:
+        matplotlib.figure.Figure: Generated chart
+    """
+    claves = [clave for clave in nombres if clave in df_wide.columns]
+    matriz = df_wide[claves].to_numpy().T
+
+    fig, ax = plt.subplots(
+        1, 1, figsize=(16.0, 2.0 + 0.35 * len(claves)), layout="constrained"
+    )
+    imagen = ax.imshow(matriz, aspect="auto", cmap="Reds", interpolation="nearest")
+    ax.set_yticks(np.arange(len(claves)), [nombres[clave] for clave in claves])
+
+    # At most ~24 labels on the time axis
+    paso = max(1, len(df_wide) // 24)
+    posiciones = np.arange(0, len(df_wide), paso)
+    ax.set_xticks(
+        posiciones, [str(aniomes) for aniomes in df_wide["Aniomes"].iloc[posiciones]]
+    )
+    ax.tick_params(axis="x", labelrotation=90)
+    fig.colorbar(imagen, ax=ax, label="Tasa delictiva")
+    ax.set_title(
+        "Tasa delictiva mensual de " + nom_agrupador_selecc,
+        fontsize=20,
+        color="darkslategrey",
+    )
+    return fig
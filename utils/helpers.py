@@ -2,103 +2,151 @@
 
 import pandas as pd
 import numpy as np
-import datetime
-from sklearn.linear_model import LinearRegression
+from utils.trend import linear_trend
+
+# Location type offered in the sidebar -> TIPO_LUGAR in dfLugar
+TIPOS_UBICACION = {
+    "Nacional": "Pais",
+    "Entidades": "Entidad",
+    "Metrópolis": "Metropoli",
+    "Municipios 800K+": "Municipio",
+    "Municipios 400K+": "Municipio",
+    "Municipios 100K+": "Municipio",
+    "Todos los municipios": "Municipio",
+}
+
+# Population filters (inhabitants in the most recent year) of the location
+# types above. Keys: "min_habs" (inclusive), "max_habs" (exclusive) and "top"
+# (N most populated), e.g. {"min_habs": 50_000, "max_habs": 100_000} or
+# {"top": 50}.
+FILTROS_POBLACION = {
+    "Municipios 800K+": {"min_habs": 800_000},
+    "Municipios 400K+": {"min_habs": 400_000},
+    "Municipios 100K+": {"min_habs": 100_000},
+}
+
+
+class LocationPopulationIndex:
+    """Locations of one TIPO_LUGAR sorted by their population in a given year.
+
+    Threshold and top-N queries are a binary search plus a slice.
+    """
+
+    def __init__(self, df_lugar, df_pob_extendida, year, tipo_lugar="Municipio"):
+        df_pob_year = df_pob_extendida.loc[
+            (df_pob_extendida["Year"] == year)
+            & (df_pob_extendida["TIPO_LUGAR"] == tipo_lugar),
+            ["CVE_LUGAR", "Num_Habs"],
+        ]
+        df_lugar_tipo = df_lugar.loc[
+            df_lugar["TIPO_LUGAR"] == tipo_lugar,
+            ["CVE_LUGAR", "NOM_LUGAR", "IndexOrder"],
+        ]
+        df_index = pd.merge(
+            df_lugar_tipo, df_pob_year, how="inner", on="CVE_LUGAR"
+        ).sort_values(by="Num_Habs", kind="stable")
+
+        self.year = year
+        self.tipo_lugar = tipo_lugar
+        self.cve_lugar = df_index["CVE_LUGAR"].to_numpy()
+        self.nom_lugar = df_index["NOM_LUGAR"].to_numpy()
+        self.index_order = df_index["IndexOrder"].to_numpy()
+        self.num_habs = df_index["Num_Habs"].to_numpy()
+
+    def __len__(self):
+        return len(self.num_habs)
+
+    def _frame(self, tramo):
+        return pd.DataFrame(
+            {"NOM_LUGAR": self.nom_lugar[tramo], "IndexOrder": self.index_order[tramo]}
+        )
+
+    def between(self, min_habs=None, max_habs=None):
+        """Get the locations with min_habs <= population < max_habs.
+
+        Args:
+            min_habs: Lower bound, inclusive (optional)
+            max_habs: Upper bound, exclusive (optional)
+
+        Returns:
+            DataFrame: NOM_LUGAR and IndexOrder of the locations
+        """
+        inicio = 0
+        fin = len(self.num_habs)
+        if min_habs is not None:
+            inicio = np.searchsorted(self.num_habs, min_habs, side="left")
+        if max_habs is not None:
+            fin = np.searchsorted(self.num_habs, max_habs, side="left")
+        return self._frame(slice(inicio, max(inicio, fin)))
+
+    def top(self, n):
+        """Get the n most populated locations.
+
+        Args:
+            n: Number of locations
+
+        Returns:
+            DataFrame: NOM_LUGAR and IndexOrder, most populated first
+        """
+        return self._frame(slice(len(self.num_habs) - 1, None, -1)).head(n)
+
+    def query(self, min_habs=None, max_habs=None, top=None):
+        """Apply a FILTROS_POBLACION specification.
 
+        Args:
+            min_habs: Lower bound, inclusive (optional)
+            max_habs: Upper bound, exclusive (optional)
+            top: Number of most populated locations (optional, overrides bounds)
 
-def get_dt64(aniomes) -> np.datetime64:
-    """Convert Aniomes (YYYYMM) to numpy.datetime64 format.
+        Returns:
+            DataFrame: NOM_LUGAR and IndexOrder of the locations
+        """
+        if top is not None:
+            return self.top(top)
+        return self.between(min_habs, max_habs)
+
+
+def aniomes_to_dt64(aniomes):
+    """Convert an array of Aniomes (YYYYMM) to numpy.datetime64, vectorized.
 
     Args:
-        aniomes: Year and month in YYYYMM format
+        aniomes: Array-like of year-months in YYYYMM format
 
     Returns:
-        np.datetime64: Datetime representation
+        np.ndarray: datetime64[ns] array (first day of each month)
     """
-    year = aniomes // 100
-    mes = aniomes % 100  # Fixed from original code which used "% year"
-    dt = datetime.datetime(year, mes, 1)
-    dt64 = np.datetime64(dt)
-    return dt64
+    aniomes = np.asarray(aniomes, dtype=np.int64)
+    # Months elapsed since 1970-01, the datetime64[M] epoch
+    meses = (aniomes // 100 - 1970) * 12 + (aniomes % 100 - 1)
+    return meses.astype("datetime64[M]").astype("datetime64[ns]")
 
 
-def get_ubicaciones(catalogs, tipo_ubicacion, max_year):
+def get_ubicaciones(catalogs, tipo_ubicacion, max_year, idx_poblacion_mun=None):
     """Get list of locations based on selected location type.
 
     Args:
         catalogs: Dictionary of catalog dataframes
         tipo_ubicacion: Type of location to filter
         max_year : Año más reciente
+        idx_poblacion_mun: LocationPopulationIndex of municipalities for
+            max_year (optional, built when needed)
 
     Returns:
-        Series: List of location names
+        DataFrame: Location names and IndexOrder
     """
     df_lugar = catalogs["lugar"]
-    df_poblacion_extendida = catalogs["poblacion_extendida"]
-
-    match tipo_ubicacion:
-        case "Nacional":
-            df_lugar_sel = df_lugar.loc[
-                df_lugar["TIPO_LUGAR"] == "Pais", ["NOM_LUGAR", "IndexOrder"]
-            ]
-        case "Entidades":
-            df_lugar_sel = df_lugar.loc[
-                df_lugar["TIPO_LUGAR"] == "Entidad", ["NOM_LUGAR", "IndexOrder"]
-            ]
-        case "Metrópolis":
-            df_lugar_sel = df_lugar.loc[
-                df_lugar["TIPO_LUGAR"] == "Metropoli", ["NOM_LUGAR", "IndexOrder"]
-            ]
-        case "Municipios 800K+":
-            df_poblacion_extendida = df_poblacion_extendida.loc[
-                (df_poblacion_extendida["Year"] == max_year)
-                & (df_poblacion_extendida["TIPO_LUGAR"] == "Municipio")
-                & (df_poblacion_extendida["Num_Habs"] >= 800_000),
-                "CVE_LUGAR",
-            ]
-            df_lugar_sel = df_lugar.loc[
-                df_lugar["TIPO_LUGAR"] == "Municipio",
-                ["CVE_LUGAR", "NOM_LUGAR", "IndexOrder"],
-            ]
-            df_lugar_sel = pd.merge(
-                df_lugar_sel, df_poblacion_extendida, how="inner", on="CVE_LUGAR"
-            )
-            df_lugar_sel = df_lugar_sel[["NOM_LUGAR", "IndexOrder"]]
-        case "Municipios 400K+":
-            df_poblacion_extendida = df_poblacion_extendida.loc[
-                (df_poblacion_extendida["Year"] == max_year)
-                & (df_poblacion_extendida["TIPO_LUGAR"] == "Municipio")
-                & (df_poblacion_extendida["Num_Habs"] >= 400_000),
-                "CVE_LUGAR",
-            ]
-            df_lugar_sel = df_lugar.loc[
-                df_lugar["TIPO_LUGAR"] == "Municipio",
-                ["CVE_LUGAR", "NOM_LUGAR", "IndexOrder"],
-            ]
-            df_lugar_sel = pd.merge(
-                df_lugar_sel, df_poblacion_extendida, how="inner", on="CVE_LUGAR"
-            )
-            df_lugar_sel = df_lugar_sel[["NOM_LUGAR", "IndexOrder"]]
-        case "Municipios 100K+":
-            df_poblacion_extendida = df_poblacion_extendida.loc[
-                (df_poblacion_extendida["Year"] == max_year)
-                & (df_poblacion_extendida["TIPO_LUGAR"] == "Municipio")
-                & (df_poblacion_extendida["Num_Habs"] >= 100_000),
-                "CVE_LUGAR",
-            ]
-            df_lugar_sel = df_lugar.loc[
-                df_lugar["TIPO_LUGAR"] == "Municipio",
-                ["CVE_LUGAR", "NOM_LUGAR", "IndexOrder"],
-            ]
-            df_lugar_sel = pd.merge(
-                df_lugar_sel, df_poblacion_extendida, how="inner", on="CVE_LUGAR"
+
+    if tipo_ubicacion in FILTROS_POBLACION:
+        if idx_poblacion_mun is None:
+            idx_poblacion_mun = LocationPopulationIndex(
+                df_lugar, catalogs["poblacion_extendida"], max_year
             )
-            df_lugar_sel = df_lugar_sel[["NOM_LUGAR", "IndexOrder"]]
-        case "Todos los municipios":
-            df_lugar_sel = df_lugar.loc[
-                df_lugar["TIPO_LUGAR"] == "Municipio", ["NOM_LUGAR", "IndexOrder"]
-            ]
-    return df_lugar_sel
+        return idx_poblacion_mun.query(**FILTROS_POBLACION[tipo_ubicacion])
+
+    return df_lugar.loc[
+        df_lugar["TIPO_LUGAR"] == TIPOS_UBICACION[tipo_ubicacion],
+        ["NOM_LUGAR", "IndexOrder"],
+    ]
 
 
 def get_trend(df):
@@ -110,18 +158,8 @@ def get_trend(df):
     Returns:
         Series: Dataframe con los resultados de la regresión
     """
-    # Create X (independent variable) - using row indices
-    X = np.array(range(len(df))).reshape(-1, 1)
-
-    # Create y (dependent variable) - the rate column
-    y = df["tasa"].values
-
-    # Create and fit the linear regression model
-    model = LinearRegression()
-    model.fit(X, y)
-
-    # Calculate the predicted values and add them as a new column
-    df["rate_regression"] = model.predict(X)
+    # Closed-form least squares over the row positions
+    df["rate_regression"] = linear_trend(df["tasa"].to_numpy(dtype=float))["fitted"]
     return df[["Aniomes", "rate_regression"]]
 
 
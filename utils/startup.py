@@ -0,0 +1,81 @@
+"""Startup-time report: where the import time of the application goes.
+
+Each module is imported in a fresh interpreter with ``-X importtime`` so the
+numbers are cold-start numbers, not cached imports.
+
+Usage:
+    python -m utils.startup [module ...]
+"""
+
+import subprocess
+import sys
+
+# Entry point first, then the heavy modules it may pull in
+DEFAULT_MODULES = [
+    "sesnspv2",
+    "streamlit",
+    "pandas",
+    "pymongo",
+    "sqlalchemy",
+    "pyarrow.parquet",
+    "matplotlib.pyplot",
+    "plotly.graph_objects",
+]
+
+
+def measure_import(module, top=10):
+    """Measure the cold import time of a module.
+
+    Args:
+        module: Dotted module name
+        top: Number of slowest imported packages to return
+
+    Returns:
+        dict: "module", "total_ms" (cumulative time, None if the import
+        failed), "slowest" (list of (package, cumulative_ms)) and "error"
+    """
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+
+    tiempos = {}
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "[us]" in linea:
+            continue
+        _, cumulative, nombre = linea[len("import time:") :].split("|")
+        tiempos[nombre.strip()] = int(cumulative) / 1000
+
+    # Only top-level entries of the requested module count for the total
+    total_ms = tiempos.get(module)
+    slowest = sorted(
+        ((nombre, ms) for nombre, ms in tiempos.items() if "." not in nombre),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:top]
+
+    return {
+        "module": module,
+        "total_ms": total_ms if proceso.returncode == 0 else None,
+        "slowest": slowest,
+        "error": proceso.stderr.strip().splitlines()[-1] if proceso.returncode else None,
+    }
+
+
+def main():
+    """Print the startup-time report for the given (or default) modules."""
+    modules = sys.argv[1:] or DEFAULT_MODULES
+    for module in modules:
+        report = measure_import(module)
+        if report["total_ms"] is None:
+            print(f"{module:<24} import failed: {report['error']}")
+            continue
+        print(f"{module:<24} {report['total_ms']:>9.1f} ms")
+        if module == modules[0]:
+            for nombre, ms in report["slowest"]:
+                print(f"    {nombre:<20} {ms:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
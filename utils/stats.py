@@ -0,0 +1,170 @@
+"""Vectorized variation and rolling statistics over many series at once.
+
+Every function takes a 2-D array (series x months) whose columns are
+consecutive months; use to_dense_months first when some months are missing.
+Missing values are NaN and propagate: a variation against a missing or zero
+base is NaN, never inf.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+
+def _as_2d(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(1, -1) if values.ndim == 1 else values
+
+
+def to_dense_months(values, aniomes):
+    """Place columns on a consecutive month axis, NaN for missing months.
+
+    Args:
+        values: 1-D series or 2-D array (series x months)
+        aniomes: Year-months (YYYYMM) of the columns, ascending
+
+    Returns:
+        tuple: (2-D array on the consecutive axis, consecutive year-months)
+    """
+    values = _as_2d(values)
+    aniomes = np.asarray(aniomes, dtype=np.int64)
+    if not len(aniomes):
+        return values, aniomes
+
+    indice = aniomes // 100 * 12 + aniomes % 100 - 1
+    eje = np.arange(indice.min(), indice.max() + 1)
+    densa = np.full((values.shape[0], len(eje)), np.nan)
+    densa[:, indice - eje[0]] = values
+    return densa, eje // 12 * 100 + eje % 12 + 1
+
+
+def pct_variation(values, lag):
+    """Percentage variation against the value `lag` months earlier.
+
+    Args:
+        values: 2-D array (series x consecutive months)
+        lag: 1 for month-over-month, 12 for year-over-year
+
+    Returns:
+        np.ndarray: Same shape; NaN for the first `lag` months, missing
+        months and zero bases
+    """
+    values = _as_2d(values)
+    variacion = np.full(values.shape, np.nan)
+    if values.shape[1] <= lag:
+        return variacion
+
+    actual = values[:, lag:]
+    base = values[:, :-lag]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variacion[:, lag:] = np.where(base != 0, (actual - base) / base * 100, np.nan)
+    return variacion
+
+
+def rolling_mean(values, window):
+    """Rolling mean over `window` months, ignoring missing months.
+
+    Args:
+        values: 2-D array (series x consecutive months)
+        window: Window length in months
+
+    Returns:
+        np.ndarray: Same shape; NaN until the window has data
+    """
+    values = _as_2d(values)
+    validos = ~np.isnan(values)
+    suma = np.cumsum(np.where(validos, values, 0.0), axis=1)
+    cuenta = np.cumsum(validos, axis=1).astype(np.float64)
+    suma[:, window:] -= suma[:, :-window].copy()
+    cuenta[:, window:] -= cuenta[:, :-window].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(cuenta > 0, suma / cuenta, np.nan)
+
+
+def rolling_std(values, window):
+    """Rolling standard deviation over `window` months, ignoring missing months.
+
+    Args:
+        values: 2-D array (series x consecutive months)
+        window: Window length in months
+
+    Returns:
+        np.ndarray: Same shape; NaN until the window has two values
+    """
+    values = _as_2d(values)
+    validos = ~np.isnan(values)
+    limpios = np.where(validos, values, 0.0)
+    suma = np.cumsum(limpios, axis=1)
+    suma2 = np.cumsum(limpios**2, axis=1)
+    cuenta = np.cumsum(validos, axis=1).astype(np.float64)
+    for acumulado in (suma, suma2, cuenta):
+        acumulado[:, window:] -= acumulado[:, :-window].copy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        varianza = (suma2 - suma**2 / cuenta) / (cuenta - 1)
+    return np.where(cuenta > 1, np.sqrt(np.maximum(varianza, 0.0)), np.nan)
+
+
+def variation_stats(values, window=12):
+    """Compute every variation statistic for all series at once.
+
+    Args:
+        values: 2-D array (series x consecutive months)
+        window: Window of the rolling mean and volatility
+
+    Returns:
+        dict: "mom", "yoy", "media_movil", "volatilidad" (2-D arrays) and
+        "variacion_promedio" (mean MoM per series, 1-D)
+    """
+    values = _as_2d(values)
+    mom = pct_variation(values, 1)
+    with warnings.catch_warnings():
+        # Series without any valid variation get NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        variacion_promedio = np.nanmean(mom, axis=1)
+    return {
+        "mom": mom,
+        "yoy": pct_variation(values, 12),
+        "media_movil": rolling_mean(values, window),
+        "volatilidad": rolling_std(mom, window),
+        "variacion_promedio": variacion_promedio,
+    }
+
+
+def _ultimo_valido(matriz):
+    """Last non-NaN value of each row (NaN if none)."""
+    validos = ~np.isnan(matriz)
+    posicion = matriz.shape[1] - 1 - np.argmax(validos[:, ::-1], axis=1)
+    ultimo = matriz[np.arange(matriz.shape[0]), posicion]
+    return np.where(validos.any(axis=1), ultimo, np.nan)
+
+
+def stats_summary(df_wide, claves, window=12, nom_clave="CVE_LUGAR"):
+    """Summarize the variation statistics of the columns of a wide frame.
+
+    Args:
+        df_wide: Wide frame (Aniomes + one column per series)
+        claves: Columns to summarize
+        window: Window of the rolling mean and volatility
+        nom_clave: Name of the column holding the series keys
+
+    Returns:
+        DataFrame: One row per series with the last MoM and YoY variation,
+        the average MoM variation, the last rolling mean and volatility
+    """
+    claves = [clave for clave in claves if clave in df_wide.columns]
+    if not claves or not len(df_wide):
+        return pd.DataFrame(columns=[nom_clave])
+
+    densa, _ = to_dense_months(df_wide[claves].to_numpy().T, df_wide["Aniomes"])
+    stats = variation_stats(densa, window)
+    return pd.DataFrame(
+        {
+            nom_clave: claves,
+            "Var. mensual (%)": _ultimo_valido(stats["mom"]),
+            "Var. anual (%)": _ultimo_valido(stats["yoy"]),
+            "Var. mensual promedio (%)": stats["variacion_promedio"],
+            f"Media móvil {window}m": _ultimo_valido(stats["media_movil"]),
+            f"Volatilidad {window}m": _ultimo_valido(stats["volatilidad"]),
+        }
+    ).round(1)
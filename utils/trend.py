@@ -0,0 +1,152 @@
+"""Closed-form trend estimation, vectorized across many series.
+
+Every function takes a 1-D series or a 2-D array (series x months) and fits
+all rows at once against the month position 0..n-1. Missing months (NaN) are
+ignored in the fit.
+"""
+
+import warnings
+
+import numpy as np
+
+
+def _as_2d(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(1, -1) if values.ndim == 1 else values
+
+
+def _result(slope, intercept, values, x, squeeze):
+    """Build the result dictionary with fitted values and slope statistics."""
+    fitted = intercept[:, None] + slope[:, None] * x[None, :]
+    validos = ~np.isnan(values)
+    n = validos.sum(axis=1)
+
+    residuos = np.where(validos, values - fitted, 0.0)
+    ss_res = (residuos**2).sum(axis=1)
+    media = np.nansum(values, axis=1) / np.maximum(n, 1)
+    ss_tot = (np.where(validos, values - media[:, None], 0.0) ** 2).sum(axis=1)
+    media_x = (validos @ x) / np.maximum(n, 1)
+    x_centrada = np.where(validos, x[None, :] - media_x[:, None], 0.0)
+    sxx = (x_centrada**2).sum(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r2 = np.where(ss_tot > 0, 1.0 - ss_res / ss_tot, np.nan)
+        slope_stderr = np.where(
+            (n > 2) & (sxx > 0), np.sqrt(ss_res / (n - 2) / sxx), np.nan
+        )
+        t_stat = slope / slope_stderr
+
+    result = {
+        "slope": slope,
+        "intercept": intercept,
+        "fitted": fitted,
+        "r2": r2,
+        "slope_stderr": slope_stderr,
+        "t_stat": t_stat,
+        "n": n,
+    }
+    if squeeze:
+        result = {key: value[0] for key, value in result.items()}
+    return result
+
+
+def linear_trend(values):
+    """Ordinary least-squares trend in closed form.
+
+    Args:
+        values: 1-D series or 2-D array (series x months)
+
+    Returns:
+        dict: "slope", "intercept", "fitted", "r2", "slope_stderr", "t_stat"
+        and "n" (one value per series; scalars for a 1-D input)
+    """
+    squeeze = np.ndim(values) == 1
+    values = _as_2d(values)
+    x = np.arange(values.shape[1], dtype=np.float64)
+
+    validos = ~np.isnan(values)
+    w = validos.astype(np.float64)
+    y = np.where(validos, values, 0.0)
+
+    n = w.sum(axis=1)
+    sx = w @ x
+    sxx = w @ (x**2)
+    sy = y.sum(axis=1)
+    sxy = y @ x
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominador = n * sxx - sx**2
+        slope = np.where(denominador != 0, (n * sxy - sx * sy) / denominador, 0.0)
+        intercept = np.where(n > 0, (sy - slope * sx) / n, np.nan)
+
+    return _result(slope, intercept, values, x, squeeze)
+
+
+def theil_sen_trend(values):
+    """Theil-Sen trend: median of all pairwise slopes, robust to outliers.
+
+    Args:
+        values: 1-D series or 2-D array (series x months)
+
+    Returns:
+        dict: Same keys as linear_trend
+    """
+    squeeze = np.ndim(values) == 1
+    values = _as_2d(values)
+    n_meses = values.shape[1]
+    x = np.arange(n_meses, dtype=np.float64)
+
+    i, j = np.triu_indices(n_meses, k=1)
+    pendientes = (values[:, j] - values[:, i]) / (j - i)
+
+    with warnings.catch_warnings():
+        # All-NaN rows (series without data) get a flat trend
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        if pendientes.shape[1]:
+            slope = np.nanmedian(pendientes, axis=1)
+        else:
+            slope = np.zeros(values.shape[0])
+        slope = np.where(np.isnan(slope), 0.0, slope)
+        intercept = np.nanmedian(values - slope[:, None] * x[None, :], axis=1)
+
+    return _result(slope, intercept, values, x, squeeze)
+
+
+def seasonal_trend(values, aniomes, method="linear"):
+    """Trend after removing the average calendar-month effect.
+
+    Args:
+        values: 1-D series or 2-D array (series x months)
+        aniomes: Year-months (YYYYMM) of the columns
+        method: "linear" or "theil_sen"
+
+    Returns:
+        dict: Same keys as linear_trend plus "seasonal" (the monthly effect
+        removed from each column); "fitted" includes the seasonal effect
+    """
+    squeeze = np.ndim(values) == 1
+    values = _as_2d(values)
+    mes = np.asarray(aniomes, dtype=np.int64) % 100 - 1
+
+    # Average residual of a first linear fit for each calendar month, so the
+    # trend itself is not absorbed into the monthly effect
+    desviacion = values - linear_trend(values)["fitted"]
+    efecto_mes = np.zeros((values.shape[0], 12))
+    with warnings.catch_warnings():
+        # Calendar months without data in a series stay at zero effect
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        for numero_mes in np.unique(mes):
+            efecto_mes[:, numero_mes] = np.nanmean(
+                desviacion[:, mes == numero_mes], axis=1
+            )
+    efecto_mes = np.nan_to_num(efecto_mes)
+    seasonal = efecto_mes[:, mes]
+
+    estimador = theil_sen_trend if method == "theil_sen" else linear_trend
+    result = estimador(values - seasonal)
+    result["fitted"] = result["fitted"] + seasonal
+    result["seasonal"] = seasonal
+
+    if squeeze:
+        result = {key: value[0] for key, value in result.items()}
+    return result